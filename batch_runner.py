@@ -0,0 +1,1125 @@
+"""
+Batch transcription: the pipelined batch runner, the multi-process farm
+and the command line.
+
+BatchPipeline overlaps downloads with inference for a list of URLs and
+files, BatchManifest records how far each source got so an interrupted
+run can resume, and TranscriptionFarm spreads CPU-bound work over pinned
+worker processes. ``python batch_runner.py <command>`` (or the equivalent
+``python stt_utils.py <command>``) runs them headless.
+"""
+
+import hashlib
+import json
+import os
+import queue
+import re
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Tuple, Dict, Any, Callable, List
+
+from stt_utils import (
+    DEFAULT_BEAM_SIZE,
+    DEFAULT_COMPUTE_TYPE,
+    Instrumentation,
+    JsonLinesSink,
+    StageEvent,
+    TRANSCRIPT_FORMATS,
+    TRANSCRIPT_INDEX_PATH,
+    TranscriptionResult,
+    VAD_MODE,
+    create_safe_filename,
+    download_youtube_audio,
+    extract_youtube_video_id,
+    format_timestamp,
+    get_model_registry,
+    get_scratch_space,
+    get_transcript_cache,
+    get_transcript_index,
+    index_transcript,
+    instrumentation_for,
+    parse_transcript_formats,
+    probe_audio_duration,
+    transcribe_audio_chunked,
+    transcribe_audio_file,
+    transcript_outputs,
+    vad_cache_spec,
+    write_transcripts,
+)
+
+
+# Batch inputs at least this long are split at pauses and decoded in parallel
+# (see transcribe_audio_chunked; 0 = never)
+CHUNKED_MIN_AUDIO_SECONDS = float(os.getenv("WHISPER_CHUNKED_MIN_SECONDS", "0"))
+CHUNKED_WORKERS = int(os.getenv("WHISPER_CHUNKED_WORKERS", "2"))
+
+
+def transcript_names(sources: List[str]) -> Dict[str, str]:
+    """
+    Distinct transcript base names for the local audio files among ``sources``
+    
+    A file is named after its stem unless another file shares it (a/intro.wav
+    and b/intro.wav, or intro.wav and intro.mp3); those are told apart by the
+    directories that differ between them and, failing that, by extension.
+    URLs are left out, see source_transcript_name().
+    
+    Returns:
+        Dict mapping each local source to its name
+    """
+    groups: Dict[str, Dict[Path, List[str]]] = {}
+    for source in sources:
+        if not is_url(source):
+            path = Path(source)
+            groups.setdefault(path.stem.lower(), {}).setdefault(path.resolve(), []).append(source)
+    
+    names: Dict[str, str] = {}
+    used = set()
+    for files in groups.values():
+        paths = list(files)
+        if len(paths) == 1:
+            labels = [paths[0].stem]
+        else:
+            try:
+                common = Path(os.path.commonpath([path.parent for path in paths]))
+                labels = ["_".join(path.parent.relative_to(common).parts + (path.stem,)) for path in paths]
+            except ValueError:
+                labels = [path.stem for path in paths]  # Different drives
+            labels = [f"{label}_{path.suffix.lstrip('.')}" if labels.count(label) > 1 else label
+                      for path, label in zip(paths, labels)]
+        for path, label in zip(paths, labels):
+            name, number = label, 2
+            while name.lower() in used:
+                name, number = f"{label}_{number}", number + 1
+            used.add(name.lower())
+            for source in files[path]:
+                names[source] = name
+    return names
+
+
+def source_transcript_name(source: str, title: str, local_names: Optional[Dict[str, str]] = None) -> str:
+    """
+    Transcript base name for a batch source
+    
+    Video titles are not unique (and are shortened), so URLs get the video
+    id appended; local files take their name from ``local_names`` (see
+    transcript_names()), falling back to the file's stem.
+    """
+    if not is_url(source):
+        return (local_names or {}).get(source) or Path(source).stem
+    video_id = extract_youtube_video_id(source) or hashlib.sha256(source.encode("utf-8")).hexdigest()[:11]
+    return f"{create_safe_filename(title)}_{video_id}"
+
+
+class BatchManifest:
+    """
+    Crash-safe record of where every source of a batch got to
+    
+    Each state change is appended to a JSON-lines file and synced to disk
+    before the batch moves on, so the manifest survives a crash or power
+    loss at any point. Replaying it gives the latest state per source:
+    
+        queued       accepted into a run, not started yet
+        downloaded   audio is on disk (scratch space, lost on a crash)
+        transcribed  decoded, transcript not written yet
+        written      transcript saved at ``output_file``
+        failed       gave up at ``stage`` with ``error``
+    
+    Only ``written`` sources whose transcript still exists count as done;
+    everything else is picked up again by ``pending``.
+    """
+    
+    QUEUED = "queued"
+    DOWNLOADED = "downloaded"
+    TRANSCRIBED = "transcribed"
+    WRITTEN = "written"
+    FAILED = "failed"
+    
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        torn = self._load()
+        self._file = open(self.path, 'a', encoding='utf-8')
+        if torn:
+            self._file.write("\n")  # Keep the next record off an interrupted line
+    
+    def _load(self) -> bool:
+        """Replay existing records; returns True if the file ends mid-line"""
+        if not self.path.exists():
+            return False
+        with open(self.path, 'r', encoding='utf-8', errors='replace') as f:
+            content = f.read()
+        for line in content.splitlines():
+            try:
+                record = json.loads(line)
+                self._apply(record)
+            except (ValueError, KeyError, TypeError, AttributeError):
+                continue  # Torn last line from an interrupted run
+        return bool(content) and not content.endswith("\n")
+    
+    def _apply(self, record: Dict[str, Any]) -> None:
+        entry = self._entries.setdefault(record["source"], {})
+        if record["state"] != self.FAILED:
+            # A retried source no longer carries its previous failure
+            entry.pop("stage", None)
+            entry.pop("error", None)
+        entry.update(record)
+    
+    def record(self, source: str, state: str, **fields) -> None:
+        """Append a state change for a source and sync it to disk"""
+        record = {"source": source, "state": state, "time": round(time.time(), 3)}
+        record.update({key: value for key, value in fields.items() if value is not None})
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._apply(record)
+    
+    def entry(self, source: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(source)
+            return dict(entry) if entry else None
+    
+    def state(self, source: str) -> Optional[str]:
+        entry = self.entry(source)
+        return entry["state"] if entry else None
+    
+    def completed(self) -> Dict[str, str]:
+        """Sources whose transcript was written and still exists, mapped to its path"""
+        with self._lock:
+            entries = list(self._entries.values())
+        return {entry["source"]: entry["output_file"] for entry in entries
+                if entry["state"] == self.WRITTEN and Path(entry.get("output_file", "")).is_file()}
+    
+    def pending(self, sources: List[str]) -> List[str]:
+        """The sources still to do, in order: never seen, interrupted, failed or with a missing transcript"""
+        done = self.completed()
+        return [source for source in sources if source not in done]
+    
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            states = [entry["state"] for entry in self._entries.values()]
+        return {state: states.count(state) for state in sorted(set(states))}
+    
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+class BatchItem:
+    """State of one URL as it moves through a BatchPipeline"""
+    
+    def __init__(self, index: int, url: str):
+        self.index = index
+        self.url = url
+        self.audio_file: Optional[Path] = None
+        self.video_info: Dict[str, Any] = {}
+        self.audio_bytes = 0
+        self.result: Any = None
+        self.output_file: Optional[Path] = None
+        self.error: Optional[Exception] = None
+        self.failed_stage: Optional[str] = None
+    
+    @property
+    def title(self) -> str:
+        return self.video_info.get('title', f'Unknown_Video_{self.index}')
+
+
+class BatchReport:
+    """Outcome of a batch run, in input order"""
+    
+    def __init__(self, items: List[BatchItem]):
+        self.items = items
+        self.successful = [item for item in items if item.output_file is not None]
+        self.failed = [item for item in items if item.error is not None]
+        self.skipped = [item for item in items if item.output_file is None and item.error is None]
+
+
+class BatchPipeline:
+    """
+    Producer/consumer batch engine that overlaps downloading with transcription
+    
+    Stages:
+        download    ``download_fn(url, index) -> (audio_file, video_info)``,
+                    run by ``prefetch_workers`` threads ahead of inference
+        transcribe  ``transcribe_fn(item) -> result``, one item at a time in
+                    input order; it must fully decode before returning
+        write       ``write_fn(item) -> output_file`` on a separate writer thread
+    
+    Downloaded audio is removed with ``cleanup_fn(item)`` (by default the
+    audio file is deleted) as soon as an item is transcribed or abandoned.
+    
+    At most ``prefetch_depth`` items are downloaded ahead of the one being
+    transcribed, and downloads wait while ``max_disk_bytes`` of audio is
+    already waiting on disk. With ``skip_errors`` False the first failure
+    stops the batch like the sequential loop did (an item already
+    transcribed may still be written).
+    
+    With a ``manifest`` every item's progress is recorded in a
+    BatchManifest so an interrupted run can be resumed.
+    """
+    
+    def __init__(self, download_fn: Callable[[str, int], Tuple[Path, Dict[str, Any]]],
+                 transcribe_fn: Callable[[BatchItem], Any],
+                 write_fn: Callable[[BatchItem], Path],
+                 prefetch_workers: int = 2, prefetch_depth: int = 2,
+                 max_disk_bytes: Optional[int] = None, skip_errors: bool = True,
+                 cleanup_audio: bool = True,
+                 cleanup_fn: Optional[Callable[[BatchItem], None]] = None,
+                 progress_callback: Optional[Callable[[str], None]] = None,
+                 manifest: Optional[BatchManifest] = None):
+        self.download_fn = download_fn
+        self.transcribe_fn = transcribe_fn
+        self.write_fn = write_fn
+        self.prefetch_workers = max(1, prefetch_workers)
+        self.prefetch_depth = max(1, prefetch_depth)
+        self.max_disk_bytes = max_disk_bytes
+        self.skip_errors = skip_errors
+        self.cleanup_audio = cleanup_audio
+        self.cleanup_fn = cleanup_fn or self._delete_audio_file
+        self.progress_callback = progress_callback
+        self.instrumentation = instrumentation_for(progress_callback)
+        self.manifest = manifest
+        
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._next_to_download = 0
+        self._next_to_transcribe = 0
+        self._disk_in_use = 0
+        self._downloaded: Dict[int, BatchItem] = {}
+        self._slots = threading.Semaphore(self.prefetch_depth)
+    
+    def log(self, message: str) -> None:
+        self.instrumentation(message)
+    
+    def _record(self, item: BatchItem, state: str, **fields) -> None:
+        if self.manifest is None:
+            return
+        try:
+            self.manifest.record(item.url, state, **fields)
+        except Exception as e:
+            # Losing resume information must not fail the transcription itself
+            self.log(f"[{item.index}] Could not update batch manifest: {e}")
+    
+    def stop(self) -> None:
+        """Stop handing out new work; in-flight stages finish"""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+    
+    def run(self, urls: List[str]) -> BatchReport:
+        """Process every URL and return the per-item outcome"""
+        items = [BatchItem(index, url) for index, url in enumerate(urls, 1)]
+        self._items = items
+        total = len(items)
+        for item in items:
+            self._record(item, BatchManifest.QUEUED)
+        
+        downloaders = [threading.Thread(target=self._download_worker, args=(total,),
+                                        name=f"batch-download-{n}", daemon=True)
+                       for n in range(min(self.prefetch_workers, total))]
+        write_queue: "queue.Queue" = queue.Queue(maxsize=self.prefetch_depth)
+        writer = threading.Thread(target=self._write_worker, args=(write_queue, total),
+                                  name="batch-writer", daemon=True)
+        for thread in downloaders:
+            thread.start()
+        writer.start()
+        
+        try:
+            for position in range(total):
+                item = self._wait_for_download(position)
+                if item is None:
+                    break
+                self._slots.release()
+                if item.error is None:
+                    self._transcribe(item, total)
+                else:
+                    self._discard_audio(item)
+                if item.error is not None:
+                    self._report_failure(item, total)
+                    if not self.skip_errors:
+                        break
+                else:
+                    write_queue.put(item)
+        finally:
+            write_queue.put(None)
+            writer.join()
+            self.stop()
+            for _ in downloaders:
+                self._slots.release()  # Wake downloaders waiting for a prefetch slot
+            for thread in downloaders:
+                thread.join()
+            # Discard audio prefetched for items that were never transcribed
+            for item in self._downloaded.values():
+                self._discard_audio(item)
+        
+        return BatchReport(items)
+    
+    def _download_worker(self, total: int) -> None:
+        while True:
+            self._slots.acquire()
+            with self._cond:
+                if self._stopped or self._next_to_download >= total:
+                    self._slots.release()
+                    return
+                item = self._items[self._next_to_download]
+                self._next_to_download += 1
+                
+                # Disk back-pressure; the item inference is waiting on is never held back
+                while (self.max_disk_bytes and self._disk_in_use >= self.max_disk_bytes
+                       and item.index - 1 != self._next_to_transcribe and not self._stopped):
+                    self._cond.wait()
+                if self._stopped:
+                    self._slots.release()
+                    return
+            
+            self.log(f"[{item.index}/{total}] Downloading: {item.url}")
+            try:
+                with self.instrumentation.stage("download", item.index, url=item.url) as stage:
+                    item.audio_file, item.video_info = self.download_fn(item.url, item.index)
+                    item.audio_bytes = item.audio_file.stat().st_size if item.audio_file else 0
+                    stage["bytes"] = item.audio_bytes
+                self._record(item, BatchManifest.DOWNLOADED, title=item.title)
+                self.log(f"[{item.index}/{total}] Downloaded: {item.title}")
+            except Exception as e:
+                item.error = e
+                item.failed_stage = "download"
+            
+            with self._cond:
+                self._disk_in_use += item.audio_bytes
+                self._downloaded[item.index - 1] = item
+                self._cond.notify_all()
+    
+    def _wait_for_download(self, position: int) -> Optional[BatchItem]:
+        with self._cond:
+            self._next_to_transcribe = position
+            self._cond.notify_all()
+            while position not in self._downloaded:
+                if self._stopped:
+                    return None
+                self._cond.wait()
+            return self._downloaded.pop(position)
+    
+    def _transcribe(self, item: BatchItem, total: int) -> None:
+        self.log(f"[{item.index}/{total}] Transcribing: {item.title}")
+        try:
+            with self.instrumentation.stage("transcribe", item.index, url=item.url) as stage:
+                item.result = self.transcribe_fn(item)
+                stage["audio_seconds"] = getattr(getattr(item.result, "info", None), "duration", None)
+            self._record(item, BatchManifest.TRANSCRIBED)
+        except Exception as e:
+            item.error = e
+            item.failed_stage = "transcribe"
+        finally:
+            self._discard_audio(item)
+    
+    @staticmethod
+    def _delete_audio_file(item: BatchItem) -> None:
+        if item.audio_file is not None:
+            item.audio_file.unlink()
+    
+    def _discard_audio(self, item: BatchItem) -> None:
+        if self.cleanup_audio:
+            try:
+                self.cleanup_fn(item)
+            except Exception:
+                pass
+        with self._cond:
+            self._disk_in_use -= item.audio_bytes
+            item.audio_bytes = 0
+            self._cond.notify_all()
+    
+    def _write_worker(self, write_queue: "queue.Queue", total: int) -> None:
+        while True:
+            item = write_queue.get()
+            if item is None:
+                return
+            try:
+                with self.instrumentation.stage("write", item.index, url=item.url) as stage:
+                    item.output_file = self.write_fn(item)
+                    stage["output_file"] = str(item.output_file)
+                self._record(item, BatchManifest.WRITTEN, output_file=str(item.output_file))
+                self.log(f"[{item.index}/{total}] ✓ Saved: {item.output_file.name}")
+            except Exception as e:
+                item.error = e
+                item.failed_stage = "write"
+                self._report_failure(item, total)
+                if not self.skip_errors:
+                    self.stop()
+    
+    def _report_failure(self, item: BatchItem, total: int) -> None:
+        self._record(item, BatchManifest.FAILED, stage=item.failed_stage, error=str(item.error))
+        self.log(f"[{item.index}/{total}] ✗ Failed to process {item.url}: {str(item.error)}")
+        if not self.skip_errors:
+            self.log("Stopping batch processing due to error")
+            self.stop()
+
+
+def transcribe_batch(sources: List[str], output_dir: Path, model_name: str = "base",
+                     include_timestamps: bool = False, output_format: str = "txt",
+                     language: Optional[str] = None, prefetch_workers: int = 2,
+                     max_disk_bytes: Optional[int] = None, skip_errors: bool = True,
+                     progress_callback: Optional[Callable[[str], None]] = None,
+                     manifest: Optional[BatchManifest] = None, index=None,
+                     names: Optional[Dict[str, str]] = None,
+                     chunked_min_seconds: float = CHUNKED_MIN_AUDIO_SECONDS) -> BatchReport:
+    """
+    High-level function: Transcribe YouTube URLs and local audio files with pipelined downloads
+    
+    Args:
+        sources: YouTube URLs and/or audio file paths
+        output_dir: Directory to save transcripts
+        model_name: Whisper model to use
+        include_timestamps: Whether text transcripts include timestamps
+        output_format: Transcript format(s) from TRANSCRIPT_FORMATS, as a
+            list or comma-separated ("txt,srt"); all are written in one pass
+        language: Language code, or None to detect it per source
+        prefetch_workers: Number of concurrent downloads
+        max_disk_bytes: Cap on downloaded audio waiting to be transcribed
+        skip_errors: Continue past failed sources instead of stopping
+        progress_callback: Optional callback for progress updates (or an
+            Instrumentation for per-item stage events)
+        manifest: Optional BatchManifest recording each source's progress;
+            pass ``manifest.pending(sources)`` to resume an interrupted run
+        index: TranscriptIndex each written transcript is added to (default:
+            the one configured with WHISPER_TRANSCRIPT_INDEX, if any)
+        names: Transcript names of local files from transcript_names(); when
+            resuming, pass the names of the full source list so files keep
+            the names the original run gave them (default: worked out from
+            ``sources``)
+        chunked_min_seconds: Sources at least this long go through
+            transcribe_audio_chunked with CHUNKED_WORKERS parallel decodes
+            (0 = decode every source in one pass)
+        
+    Returns:
+        BatchReport with successful, failed and skipped items
+        
+    Raises:
+        ValueError: If output_format is not supported
+    """
+    formats = parse_transcript_formats(output_format)
+    if index is None:
+        index = get_transcript_index()
+    output_dir.mkdir(parents=True, exist_ok=True)
+    scratch = get_scratch_space()
+    job_dirs: Dict[int, Path] = {}
+    # Work out clashing file names up front so no transcript overwrites another
+    local_names = transcript_names(sources) if names is None else names
+    
+    def download(source: str, index: int):
+        if not is_url(source):
+            path = Path(source)
+            if not path.is_file():
+                raise Exception(f"Audio file not found: {source}")
+            return path, {'title': path.stem}
+        # Each video downloads into its own scratch directory
+        job_dir = scratch.create_job_dir("batch")
+        job_dirs[index] = job_dir
+        audio_file, info = download_youtube_audio(source, job_dir, max_filesize=scratch.remaining_bytes())
+        scratch.check_quota()
+        return audio_file, info
+    
+    def cleanup(item: BatchItem) -> None:
+        # Only scratch directories are removed; local input files are never touched
+        job_dir = job_dirs.pop(item.index, None)
+        if job_dir is not None:
+            scratch.remove_job_dir(job_dir)
+    
+    def transcribe(item: BatchItem) -> TranscriptionResult:
+        duration = probe_audio_duration(item.audio_file) if chunked_min_seconds > 0 else None
+        if duration is not None and duration >= chunked_min_seconds:
+            segments, info = transcribe_audio_chunked(item.audio_file, model_name, language=language,
+                                                      workers=CHUNKED_WORKERS)
+        else:
+            segments, info = transcribe_audio_file(item.audio_file, model_name, language=language)
+        result = TranscriptionResult(segments, info, item.title, item.url, model_name)
+        # Decode fully here so the writer stage only does I/O
+        result.segments.fill()
+        return result
+    
+    def write(item: BatchItem) -> Path:
+        name = source_transcript_name(item.url, item.result.video_title, local_names)
+        outputs = write_transcripts(item.result, transcript_outputs(output_dir, name, formats),
+                                    include_timestamps)
+        if index is not None:
+            index_transcript(index, item.result, outputs[formats[0]], pipeline.log)
+        return outputs[formats[0]]
+    
+    pipeline = BatchPipeline(download, transcribe, write, prefetch_workers=prefetch_workers,
+                             max_disk_bytes=max_disk_bytes, skip_errors=skip_errors,
+                             cleanup_fn=cleanup, progress_callback=progress_callback,
+                             manifest=manifest)
+    return pipeline.run(sources)
+
+
+def transcribe_youtube_batch(urls: List[str], output_dir: Path, model_name: str = "base",
+                             include_timestamps: bool = False, prefetch_workers: int = 2,
+                             max_disk_bytes: Optional[int] = None, skip_errors: bool = True,
+                             progress_callback: Optional[Callable[[str], None]] = None) -> BatchReport:
+    """
+    High-level function: Transcribe many YouTube videos with pipelined downloads
+    
+    Args:
+        urls: YouTube URLs
+        output_dir: Directory to save transcripts and temporary audio
+        model_name: Whisper model to use
+        include_timestamps: Whether to include timestamps
+        prefetch_workers: Number of concurrent downloads
+        max_disk_bytes: Cap on downloaded audio waiting to be transcribed
+        skip_errors: Continue past failed videos instead of stopping
+        progress_callback: Optional callback for progress updates
+        
+    Returns:
+        BatchReport with successful, failed and skipped items
+    """
+    return transcribe_batch(urls, output_dir, model_name, include_timestamps,
+                            prefetch_workers=prefetch_workers, max_disk_bytes=max_disk_bytes,
+                            skip_errors=skip_errors, progress_callback=progress_callback)
+
+
+# Audio file types picked up when scanning directories
+AUDIO_EXTENSIONS = {".mp3", ".wav", ".m4a", ".flac", ".ogg", ".wma", ".aac", ".opus", ".webm"}
+
+
+def probe_youtube_duration(url: str) -> Optional[float]:
+    """Duration of a YouTube video from its metadata, without downloading"""
+    try:
+        import yt_dlp
+        with yt_dlp.YoutubeDL({'quiet': True}) as ydl:
+            return ydl.extract_info(url, download=False).get('duration')
+    except Exception:
+        return None
+
+
+def is_url(source: str) -> bool:
+    return source.startswith(("http://", "https://"))
+
+
+# Per-process state of a TranscriptionFarm worker
+_farm_worker: Dict[str, Any] = {}
+
+
+def _farm_worker_init(counter, settings: Dict[str, Any]) -> None:
+    """Pin this worker to its slice of cores and load the model once"""
+    with counter.get_lock():
+        index = counter.value
+        counter.value += 1
+    
+    threads = settings["cpu_threads"]
+    cores = settings.get("cores")
+    if cores and settings.get("pin_cores") and hasattr(os, "sched_setaffinity"):
+        worker_cores = cores[index * threads:(index + 1) * threads] or cores
+        try:
+            os.sched_setaffinity(0, worker_cores)
+        except OSError:
+            pass
+    
+    registry = get_model_registry()
+    _, key = registry.acquire(settings["model_name"], settings["device"],
+                              settings["compute_type"], threads)  # Lease held for the worker's lifetime
+    _farm_worker.update(settings, index=index, registry=registry, key=key)
+
+
+def _farm_transcribe(source: str, output_dir: Optional[str], include_timestamps: bool,
+                     name: Optional[str] = None, formats: Tuple[str, ...] = ("txt",)) -> Dict[str, Any]:
+    """Worker task: transcribe one file or URL and optionally save its transcripts"""
+    settings = _farm_worker
+    model_name = settings["model_name"]
+    started = time.perf_counter()
+    outcome: Dict[str, Any] = {"source": source, "worker": settings["index"], "pid": os.getpid()}
+    # Every worker shares the on-disk transcript cache, so a rerun skips finished sources
+    cache = get_transcript_cache()
+    
+    def decode(audio, title: str, source_id: Optional[str] = None) -> TranscriptionResult:
+        segments, info = transcribe_audio_file(
+            audio, model_name, device=settings["device"],
+            compute_type=settings["compute_type"], beam_size=settings["beam_size"],
+            cpu_threads=settings["cpu_threads"], registry=settings["registry"],
+            cache=cache, source_id=source_id, cache_metadata={'video_title': title, 'url': source}
+        )
+        result = TranscriptionResult(segments, info, title, source, model_name)
+        result.segments.fill()
+        return result
+    
+    try:
+        if is_url(source):
+            video_id = extract_youtube_video_id(source)
+            cached = None
+            if cache is not None and video_id:
+                cached = cache.get(cache.make_key(f"youtube:{video_id}", model_name,
+                                                  vad=vad_cache_spec(VAD_MODE)))
+            if cached is not None:
+                result = TranscriptionResult(cached.segments, cached.info,
+                                             cached.metadata.get('video_title', 'Unknown Video'),
+                                             source, model_name)
+            else:
+                with get_scratch_space().job("farm") as job_dir:
+                    audio_file, video_info = download_youtube_audio(source, job_dir)
+                    video_id = video_info.get('id') or video_id
+                    if not video_id:
+                        cache = None  # Without a video id the audio cannot be recognised next time
+                    result = decode(audio_file, video_info.get('title', 'Unknown Video'),
+                                    f"youtube:{video_id}" if video_id else None)
+        else:
+            if not Path(source).is_file():
+                raise Exception(f"Audio file not found: {source}")
+            result = decode(Path(source), Path(source).stem)
+        
+        outcome["audio_seconds"] = result.info.duration
+        outcome["language"] = result.detected_language
+        if output_dir:
+            name = name or source_transcript_name(source, result.video_title)
+            outputs = write_transcripts(result, transcript_outputs(Path(output_dir), name, formats),
+                                        include_timestamps)
+            outcome["output_file"] = str(outputs[formats[0]])
+            outcome["output_files"] = {fmt: str(path) for fmt, path in outputs.items()}
+        else:
+            outcome["segments"] = result.segments
+    except Exception as e:
+        outcome["error"] = str(e)
+    
+    outcome["elapsed_seconds"] = time.perf_counter() - started
+    return outcome
+
+
+class FarmReport:
+    """Results of a farm run plus aggregate throughput"""
+    
+    def __init__(self, outcomes: List[Dict[str, Any]], wall_seconds: float, workers: int):
+        self.outcomes = outcomes
+        self.wall_seconds = wall_seconds
+        self.workers = workers
+        self.successful = [o for o in outcomes if "error" not in o]
+        self.failed = [o for o in outcomes if "error" in o]
+        self.audio_seconds = sum(o.get("audio_seconds") or 0 for o in self.successful)
+        self.worker_seconds = sum(o["elapsed_seconds"] for o in outcomes)
+    
+    @property
+    def real_time_factor(self) -> Optional[float]:
+        """Wall-clock seconds per second of audio for the whole farm (lower is faster)"""
+        return self.wall_seconds / self.audio_seconds if self.audio_seconds else None
+    
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "files": len(self.outcomes),
+            "successful": len(self.successful),
+            "failed": len(self.failed),
+            "workers": self.workers,
+            "audio_seconds": round(self.audio_seconds, 2),
+            "wall_seconds": round(self.wall_seconds, 2),
+            "worker_seconds": round(self.worker_seconds, 2),
+            "real_time_factor": round(self.real_time_factor, 4) if self.real_time_factor else None,
+            "per_worker_real_time_factor": (round(self.worker_seconds / self.audio_seconds, 4)
+                                            if self.audio_seconds else None),
+        }
+
+
+class TranscriptionFarm:
+    """
+    Multi-process transcription backend for CPU-bound batch workloads
+    
+    Each of ``workers`` processes is pinned to its own slice of
+    ``cpu_threads`` cores (where the OS supports affinity) and keeps one warm
+    model for its lifetime. Work is dispatched longest-first by audio
+    duration, so the long files start early and short ones fill the gaps.
+    """
+    
+    def __init__(self, workers: Optional[int] = None, model_name: str = "base", device: str = "cpu",
+                 compute_type: str = DEFAULT_COMPUTE_TYPE, beam_size: int = DEFAULT_BEAM_SIZE,
+                 cpu_threads: Optional[int] = None, pin_cores: bool = True):
+        cores = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else None
+        core_count = len(cores) if cores else (os.cpu_count() or 1)
+        self.workers = workers or max(1, core_count // 4)
+        self.settings = {
+            "model_name": model_name,
+            "device": device,
+            "compute_type": compute_type,
+            "beam_size": beam_size,
+            "cpu_threads": cpu_threads or max(1, core_count // self.workers),
+            "cores": cores,
+            "pin_cores": pin_cores,
+        }
+        self._pool = None
+    
+    def start(self) -> None:
+        if self._pool is not None:
+            return
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        counter = multiprocessing.Value("i", 0)
+        self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_farm_worker_init,
+                                         initargs=(counter, self.settings))
+    
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+    
+    def __enter__(self):
+        self.start()
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.shutdown()
+    
+    @staticmethod
+    def schedule(sources: List[str]) -> List[str]:
+        """Order sources longest-first; unknown durations fall back to file size (0 if unreadable)"""
+        from concurrent.futures import ThreadPoolExecutor
+        
+        def weight(source: str) -> Tuple[int, float]:
+            if is_url(source):
+                duration = probe_youtube_duration(source)
+            else:
+                duration = probe_audio_duration(Path(source))
+            if duration is not None:
+                return (1, duration)
+            if is_url(source):
+                return (0, 0.0)
+            try:
+                return (0, float(Path(source).stat().st_size))
+            except OSError:
+                return (0, 0.0)  # Missing or unreadable: the worker reports the failure
+        
+        with ThreadPoolExecutor(max_workers=8) as probe_pool:
+            weights = list(probe_pool.map(weight, sources))
+        order = sorted(range(len(sources)), key=lambda i: weights[i], reverse=True)
+        return [sources[i] for i in order]
+    
+    def run(self, sources: List[str], output_dir: Optional[Path] = None, include_timestamps: bool = False,
+            progress_callback: Optional[Callable[[str], None]] = None,
+            output_format="txt") -> FarmReport:
+        """
+        Transcribe files and/or YouTube URLs across the worker processes
+        
+        Args:
+            sources: Audio file paths or YouTube URLs
+            output_dir: Directory for transcripts; if None, segments are returned
+                in each outcome instead
+            include_timestamps: Whether saved text transcripts include timestamps
+            progress_callback: Optional callback for progress updates
+            output_format: Transcript format(s) from TRANSCRIPT_FORMATS, as a list
+                or comma-separated string; each worker writes them all in one pass
+            
+        Returns:
+            FarmReport with one outcome dict per source
+            
+        Raises:
+            ValueError: If output_format is not supported
+        """
+        from concurrent.futures import as_completed
+        
+        formats = tuple(parse_transcript_formats(output_format))
+        if output_dir is not None:
+            output_dir.mkdir(parents=True, exist_ok=True)
+        self.start()
+        started = time.perf_counter()
+        
+        local_names = transcript_names(sources)
+        futures = [self._pool.submit(_farm_transcribe, source, str(output_dir) if output_dir else None,
+                                     include_timestamps, local_names.get(source), formats)
+                   for source in self.schedule(sources)]
+        outcomes = []
+        for done, future in enumerate(as_completed(futures), 1):
+            outcome = future.result()
+            outcomes.append(outcome)
+            if progress_callback:
+                status = f"✗ {outcome['error']}" if "error" in outcome else "✓"
+                progress_callback(f"[{done}/{len(futures)}] worker {outcome['worker']}: "
+                                  f"{outcome['source']} {status}")
+        
+        return FarmReport(outcomes, time.perf_counter() - started, self.workers)
+
+
+def read_xlsx_urls(path: Path) -> List[str]:
+    """
+    URLs listed in the first worksheet of an .xlsx workbook (e.g. Videos.xlsx)
+    
+    The workbook is read with the standard library, so openpyxl is not
+    needed. If a header cell reads "Link" or "URL" only that column is used,
+    and a cell whose text is not a URL falls back to its hyperlink target;
+    otherwise every cell whose text is a URL is taken.
+    """
+    import zipfile
+    import xml.etree.ElementTree as ET
+    
+    main_ns = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+    rel_id = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id"
+    try:
+        with zipfile.ZipFile(path) as book:
+            names = set(book.namelist())
+            shared = []
+            if "xl/sharedStrings.xml" in names:
+                for item in ET.fromstring(book.read("xl/sharedStrings.xml")).iter(f"{main_ns}si"):
+                    shared.append("".join(text.text or "" for text in item.iter(f"{main_ns}t")))
+            sheet = ET.fromstring(book.read("xl/worksheets/sheet1.xml"))
+            targets = {}
+            if "xl/worksheets/_rels/sheet1.xml.rels" in names:
+                for rel in ET.fromstring(book.read("xl/worksheets/_rels/sheet1.xml.rels")):
+                    targets[rel.get("Id")] = rel.get("Target")
+    except (KeyError, zipfile.BadZipFile, ET.ParseError) as e:
+        raise Exception(f"Failed to read workbook {path}: {e}")
+    
+    links = {link.get("ref"): targets.get(link.get(rel_id)) for link in sheet.iter(f"{main_ns}hyperlink")}
+    rows = []
+    for row in sheet.iter(f"{main_ns}row"):
+        cells = {}
+        for cell in row.iter(f"{main_ns}c"):
+            ref = cell.get("r", "")
+            value = cell.find(f"{main_ns}v")
+            if cell.get("t") == "s" and value is not None:
+                text = shared[int(value.text)]
+            elif cell.get("t") == "inlineStr":
+                text = "".join(part.text or "" for part in cell.iter(f"{main_ns}t"))
+            else:
+                text = value.text if value is not None else ""
+            cells[re.sub(r"\d", "", ref)] = (text.strip(), links.get(ref))
+        rows.append(cells)
+    
+    header = rows[0] if rows else {}
+    column = next((col for col, (text, _) in header.items() if text.lower() in ("link", "url")), None)
+    urls = []
+    for cells in (rows[1:] if column else rows):
+        for col, (text, link) in cells.items():
+            if column and col != column:
+                continue
+            if is_url(text):
+                urls.append(text)
+            elif column and link and is_url(link):
+                urls.append(link)
+    return urls
+
+
+def collect_sources(inputs: List[str]) -> List[str]:
+    """
+    Expand CLI inputs into audio files and URLs
+    
+    Each input may be a URL, an audio file, a directory (scanned recursively
+    for audio files), a text file with one URL or path per line, or an .xlsx
+    workbook with a Link column (like Videos.xlsx).
+    """
+    sources = []
+    for entry in inputs:
+        if is_url(entry):
+            sources.append(entry)
+            continue
+        path = Path(entry)
+        if path.is_dir():
+            sources.extend(str(p) for p in sorted(path.rglob("*")) if p.suffix.lower() in AUDIO_EXTENSIONS)
+        elif path.suffix.lower() == ".txt":
+            with open(path, 'r', encoding='utf-8') as f:
+                sources.extend(line.strip() for line in f if line.strip() and not line.startswith("#"))
+        elif path.suffix.lower() == ".xlsx":
+            sources.extend(read_xlsx_urls(path))
+        else:
+            sources.append(str(path))
+    return sources
+
+
+def _run_farm_command(args) -> int:
+    try:
+        formats = parse_transcript_formats(args.format)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+    sources = collect_sources(args.inputs)
+    if not sources:
+        print("No audio files or URLs found", file=sys.stderr)
+        return 2
+    
+    farm = TranscriptionFarm(workers=args.workers, model_name=args.model, device=args.device,
+                             compute_type=args.compute_type, cpu_threads=args.threads,
+                             pin_cores=not args.no_pin)
+    with farm:
+        report = farm.run(sources, Path(args.output_dir), args.timestamps,
+                          progress_callback=lambda message: print(message, file=sys.stderr),
+                          output_format=formats)
+    
+    print(json.dumps(report.summary(), indent=2))
+    return 0 if not report.failed else 1
+
+
+# Stage event log and resume manifest the batch command keeps in its output directory
+BATCH_PROGRESS_FILE = "batch_progress.jsonl"
+BATCH_MANIFEST_FILE = "batch_manifest.jsonl"
+
+
+def _run_batch_command(args) -> int:
+    try:
+        formats = parse_transcript_formats(args.format)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+    sources = collect_sources(args.inputs)
+    if not sources:
+        print("No audio files or URLs found", file=sys.stderr)
+        return 2
+    
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    progress_file = output_dir / BATCH_PROGRESS_FILE
+    # Every run records its progress so that a later --resume can pick up after it
+    manifest = BatchManifest(output_dir / BATCH_MANIFEST_FILE)
+    index = None
+    if args.index:
+        from transcript_index import TranscriptIndex
+        index = TranscriptIndex(Path(args.index))
+    pending = manifest.pending(sources) if args.resume else sources
+    # Names come from the full list, so a resumed run names files as the original run did
+    names = transcript_names(sources)
+    
+    # Stage events always go to the progress log, and to stdout with --progress json
+    sinks = [JsonLinesSink(progress_file)]
+    if args.progress == "json":
+        sinks.append(JsonLinesSink(sys.stdout))
+    log = None if args.progress == "json" else (lambda message: print(message, file=sys.stderr))
+    tracer = Instrumentation(sinks, callback=log)
+    tracer.emit(StageEvent("batch", "start", sources=len(sources), pending=len(pending),
+                           resumed=len(sources) - len(pending)))
+    started = time.perf_counter()
+    try:
+        report = transcribe_batch(pending, output_dir, args.model, args.timestamps, formats,
+                                  language=args.language, prefetch_workers=args.concurrency,
+                                  max_disk_bytes=args.max_disk_mb * 1024 * 1024 if args.max_disk_mb else None,
+                                  skip_errors=not args.fail_fast, progress_callback=tracer,
+                                  manifest=manifest, index=index, names=names,
+                                  chunked_min_seconds=args.chunked_min_seconds)
+        tracer.emit(StageEvent("batch", "end", duration=time.perf_counter() - started,
+                               successful=len(report.successful), failed=len(report.failed),
+                               not_processed=len(report.skipped)))
+    except KeyboardInterrupt:
+        tracer.emit(StageEvent("batch", "error", duration=time.perf_counter() - started, error="Interrupted"))
+        return 130
+    finally:
+        for sink in sinks:
+            sink.close()
+        manifest.close()
+    
+    summary = {
+        "sources": len(sources),
+        "resumed": len(sources) - len(pending),
+        "successful": len(report.successful),
+        "failed": len(report.failed),
+        "not_processed": len(report.skipped),
+        "wall_seconds": round(time.perf_counter() - started, 2),
+        "failures": [{"source": item.url, "stage": item.failed_stage, "error": str(item.error)}
+                     for item in report.failed],
+    }
+    print(json.dumps(summary) if args.progress == "json" else json.dumps(summary, indent=2))
+    return 0 if not report.failed and not report.skipped else 1
+
+
+def _run_index_command(args) -> int:
+    from transcript_index import TranscriptIndex
+    
+    index = TranscriptIndex(Path(args.db))
+    counts = index.add_files(args.paths, progress_callback=lambda message: print(message, file=sys.stderr))
+    if counts["indexed"]:
+        index.optimize()
+    print(json.dumps(dict(counts, **index.stats()), indent=2))
+    return 0 if not counts["failed"] else 1
+
+
+def _run_search_command(args) -> int:
+    from transcript_index import TranscriptIndex
+    
+    if not Path(args.db).exists():
+        print(f"No transcript index at {args.db} (build one with: python stt_utils.py index <dirs>)",
+              file=sys.stderr)
+        return 2
+    try:
+        hits = TranscriptIndex(Path(args.db)).search(" ".join(args.query), limit=args.limit,
+                                                     offset=args.offset, source=args.source, raw=args.raw)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+    if args.json:
+        print(json.dumps(hits, ensure_ascii=False, indent=2))
+    else:
+        for hit in hits:
+            print(f"[{format_timestamp(hit['start_ms'] / 1000)}] {hit['title'] or hit['source']}  "
+                  f"{hit['link'] or hit['source']}")
+            print(f"    {hit['snippet']}")
+    return 0 if hits else 1
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point (python stt_utils.py <command> ...)"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(prog="stt_utils", description="faster-whisper transcription tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    farm = commands.add_parser("farm", help="Transcribe many files/URLs on a multi-process worker farm")
+    farm.add_argument("inputs", nargs="+", help="Audio files, directories, URLs or .txt URL lists")
+    farm.add_argument("-o", "--output-dir", default="transcripts", help="Directory for transcripts")
+    farm.add_argument("-m", "--model", default="base", help="Whisper model (tiny, base, small, medium, large)")
+    farm.add_argument("-f", "--format", default="txt",
+                      help=f"Transcript format(s), comma-separated, from: {', '.join(TRANSCRIPT_FORMATS)}")
+    farm.add_argument("-w", "--workers", type=int, default=None, help="Worker processes (default: cores / 4)")
+    farm.add_argument("-t", "--threads", type=int, default=None, help="CPU threads per worker (default: cores / workers)")
+    farm.add_argument("--device", default="cpu", help="Inference device (cpu, cuda)")
+    farm.add_argument("--compute-type", default=DEFAULT_COMPUTE_TYPE, help="Computation type (int8, float16, ...)")
+    farm.add_argument("--timestamps", action="store_true", help="Include timestamps in text transcripts")
+    farm.add_argument("--no-pin", action="store_true", help="Do not pin workers to CPU cores")
+    farm.set_defaults(handler=_run_farm_command)
+    
+    batch = commands.add_parser(
+        "batch", help="Transcribe URLs/files with pipelined downloads (headless batch runner)",
+        description="Exit status: 0 all sources transcribed, 1 some failed or were not processed, "
+                    "2 no inputs found or unknown format, 130 interrupted."
+    )
+    batch.add_argument("inputs", nargs="+",
+                       help="URLs, audio files, directories, .txt URL lists or .xlsx sheets (e.g. Videos.xlsx)")
+    batch.add_argument("-o", "--output-dir", default="transcripts", help="Directory for transcripts")
+    batch.add_argument("-m", "--model", default="base", help="Whisper model (tiny, base, small, medium, large)")
+    batch.add_argument("-f", "--format", default="txt",
+                       help=f"Transcript format(s), comma-separated, from: {', '.join(TRANSCRIPT_FORMATS)} "
+                            "(all written in one pass, e.g. txt,srt,json)")
+    batch.add_argument("-j", "--concurrency", type=int, default=2, help="Concurrent downloads ahead of inference")
+    batch.add_argument("-l", "--language", default=None, help="Language code (default: detect per source)")
+    batch.add_argument("--timestamps", action="store_true", help="Include timestamps in text transcripts")
+    batch.add_argument("--max-disk-mb", type=int, default=0, help="Cap on downloaded audio waiting on disk")
+    batch.add_argument("--chunked-min-seconds", type=float, default=CHUNKED_MIN_AUDIO_SECONDS, metavar="SECONDS",
+                       help="Split sources at least this long at pauses and decode the chunks in parallel "
+                            "(WHISPER_CHUNKED_WORKERS at a time; default: WHISPER_CHUNKED_MIN_SECONDS, 0 = off)")
+    batch.add_argument("--resume", action="store_true",
+                       help=f"Skip sources already written according to {BATCH_MANIFEST_FILE}; "
+                            "interrupted and failed ones run again")
+    batch.add_argument("--fail-fast", action="store_true", help="Stop at the first failed source")
+    batch.add_argument("--index", default=None, metavar="DB",
+                       help="Also add each transcript to this search index (default: WHISPER_TRANSCRIPT_INDEX)")
+    batch.add_argument("--progress", default="text", choices=("text", "json"),
+                       help="text: log lines on stderr; json: one stage event per line on stdout")
+    batch.set_defaults(handler=_run_batch_command)
+    
+    default_index = TRANSCRIPT_INDEX_PATH or "transcript_index.db"
+    index = commands.add_parser("index", help="Add transcript files to the full-text search index")
+    index.add_argument("paths", nargs="+", help="*_transcript.txt/.json files or directories to scan")
+    index.add_argument("--db", default=default_index, help="Index database")
+    index.set_defaults(handler=_run_index_command)
+    
+    search = commands.add_parser(
+        "search", help="Search indexed transcripts; hits link to the second they are spoken",
+        description="Exit status: 0 hits found, 1 no hits, 2 no index or invalid query."
+    )
+    search.add_argument("query", nargs="+", help="Words that must all occur in a segment")
+    search.add_argument("--db", default=default_index, help="Index database")
+    search.add_argument("-n", "--limit", type=int, default=20, help="Maximum hits")
+    search.add_argument("--offset", type=int, default=0, help="Skip this many hits (paging)")
+    search.add_argument("--source", default=None, help="Only search the transcript of this URL or file")
+    search.add_argument("--raw", action="store_true",
+                        help='Pass the query to SQLite FTS5 as is ("phrases", OR, NEAR(), prefix*)')
+    search.add_argument("--json", action="store_true", help="Print hits as JSON")
+    search.set_defaults(handler=_run_search_command)
+    
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
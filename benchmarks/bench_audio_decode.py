@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark: native-container decode vs. the legacy MP3 round trip
+
+The old download path had yt-dlp re-encode every video to 192 kbps MP3,
+which the model then decoded back to 16 kHz PCM. This script synthesizes an
+opus/webm file (what YouTube usually serves as bestaudio) and times both
+paths so the per-video saving can be measured on the target hardware.
+
+Usage:
+    python benchmarks/bench_audio_decode.py --durations 60 600 --repeat 3
+
+Requires FFmpeg on PATH and faster-whisper.
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from stt_utils import load_audio_pcm
+
+
+def run_ffmpeg(*args: str) -> None:
+    subprocess.run(["ffmpeg", "-nostdin", "-y", "-loglevel", "error", *args], check=True)
+
+
+def synthesize_native_audio(path: Path, duration: float) -> None:
+    """Create a speech-band test signal encoded as opus in a webm container"""
+    run_ffmpeg(
+        "-f", "lavfi", "-i", f"sine=frequency=220:sample_rate=48000:duration={duration}",
+        "-f", "lavfi", "-i", f"anoisesrc=color=pink:amplitude=0.05:sample_rate=48000:duration={duration}",
+        "-filter_complex", "amix=inputs=2",
+        "-c:a", "libopus", "-b:a", "128k", str(path)
+    )
+
+
+def time_legacy(native: Path, work_dir: Path) -> float:
+    """yt-dlp FFmpegExtractAudio to 192k MP3, then decode the MP3"""
+    mp3 = work_dir / "legacy.mp3"
+    start = time.perf_counter()
+    run_ffmpeg("-i", str(native), "-vn", "-c:a", "libmp3lame", "-b:a", "192k", str(mp3))
+    load_audio_pcm(mp3)
+    elapsed = time.perf_counter() - start
+    mp3.unlink()
+    return elapsed
+
+
+def time_native(native: Path) -> float:
+    """Decode the downloaded container straight to 16 kHz mono PCM"""
+    start = time.perf_counter()
+    load_audio_pcm(native)
+    return time.perf_counter() - start
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--durations", type=float, nargs="+", default=[60, 600],
+                        help="Audio durations in seconds to benchmark")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per duration (best time is reported)")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        work_dir = Path(temp_dir)
+        for duration in args.durations:
+            native = work_dir / f"native_{int(duration)}.webm"
+            synthesize_native_audio(native, duration)
+
+            legacy = min(time_legacy(native, work_dir) for _ in range(args.repeat))
+            direct = min(time_native(native) for _ in range(args.repeat))
+            results.append({
+                "audio_seconds": duration,
+                "legacy_mp3_seconds": round(legacy, 4),
+                "native_seconds": round(direct, 4),
+                "saving_seconds": round(legacy - direct, 4),
+                "speedup": round(legacy / direct, 2) if direct else None,
+            })
+
+    print(json.dumps({"benchmark": "audio_decode", "results": results}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Benchmark: cold-start import time of the library and the API
+
+Imports each module in a fresh interpreter with ``python -X importtime``
+and reports its cumulative import time (best of --repeat runs, after an
+uncounted run that compiles bytecode into a private cache), the
+slowest packages it pulled in, and any heavy dependency that was loaded
+eagerly instead of on first use (faster-whisper, CTranslate2, torch,
+whisper, yt-dlp, PyAV, numpy, uvicorn).
+
+The exit status is 1 if a module exceeds its time budget, imports a heavy
+dependency at start-up or leaves files behind in the working directory
+(job stores, caches), so the script can gate CI or container builds. The
+same checks run as part of the test suite (tests/test_import_time.py).
+
+Usage:
+    python benchmarks/bench_import_time.py
+    python benchmarks/bench_import_time.py --repeat 10 --budget stt_utils=50 --budget whisper_api=800
+"""
+
+import argparse
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Budgets in milliseconds, about twice the import time measured with warm bytecode
+# (stt_utils ~25 ms, whisper_api ~300 ms, dominated by FastAPI and pydantic)
+DEFAULT_BUDGETS_MS = {
+    "stt_utils": 50,
+    "vad": 10,
+    "streaming": 55,
+    "batch_runner": 60,
+    "job_store": 20,
+    "metrics": 10,
+    "transcript_index": 60,
+    "whisper_api": 600,
+}
+# Heavy packages every module must leave until first use
+LAZY_MODULES = ["faster_whisper", "ctranslate2", "torch", "whisper", "yt_dlp", "av", "numpy", "uvicorn"]
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+
+def measure_import(module: str, work_dir: Path,
+                   cache_dir: Optional[Path] = None) -> Tuple[float, List[Tuple[str, float]], List[str]]:
+    """
+    Import a module in a fresh interpreter
+
+    Args:
+        module: Module to import
+        work_dir: Working directory of the interpreter
+        cache_dir: Bytecode cache to read and write (PYTHONPYCACHEPREFIX), so
+            timings do not depend on stale or unwritable __pycache__ directories
+
+    Returns:
+        Tuple of (cumulative milliseconds, top-level packages with their
+        cumulative milliseconds, names of every module imported)
+    """
+    env = dict(os.environ, PYTHONPATH=str(REPO_ROOT))
+    if cache_dir is not None:
+        env["PYTHONPYCACHEPREFIX"] = str(cache_dir)
+        env.pop("PYTHONDONTWRITEBYTECODE", None)
+    # Run from a scratch directory so anything written at import shows up there
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                               cwd=work_dir, env=env, capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{completed.stderr.strip()[-2000:]}")
+
+    # Children are listed before their parent, so collect until the module's own line;
+    # anything imported earlier by interpreter start-up (site, .pth files) is dropped
+    total_ms = None
+    children, imported = [], []
+    for line in completed.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        cumulative_ms = int(match.group(2)) / 1000
+        depth = len(match.group(3)) // 2
+        name = match.group(4)
+        if depth == 0:
+            if name == module:
+                total_ms = cumulative_ms
+                break
+            children, imported = [], []
+            continue
+        imported.append(name)
+        if depth == 1:
+            children.append((name, cumulative_ms))
+    if total_ms is None:
+        raise RuntimeError(f"No import timing reported for {module}")
+    return total_ms, children, imported
+
+
+def parse_budgets(values: List[str]) -> Dict[str, float]:
+    budgets = dict(DEFAULT_BUDGETS_MS)
+    for value in values:
+        module, _, limit = value.partition("=")
+        if not limit:
+            raise SystemExit(f"Invalid --budget {value!r}; expected MODULE=MILLISECONDS")
+        budgets[module] = float(limit)
+    return budgets
+
+
+def check_module(module: str, budget_ms: Optional[float], repeat: int = 5, top: int = 5) -> Dict[str, Any]:
+    """
+    Time a module's import and check it against its budget
+
+    Raises:
+        RuntimeError: If the module cannot be imported
+    """
+    with tempfile.TemporaryDirectory(prefix="whisper_importtime_") as work_dir, \
+            tempfile.TemporaryDirectory(prefix="whisper_pycache_") as cache_dir:
+        # The first import compiles bytecode into the private cache and is not counted
+        warm_up = measure_import(module, Path(work_dir), Path(cache_dir))
+        runs = [measure_import(module, Path(work_dir), Path(cache_dir)) for _ in range(max(1, repeat))]
+        created = sorted(path.name for path in Path(work_dir).iterdir())
+    best_ms, children, imported = min(runs, key=lambda run: run[0])
+    eager = sorted({name.split(".")[0] for run in runs + [warm_up] for name in run[2]} & set(LAZY_MODULES))
+    slowest = sorted(children, key=lambda child: child[1], reverse=True)[:top]
+
+    failures = []
+    if budget_ms is not None and best_ms > budget_ms:
+        failures.append(f"import took {best_ms:.1f} ms (budget {budget_ms:.0f} ms)")
+    if eager:
+        failures.append(f"eagerly imports {', '.join(eager)}")
+    if created:
+        failures.append(f"creates files at import: {', '.join(created)}")
+    return {
+        "module": module,
+        "import_ms": round(best_ms, 1),
+        "budget_ms": budget_ms,
+        "runs_ms": [round(run[0], 1) for run in runs],
+        "slowest_imports": [{"module": name, "ms": round(ms, 1)} for name, ms in slowest],
+        "eager_heavy_imports": eager,
+        "created_files": created,
+        "passed": not failures,
+        "failures": failures,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modules", nargs="+", default=list(DEFAULT_BUDGETS_MS),
+                        help="Modules to import")
+    parser.add_argument("--budget", action="append", default=[], metavar="MODULE=MS",
+                        help="Override a module's import budget in milliseconds (repeatable)")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per module (best is kept)")
+    parser.add_argument("--top", type=int, default=5, help="Slowest direct imports to list per module")
+    parser.add_argument("--output", type=Path, help="Also write the JSON report to this file")
+    args = parser.parse_args()
+    budgets = parse_budgets(args.budget)
+
+    results = []
+    for module in args.modules:
+        try:
+            results.append(check_module(module, budgets.get(module), args.repeat, args.top))
+        except RuntimeError as e:
+            results.append({"module": module, "passed": False, "failures": [str(e)]})
+
+    report = {
+        "benchmark": "import_time",
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": results,
+        "passed": all(result["passed"] for result in results),
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        args.output.write_text(text + "\n", encoding="utf-8")
+
+    for result in results:
+        for failure in result["failures"]:
+            print(f"FAIL {result['module']}: {failure}", file=sys.stderr)
+    return 0 if report["passed"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Benchmark: end-to-end transcription pipeline, stage by stage
+
+Synthesizes deterministic speech-like test audio (harmonic voiced bursts
+separated by pauses, fixed random seed) so runs are reproducible offline,
+then times each stage separately:
+
+    model_load         cold model construction through a fresh registry
+    audio_decode       file -> 16 kHz mono PCM
+    transcribe_setup   the transcribe() call (features, language detection)
+    segment_iteration  consuming the lazy segment generator (the actual decode)
+    transcript_write   save_transcript_to_file
+    api_round_trip     POST /transcribe through an in-process TestClient
+
+Results (p50/p95/mean per stage, real-time factor, peak RSS) are printed as
+JSON so runs can be diffed between commits.
+
+Usage:
+    python benchmarks/bench_pipeline.py --durations 10 60 --silence-ratios 0 0.4 --repeat 3
+    python benchmarks/bench_pipeline.py --model base --output bench.json
+
+Requires faster-whisper; the API stage also needs fastapi and httpx and is
+skipped without them (or with --no-api).
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Keep benchmark runs away from the real job store and transcript cache
+SCRATCH_ROOT = Path(tempfile.mkdtemp(prefix="whisper_bench_"))
+os.environ["WHISPER_JOBS_DIR"] = str(SCRATCH_ROOT / "jobs")
+os.environ["WHISPER_TRANSCRIPT_CACHE_DIR"] = str(SCRATCH_ROOT / "transcript_cache")
+os.environ.setdefault("WHISPER_API_KEY", "benchmark")
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+import numpy as np
+
+from stt_utils import (
+    ModelRegistry,
+    TranscriptionResult,
+    load_audio_pcm,
+    transcribe_audio_file,
+    save_transcript_to_file,
+)
+
+SAMPLE_RATE = 16000
+STAGES = ["model_load", "audio_decode", "transcribe_setup", "segment_iteration",
+          "transcript_write", "api_round_trip"]
+
+
+def synthesize_audio(duration: float, silence_ratio: float, seed: int):
+    """
+    Speech-like test signal: voiced bursts with syllable-rate envelopes
+
+    Bursts of 0.4-2.5 s alternate with pauses sized so that pauses make up
+    ``silence_ratio`` of the clip. A faint noise floor keeps the pauses from
+    being digital silence.
+    """
+    rng = np.random.default_rng(seed)
+    total = int(duration * SAMPLE_RATE)
+    audio = rng.normal(0, 1e-3, total).astype(np.float32)
+    if silence_ratio >= 1:
+        return audio
+
+    position = 0
+    while position < total:
+        burst = int(rng.uniform(0.4, 2.5) * SAMPLE_RATE)
+        pause = int(burst * silence_ratio / (1 - silence_ratio))
+        end = min(total, position + burst)
+        t = np.arange(end - position) / SAMPLE_RATE
+
+        f0 = rng.uniform(100, 220) * (1 + 0.03 * np.sin(2 * np.pi * 5 * t))
+        phase = 2 * np.pi * np.cumsum(f0) / SAMPLE_RATE
+        voiced = sum(np.sin(k * phase) / k for k in range(1, 11))
+        syllables = 0.5 * (1 - np.cos(2 * np.pi * rng.uniform(3, 6) * t))
+        audio[position:end] += (0.2 * voiced * syllables).astype(np.float32)
+        position = end + pause
+    return np.clip(audio, -1, 1)
+
+
+def write_wav(path: Path, samples) -> None:
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(SAMPLE_RATE)
+        f.writeframes((samples * 32767).astype("<i2").tobytes())
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def summarize(values: List[float]) -> Optional[Dict[str, float]]:
+    if not values:
+        return None
+    return {
+        "p50": round(percentile(values, 0.5), 4),
+        "p95": round(percentile(values, 0.95), 4),
+        "mean": round(sum(values) / len(values), 4),
+        "min": round(min(values), 4),
+    }
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process (None where unsupported)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def bench_library(audio_file: Path, args, timings: Dict[str, List[float]]) -> None:
+    """One pass through the library stages for a single file"""
+    registry = ModelRegistry(max_models=1)
+
+    start = time.perf_counter()
+    _, key = registry.acquire(args.model, "cpu", args.compute_type)
+    timings["model_load"].append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    samples = load_audio_pcm(audio_file)
+    timings["audio_decode"].append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    segments, info = transcribe_audio_file(samples, args.model, compute_type=args.compute_type,
+                                           registry=registry, vad=args.vad)
+    timings["transcribe_setup"].append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    segments = list(segments)
+    timings["segment_iteration"].append(time.perf_counter() - start)
+    registry.release(key)
+
+    result = TranscriptionResult(segments, info, "benchmark", str(audio_file), args.model)
+    start = time.perf_counter()
+    save_transcript_to_file(result, audio_file.with_suffix(".txt"), include_timestamps=True)
+    timings["transcript_write"].append(time.perf_counter() - start)
+
+
+def bench_api(audio_files: List[Path], args, timings: Dict[str, List[float]]) -> Optional[str]:
+    """
+    Upload each file through an in-process TestClient
+
+    Returns:
+        Reason the stage was skipped, or None if it ran
+    """
+    try:
+        from fastapi.testclient import TestClient
+        import whisper_api
+    except ImportError as e:
+        return f"API stage skipped: {e}"
+
+    headers = {"X-API-Key": os.environ["WHISPER_API_KEY"]}
+    with TestClient(whisper_api.app) as client:
+        for audio_file in audio_files:
+            with open(audio_file, "rb") as f:
+                start = time.perf_counter()
+                response = client.post(f"/transcribe?model={args.model}", headers=headers,
+                                       files={"file": (audio_file.name, f, "audio/wav")})
+                elapsed = time.perf_counter() - start
+            response.raise_for_status()
+            timings["api_round_trip"].append(elapsed)
+    return None
+
+
+def run_case(duration: float, silence_ratio: float, args, work_dir: Path) -> Dict[str, Any]:
+    timings: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+
+    # Every repeat gets its own seed so the API's transcript cache never short-circuits a decode
+    audio_files = []
+    for repeat in range(args.repeat):
+        audio_file = work_dir / f"bench_{int(duration)}s_{int(silence_ratio * 100)}pct_{repeat}.wav"
+        write_wav(audio_file, synthesize_audio(duration, silence_ratio, args.seed + repeat))
+        audio_files.append(audio_file)
+
+    for audio_file in audio_files:
+        bench_library(audio_file, args, timings)
+
+    skipped = "API stage disabled" if args.no_api else bench_api(audio_files, args, timings)
+
+    inference = [sum(parts) for parts in zip(timings["audio_decode"], timings["transcribe_setup"],
+                                              timings["segment_iteration"])]
+    rtf = [seconds / duration for seconds in inference]
+    case = {
+        "audio_seconds": duration,
+        "silence_ratio": silence_ratio,
+        "repeat": args.repeat,
+        "stages": {stage: summarize(values) for stage, values in timings.items()},
+        "real_time_factor": summarize(rtf),
+        "api_real_time_factor": summarize([s / duration for s in timings["api_round_trip"]]),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    if skipped:
+        case["note"] = skipped
+    return case
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--durations", type=float, nargs="+", default=[10, 60],
+                        help="Audio durations in seconds to benchmark")
+    parser.add_argument("--silence-ratios", type=float, nargs="+", default=[0.0, 0.4],
+                        help="Fraction of each clip that is silence (0-1)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per case")
+    parser.add_argument("--model", default="tiny", help="Whisper model to benchmark")
+    parser.add_argument("--compute-type", default="int8", help="Computation type")
+    parser.add_argument("--vad", default="off", choices=["off", "energy", "silero"],
+                        help="Voice-activity pre-filter for the library stages")
+    parser.add_argument("--seed", type=int, default=1234, help="Seed for the synthesized audio")
+    parser.add_argument("--no-api", action="store_true", help="Skip the TestClient round trip")
+    parser.add_argument("--output", type=Path, help="Also write the JSON report to this file")
+    args = parser.parse_args()
+    args.repeat = max(1, args.repeat)
+
+    try:
+        # Download the model once so model_load measures a warm disk cache, not the network
+        warmup = ModelRegistry(max_models=1)
+        _, key = warmup.acquire(args.model, "cpu", args.compute_type)
+        warmup.release(key)
+        warmup.clear()
+
+        results = []
+        work_dir = SCRATCH_ROOT / "audio"
+        work_dir.mkdir()
+        for duration in args.durations:
+            for silence_ratio in args.silence_ratios:
+                results.append(run_case(duration, silence_ratio, args, work_dir))
+    finally:
+        shutil.rmtree(SCRATCH_ROOT, ignore_errors=True)
+
+    report = {
+        "benchmark": "pipeline",
+        "commit": git_commit(),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "config": {
+            "model": args.model,
+            "compute_type": args.compute_type,
+            "vad": args.vad,
+            "seed": args.seed,
+        },
+        "results": results,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        args.output.write_text(text + "\n", encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
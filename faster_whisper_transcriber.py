@@ -49,6 +49,10 @@ class FasterWhisperTranscriber:
         ttk.Checkbutton(options_frame, text="Include timestamps", 
                        variable=self.timestamps_var).grid(row=0, column=0, sticky=tk.W)
         
+        self.subtitles_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(options_frame, text="Also save subtitles (.srt and .vtt)", 
+                       variable=self.subtitles_var).grid(row=1, column=0, sticky=tk.W)
+        
         # Buttons
         button_frame = ttk.Frame(main_frame)
         button_frame.grid(row=7, column=0, columnspan=2, pady=10)
@@ -116,6 +120,7 @@ class FasterWhisperTranscriber:
             model_name = self.model_var.get()
             output_dir = Path(self.output_dir_var.get())
             include_timestamps = self.timestamps_var.get()
+            formats = ("txt", "srt", "vtt") if self.subtitles_var.get() else ("txt",)
             
             # Use the extracted STT utilities
             transcript_file = transcribe_youtube_to_file(
@@ -123,7 +128,8 @@ class FasterWhisperTranscriber:
                 output_dir=output_dir,
                 model_name=model_name,
                 include_timestamps=include_timestamps,
-                progress_callback=self.log
+                progress_callback=self.log,
+                formats=formats
             )
             
             # Show success message
@@ -0,0 +1,271 @@
+"""
+Persistent job store for long-running transcriptions.
+
+Jobs are recorded in a local SQLite database so they survive server restarts,
+and are processed by a pool of worker threads in priority order.
+"""
+
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional, Dict, Any, Callable, List, Union
+
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+ACTIVE_STATUSES = (QUEUED, RUNNING)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    model TEXT NOT NULL,
+    audio_path TEXT NOT NULL,
+    filename TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    duration REAL,
+    progress REAL NOT NULL DEFAULT 0,
+    transcript TEXT NOT NULL DEFAULT '',
+    detected_language TEXT,
+    language_probability REAL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_queue ON jobs (status, priority DESC, created_at);
+"""
+
+
+class JobStore:
+    """SQLite-backed record of transcription jobs"""
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connection() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connection(self):
+        # A fresh autocommit connection per operation keeps the store safe to share between threads
+        conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def create(self, audio_path: Path, model: str, filename: Optional[str] = None,
+               priority: int = 0) -> str:
+        """Record a new queued job and return its id"""
+        job_id = uuid.uuid4().hex
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, status, priority, model, audio_path, filename, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, QUEUED, priority, model, str(audio_path), filename, time.time())
+            )
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._connection() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def status(self, job_id: str) -> Optional[str]:
+        with self._connection() as conn:
+            row = conn.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return row["status"] if row else None
+
+    def claim_next(self) -> Optional[Dict[str, Any]]:
+        """Atomically mark the highest-priority queued job as running and return it"""
+        with self._connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT * FROM jobs WHERE status = ? ORDER BY priority DESC, created_at LIMIT 1",
+                    (QUEUED,)
+                ).fetchone()
+                if row is not None:
+                    conn.execute(
+                        "UPDATE jobs SET status = ?, started_at = ? WHERE id = ?",
+                        (RUNNING, time.time(), row["id"])
+                    )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        job = dict(row)
+        job["status"] = RUNNING
+        return job
+
+    def update_progress(self, job_id: str, progress: float, transcript: Optional[str],
+                        duration: Optional[float] = None,
+                        detected_language: Optional[str] = None,
+                        language_probability: Optional[float] = None) -> None:
+        with self._connection() as conn:
+            conn.execute(
+                "UPDATE jobs SET progress = ?, transcript = COALESCE(?, transcript), "
+                "duration = COALESCE(?, duration), "
+                "detected_language = COALESCE(?, detected_language), "
+                "language_probability = COALESCE(?, language_probability) "
+                "WHERE id = ? AND status = ?",
+                (progress, transcript, duration, detected_language, language_probability,
+                 job_id, RUNNING)
+            )
+
+    def finish(self, job_id: str, status: str, error: Optional[str] = None) -> None:
+        """Move a running job to a terminal state (a concurrent cancel wins)"""
+        progress_sql = ", progress = 100" if status == COMPLETED else ""
+        with self._connection() as conn:
+            conn.execute(
+                f"UPDATE jobs SET status = ?, error = ?, finished_at = ?{progress_sql} "
+                "WHERE id = ? AND status = ?",
+                (status, error, time.time(), job_id, RUNNING)
+            )
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a queued or running job; returns False if it was not active"""
+        with self._connection() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ? WHERE id = ? AND status IN (?, ?)",
+                (CANCELLED, time.time(), job_id, *ACTIVE_STATUSES)
+            )
+        return cursor.rowcount > 0
+
+    def delete(self, job_id: str) -> bool:
+        with self._connection() as conn:
+            cursor = conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+        return cursor.rowcount > 0
+
+    def requeue_interrupted(self) -> List[str]:
+        """Return jobs left running by a previous process to the queue"""
+        with self._connection() as conn:
+            ids = [row["id"] for row in conn.execute("SELECT id FROM jobs WHERE status = ?", (RUNNING,))]
+            conn.execute(
+                "UPDATE jobs SET status = ?, progress = 0, transcript = '', started_at = NULL "
+                "WHERE status = ?",
+                (QUEUED, RUNNING)
+            )
+        return ids
+
+    def counts(self) -> Dict[str, int]:
+        with self._connection() as conn:
+            rows = conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        return {row["status"]: row["n"] for row in rows}
+
+
+class JobProgress:
+    """Handle passed to a job handler for reporting progress and checking cancellation"""
+
+    def __init__(self, store: JobStore, job_id: str, flush_interval: float = 1.0):
+        self.store = store
+        self.job_id = job_id
+        self.flush_interval = flush_interval
+        self.cancelled = False
+        self._last_flush = 0.0
+
+    def update(self, progress: float, transcript: Union[str, Callable[[], str], None],
+               force: bool = False, **info) -> bool:
+        """
+        Record progress, writing to the store at most once per flush interval
+
+        Args:
+            progress: Percent complete
+            transcript: Text so far, a callable building it (called only when a
+                write is due, so a long transcript is not rebuilt on every
+                update), or None to keep the stored text
+            force: Write now regardless of the flush interval
+
+        Returns:
+            False if the job has been cancelled and the handler should stop
+        """
+        now = time.monotonic()
+        if force or now - self._last_flush >= self.flush_interval:
+            self._last_flush = now
+            if callable(transcript):
+                transcript = transcript()
+            self.store.update_progress(self.job_id, progress, transcript, **info)
+            self.is_cancelled()
+        return not self.cancelled
+
+    def is_cancelled(self) -> bool:
+        """Check the store for a cancellation without writing anything"""
+        self.cancelled = self.store.status(self.job_id) == CANCELLED
+        return self.cancelled
+
+
+class JobRunner:
+    """
+    Pool of worker threads draining the job store in priority order
+
+    The handler is called as ``handler(job, progress)`` and should return
+    normally on success or raise on failure; it should stop early when
+    ``progress.update`` returns False.
+    """
+
+    def __init__(self, store: JobStore, handler: Callable[[Dict[str, Any], JobProgress], None],
+                 workers: int = 1, poll_interval: float = 1.0):
+        self.store = store
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.poll_interval = poll_interval
+        self._wakeup = threading.Condition()
+        self._stopping = False
+        self._threads: List[threading.Thread] = []
+
+    def start(self) -> None:
+        """Requeue interrupted jobs and start the worker threads"""
+        if self._threads:
+            return
+        self._stopping = False
+        self.store.requeue_interrupted()
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"whisper-job-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, wait: bool = True) -> None:
+        with self._wakeup:
+            self._stopping = True
+            self._wakeup.notify_all()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+        self._threads = []
+
+    def notify(self) -> None:
+        """Wake an idle worker after a job has been queued"""
+        with self._wakeup:
+            self._wakeup.notify()
+
+    def _worker(self) -> None:
+        while not self._stopping:
+            job = self.store.claim_next()
+            if job is None:
+                with self._wakeup:
+                    if not self._stopping:
+                        self._wakeup.wait(self.poll_interval)
+                continue
+            progress = JobProgress(self.store, job["id"])
+            try:
+                self.handler(job, progress)
+                self.store.finish(job["id"], COMPLETED)
+            except Exception as e:
+                self.store.finish(job["id"], FAILED, error=str(e))
+            finally:
+                try:
+                    Path(job["audio_path"]).unlink()
+                except Exception:
+                    pass  # Ignore cleanup errors
@@ -122,16 +122,12 @@ class SimpleTranscriber:
             # Ensure output directory exists
             output_dir.mkdir(parents=True, exist_ok=True)
             
-            # Configure yt-dlp
+            # Configure yt-dlp (keep the native opus/m4a container; Whisper
+            # decodes it directly, so an MP3 re-encode would be wasted work)
             audio_path = output_dir / "temp_audio.%(ext)s"
             ydl_opts = {
                 'format': 'bestaudio/best',
                 'outtmpl': str(audio_path),
-                'postprocessors': [{
-                    'key': 'FFmpegExtractAudio',
-                    'preferredcodec': 'mp3',
-                    'preferredquality': '192',
-                }],
                 'quiet': True,
             }
             
@@ -143,13 +139,13 @@ class SimpleTranscriber:
                 with yt_dlp.YoutubeDL(ydl_opts) as ydl:
                     info = ydl.extract_info(url, download=True)
                     video_title = info.get('title', 'Unknown Video')
+                    audio_file = Path(ydl.prepare_filename(info))
                     
                 self.log(f"Downloaded: {video_title}")
             except Exception as e:
                 raise Exception(f"Failed to download video: {e}")
             
-            # Find audio file
-            audio_file = output_dir / "temp_audio.mp3"
+            # Check audio file
             if not audio_file.exists():
                 raise Exception("Audio file not found after download")
             
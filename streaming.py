@@ -0,0 +1,259 @@
+"""
+Live transcription of an audio stream.
+
+StreamingTranscriber re-decodes a rolling buffer as audio arrives and
+commits words once two decodes agree on them; OpusPacketDecoder turns the
+Opus packets a browser sends into the 16 kHz samples it expects. The
+WebSocket endpoint of the API is built on these.
+"""
+
+import bisect
+import os
+import re
+import threading
+import time
+from array import array
+from collections import namedtuple
+from typing import Optional, Tuple, Dict, Any, List
+
+from stt_utils import (
+    CachedSegment,
+    DEFAULT_BEAM_SIZE,
+    DEFAULT_COMPUTE_TYPE,
+    ModelRegistry,
+    get_model_registry,
+)
+
+
+# Live streaming: new audio needed before re-decoding, and rolling buffer length
+STREAM_MIN_CHUNK_SECONDS = float(os.getenv("WHISPER_STREAM_MIN_CHUNK", "1.0"))
+STREAM_MAX_BUFFER_SECONDS = float(os.getenv("WHISPER_STREAM_MAX_BUFFER", "15"))
+
+
+class OpusPacketDecoder:
+    """Decodes raw Opus packets (one per call) to 16 kHz mono float32 samples"""
+    
+    def __init__(self, sampling_rate: int = 16000):
+        try:
+            import av
+        except ImportError as e:
+            raise ImportError(f"Missing required package. Please install: pip install av\nError: {e}")
+        
+        self._av = av
+        self._codec = av.CodecContext.create("opus", "r")
+        self._codec.sample_rate = 48000
+        self._resampler = av.AudioResampler(format="flt", layout="mono", rate=sampling_rate)
+    
+    def decode(self, packet: bytes):
+        import numpy as np
+        chunks = []
+        for frame in self._codec.decode(self._av.Packet(packet)):
+            for resampled in self._resampler.resample(frame):
+                chunks.append(resampled.to_ndarray().reshape(-1))
+        return np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.float32)
+
+
+Word = namedtuple("Word", ["start", "end", "text"])
+
+# Committed words kept once their audio has left the buffer (enough for the 200-character prompt)
+_PROMPT_CONTEXT_WORDS = 200
+
+
+def _normalize_word(text: str) -> str:
+    return re.sub(r"[^\w']", "", text.lower())
+
+
+class StreamingTranscriber:
+    """
+    Incremental transcription of a live audio stream
+    
+    Audio is appended to a rolling buffer and the whole buffer is re-decoded
+    with word timestamps each time ``process`` is called. Words are committed
+    with the local-agreement policy: a word is final once two consecutive
+    decodes agree on it, and everything after the agreed prefix is reported
+    as a partial hypothesis. Committed audio is trimmed from the buffer once
+    it grows past ``max_buffer_seconds``; if nothing has been agreed by then
+    the pending hypothesis is committed anyway, which bounds the latency.
+    
+    ``process`` and ``finish`` take the registry to lease the model from,
+    so they can run as InferenceExecutor jobs; ``insert_audio`` may be called
+    from another thread at the same time.
+    """
+    
+    def __init__(self, model_name: str = "base", device: str = "cpu",
+                 compute_type: str = DEFAULT_COMPUTE_TYPE, beam_size: int = DEFAULT_BEAM_SIZE,
+                 language: Optional[str] = None,
+                 max_buffer_seconds: float = STREAM_MAX_BUFFER_SECONDS,
+                 sampling_rate: int = 16000):
+        import numpy as np
+        self.model_name = model_name
+        self.device = device
+        self.compute_type = compute_type
+        self.beam_size = beam_size
+        self.language = language
+        self.max_buffer_seconds = max_buffer_seconds
+        self.sampling_rate = sampling_rate
+        self._lock = threading.Lock()
+        self._audio = np.zeros(0, dtype=np.float32)
+        self._offset = 0.0  # Stream time of the first sample in the buffer
+        self._received_seconds = 0.0
+        self._processed_seconds = 0.0
+        # Per received chunk: stream seconds received so far (ascending) and the monotonic clock;
+        # chunks before the last commit are dropped, so both stay as short as the buffer
+        self._arrival_seconds = array('d')
+        self._arrival_times = array('d')
+        self._committed: List[Word] = []
+        self._hypothesis: List[Word] = []
+        self._segment_id = 0
+        self._lags: List[float] = []
+        self._started = time.monotonic()
+    
+    def insert_audio(self, samples) -> None:
+        """Append 16 kHz mono float32 samples to the buffer"""
+        import numpy as np
+        if len(samples) == 0:
+            return
+        with self._lock:
+            self._audio = np.concatenate((self._audio, samples.astype(np.float32, copy=False)))
+            self._received_seconds += len(samples) / self.sampling_rate
+            self._arrival_seconds.append(self._received_seconds)
+            self._arrival_times.append(time.monotonic())
+    
+    @property
+    def pending_seconds(self) -> float:
+        """Audio received since the last decode"""
+        return self._received_seconds - self._processed_seconds
+    
+    @property
+    def committed_until(self) -> float:
+        return self._committed[-1].end if self._committed else 0.0
+    
+    @property
+    def last_lag(self) -> Optional[float]:
+        """Lag of the most recently committed segment, in seconds"""
+        return self._lags[-1] if self._lags else None
+    
+    def process(self, registry: Optional[ModelRegistry] = None) -> Tuple[Optional[CachedSegment], str]:
+        """
+        Re-decode the buffer and commit the words two decodes agree on
+        
+        Returns:
+            Tuple of (newly committed segment or None, current partial text)
+        """
+        words, buffer_seconds = self._decode(registry)
+        
+        agreed = 0
+        for previous, current in zip(self._hypothesis, words):
+            if _normalize_word(previous.text) != _normalize_word(current.text):
+                break
+            agreed += 1
+        
+        committed, self._hypothesis = words[:agreed], words[agreed:]
+        if buffer_seconds > self.max_buffer_seconds and not committed:
+            committed, self._hypothesis = self._hypothesis, []
+        
+        segment = self._commit(committed)
+        self._trim()
+        return segment, "".join(word.text for word in self._hypothesis).strip()
+    
+    def finish(self, registry: Optional[ModelRegistry] = None) -> Optional[CachedSegment]:
+        """Decode whatever is left and commit all of it"""
+        if self.pending_seconds > 0 or self._hypothesis:
+            self._hypothesis, _ = self._decode(registry)
+        committed, self._hypothesis = self._hypothesis, []
+        return self._commit(committed)
+    
+    def _decode(self, registry: Optional[ModelRegistry]) -> Tuple[List[Word], float]:
+        """
+        Decode a snapshot of the buffer
+        
+        Returns:
+            Tuple of (uncommitted words on the stream timeline, seconds of audio decoded)
+        """
+        with self._lock:
+            audio = self._audio
+            offset = self._offset
+            self._processed_seconds = self._received_seconds
+        buffer_seconds = len(audio) / self.sampling_rate
+        if len(audio) == 0:
+            return [], buffer_seconds
+        
+        # Committed text that has already left the buffer gives the decoder its context
+        prompt = "".join(word.text for word in self._committed if word.end <= offset)[-200:].strip()
+        
+        registry = registry or get_model_registry()
+        model, key = registry.acquire(self.model_name, self.device, self.compute_type)
+        try:
+            segments, info = model.transcribe(audio, beam_size=self.beam_size, language=self.language,
+                                              word_timestamps=True, initial_prompt=prompt or None,
+                                              condition_on_previous_text=False)
+            words = [Word(offset + word.start, offset + word.end, word.word)
+                     for segment in segments for word in (segment.words or [])]
+        except Exception as e:
+            raise Exception(f"Transcription failed: {e}")
+        finally:
+            registry.release(key)
+        
+        # Skip words already committed, including a repeat of the last few at the boundary
+        words = [word for word in words if word.end > self.committed_until + 0.05]
+        tail = [_normalize_word(word.text) for word in self._committed[-5:]]
+        for size in range(min(len(tail), len(words)), 0, -1):
+            if tail[-size:] == [_normalize_word(word.text) for word in words[:size]]:
+                words = words[size:]
+                break
+        
+        if self.language is None and self._committed:
+            self.language = info.language  # Keep the language stable once text is committed
+        return words, buffer_seconds
+    
+    def _commit(self, words: List[Word]) -> Optional[CachedSegment]:
+        if not words:
+            return None
+        self._committed.extend(words)
+        self._segment_id += 1
+        segment = CachedSegment(self._segment_id, words[0].start, words[-1].end,
+                                "".join(word.text for word in words).strip())
+        
+        # Lag: time from receiving the segment's last audio to committing its text
+        with self._lock:
+            index = min(bisect.bisect_left(self._arrival_seconds, segment.end), len(self._arrival_seconds) - 1)
+            arrived = self._arrival_times[index]
+            # Later segments end later, so earlier chunks are never looked up again
+            del self._arrival_seconds[:index]
+            del self._arrival_times[:index]
+        self._lags.append(time.monotonic() - arrived)
+        return segment
+    
+    def _trim(self) -> None:
+        """Drop committed audio from the buffer once it is longer than the limit"""
+        with self._lock:
+            if len(self._audio) / self.sampling_rate <= self.max_buffer_seconds:
+                return
+            cut = self.committed_until - self._offset
+            if cut <= 0:
+                return
+            self._audio = self._audio[int(cut * self.sampling_rate):]
+            self._offset += cut
+        # Words that left the buffer are only needed for the decoder prompt
+        before = bisect.bisect_right([word.end for word in self._committed], self._offset)
+        if before > _PROMPT_CONTEXT_WORDS:
+            del self._committed[:before - _PROMPT_CONTEXT_WORDS]
+    
+    def latency_stats(self) -> Dict[str, Any]:
+        """Audio-time-to-text-time lag of committed segments in this session"""
+        lags = sorted(self._lags)
+        
+        def percentile(fraction: float) -> Optional[float]:
+            if not lags:
+                return None
+            return round(lags[min(len(lags) - 1, int(fraction * len(lags)))], 3)
+        
+        return {
+            "audio_seconds": round(self._received_seconds, 3),
+            "session_seconds": round(time.monotonic() - self._started, 3),
+            "segments": len(lags),
+            "lag_mean": round(sum(lags) / len(lags), 3) if lags else None,
+            "lag_p50": percentile(0.5),
+            "lag_p95": percentile(0.95),
+            "lag_max": round(lags[-1], 3) if lags else None,
+        }
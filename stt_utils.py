@@ -3,135 +3,2385 @@ STT (Speech-to-Text) Utilities Module
 
 This module provides reusable speech-to-text functionality using faster-whisper.
 Extracted from the YouTube transcriber project for reuse in other applications.
+
+Voice-activity detection (vad.py), live streaming (streaming.py) and the
+batch runner, farm and command line (batch_runner.py) are separate modules.
 """
 
 import os
+import re
+import json
+import bisect
+import math
+import time
+import uuid
+import queue
+import sys
+import shutil
+import hashlib
+import logging
+import importlib.util
+import tempfile
+import threading
+from contextlib import ExitStack, contextmanager, nullcontext
+from array import array
+from concurrent.futures import Future
+from collections import OrderedDict, namedtuple
 from pathlib import Path
 from datetime import datetime
-from typing import Optional, Tuple, Dict, Any, Callable, Generator
+from typing import Optional, Tuple, Dict, Any, Callable, Generator, Iterator, List
+
+from vad import (
+    VAD_MODES,
+    VAD_MODE,
+    VAD_MIN_SILENCE_MS,
+    VAD_SPEECH_PAD_MS,
+    SpeechTimeline,
+    detect_speech_spans,
+    vad_cache_spec,
+)
+
+
+# Model registry configuration
+MODEL_CACHE_MAX_MODELS = int(os.getenv("WHISPER_MODEL_CACHE_SIZE", "2"))
+MODEL_CACHE_MAX_MEMORY_MB = int(os.getenv("WHISPER_MODEL_CACHE_MEMORY_MB", "0"))  # 0 = no memory budget
+
+# Inference executor configuration
+INFERENCE_WORKERS = int(os.getenv("WHISPER_WORKERS", "1"))
+INFERENCE_QUEUE_SIZE = int(os.getenv("WHISPER_QUEUE_SIZE", "8"))
+# Models each worker loads and warms up before taking jobs, e.g. "base,small"
+INFERENCE_PRELOAD = [name.strip() for name in os.getenv("WHISPER_PRELOAD", "").split(",") if name.strip()]
+
+# Micro-batching of short clips (a batch size of 1 disables batching)
+BATCH_MAX_SIZE = int(os.getenv("WHISPER_BATCH_SIZE", "8"))
+BATCH_MAX_WAIT_MS = int(os.getenv("WHISPER_BATCH_WAIT_MS", "50"))
+BATCH_MAX_CLIP_SECONDS = 30  # One Whisper window; longer clips are decoded on their own
+
+# Transcript cache configuration (the library cache is disabled unless a directory is set)
+TRANSCRIPT_CACHE_DIR = os.getenv("WHISPER_TRANSCRIPT_CACHE_DIR")
+TRANSCRIPT_CACHE_MAX_MB = int(os.getenv("WHISPER_TRANSCRIPT_CACHE_MB", "512"))
+
+# Downloaded YouTube audio kept for re-transcription (unset = disabled)
+AUDIO_CACHE_DIR = os.getenv("WHISPER_AUDIO_CACHE_DIR")
+AUDIO_CACHE_MAX_MB = int(os.getenv("WHISPER_AUDIO_CACHE_MB", "4096"))
+
+# Full-text search index that finished transcripts are added to (unset = disabled)
+TRANSCRIPT_INDEX_PATH = os.getenv("WHISPER_TRANSCRIPT_INDEX")
+
+# Scratch space for downloaded audio (one private directory per job)
+SCRATCH_DIR = os.getenv("WHISPER_SCRATCH_DIR")  # Defaults to <system temp>/whisper_scratch
+SCRATCH_USE_TMPFS = os.getenv("WHISPER_SCRATCH_TMPFS", "0") == "1"
+SCRATCH_QUOTA_MB = int(os.getenv("WHISPER_SCRATCH_QUOTA_MB", "0"))  # 0 = no quota
+
+# Decoding defaults shared by the transcription functions and cache keys
+DEFAULT_COMPUTE_TYPE = "int8"
+DEFAULT_BEAM_SIZE = 5
+
+# Approximate resident size (MB) of each model at float32; used for the memory budget
+MODEL_SIZE_MB = {
+    "tiny": 150,
+    "base": 290,
+    "small": 970,
+    "medium": 3060,
+    "large": 6170,
+}
+COMPUTE_TYPE_SCALE = {
+    "float32": 1.0,
+    "float16": 0.5,
+    "bfloat16": 0.5,
+    "int16": 0.5,
+    "int8_float32": 0.3,
+    "int8_float16": 0.3,
+    "int8_bfloat16": 0.3,
+    "int8": 0.3,
+}
+
+
+StoredSegment = namedtuple("StoredSegment", ["id", "start", "end", "text", "avg_logprob"])
+
+
+class SegmentStore:
+    """
+    Compact, re-iterable store of transcript segments
+    
+    faster-whisper returns its segments as a one-shot generator of Segment
+    tuples that each carry token and word lists. The store keeps only what
+    transcripts need, in columns: ids, start and end times and average log
+    probabilities in typed arrays, and all text in one UTF-8 buffer with
+    offsets, which is a small fraction of the memory for hours of audio.
+    
+    The source iterator is consumed lazily, only as far as iteration,
+    indexing or time slicing needs, so writing a transcript still overlaps
+    with decoding. Every iteration starts from the first segment, and
+    several threads can iterate at once. Segments are expected in time
+    order, as Whisper produces them. If the source raises, the error is
+    kept and raised again by every later read past the stored segments, so
+    a failed decode is never mistaken for a complete transcript.
+    """
+    
+    def __init__(self, segments=()):
+        self.source = segments
+        self._source = iter(segments)
+        self._exhausted = False
+        self._error: Optional[BaseException] = None
+        self._lock = threading.Lock()
+        self._count = 0
+        self._ids = array('i')
+        self._starts = array('d')
+        self._ends = array('d')
+        self._logprobs = array('f')
+        self._text = bytearray()
+        self._offsets = array('Q', [0])
+    
+    def _append(self, segment) -> None:
+        encoded = segment.text.encode('utf-8', errors='replace')
+        self._ids.append(segment.id)
+        self._starts.append(segment.start)
+        self._ends.append(segment.end)
+        self._logprobs.append(getattr(segment, "avg_logprob", math.nan))
+        self._text += encoded
+        self._offsets.append(len(self._text))
+        self._count += 1  # Published last: readers never see a half-appended row
+    
+    def _pull(self, count: int) -> bool:
+        """Consume the source until ``count`` segments are stored; False if it ran out first"""
+        with self._lock:
+            while self._count < count:
+                if self._error is not None:
+                    raise self._error
+                if self._exhausted:
+                    return False
+                try:
+                    segment = next(self._source)
+                except StopIteration:
+                    self._exhausted = True
+                    return False
+                except BaseException as e:
+                    # A failed decode cannot be resumed; later reads fail the same way
+                    self._exhausted = True
+                    self._error = e if isinstance(e, Exception) else RuntimeError("Decoding was interrupted")
+                    raise
+                self._append(segment)
+            return True
+    
+    def fill(self) -> "SegmentStore":
+        """Consume the rest of the source (the whole decode for a live transcription)"""
+        self._pull(sys.maxsize)
+        return self
+    
+    @property
+    def complete(self) -> bool:
+        """Whether the source was consumed to its end (False after a decode error)"""
+        return self._exhausted and self._error is None
+    
+    def _row(self, index: int) -> StoredSegment:
+        text = self._text[self._offsets[index]:self._offsets[index + 1]].decode('utf-8')
+        return StoredSegment(self._ids[index], self._starts[index], self._ends[index], text,
+                             self._logprobs[index])
+    
+    def __iter__(self) -> Iterator[StoredSegment]:
+        index = 0
+        while index < self._count or self._pull(index + 1):
+            yield self._row(index)
+            index += 1
+    
+    def __len__(self) -> int:
+        return self.fill()._count
+    
+    def __bool__(self) -> bool:
+        return self._count > 0 or self._pull(1)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            # Every slice is a new store; contiguous ones copy whole column ranges
+            first, last, step = index.indices(len(self))
+            if step != 1:
+                return SegmentStore(self._row(i) for i in range(first, last, step)).fill()
+            return self._take(first, last)
+        if index < 0:
+            index += len(self)
+        if index < 0 or not (index < self._count or self._pull(index + 1)):
+            raise IndexError("segment index out of range")
+        return self._row(index)
+    
+    def between(self, start: float = 0.0, end: Optional[float] = None) -> "SegmentStore":
+        """
+        Segments overlapping the time range [start, end) as a new store
+        
+        Only as much of the source is consumed as is needed to reach ``end``.
+        """
+        if end is None:
+            self.fill()
+        else:
+            while (self._count == 0 or self._starts[self._count - 1] < end) and self._pull(self._count + 1):
+                pass
+        count = self._count
+        first = bisect.bisect_right(self._ends, start, 0, count)
+        last = count if end is None else bisect.bisect_left(self._starts, end, first, count)
+        return self._take(first, last)
+    
+    def _take(self, first: int, last: int) -> "SegmentStore":
+        last = max(first, last)
+        taken = SegmentStore()
+        taken._exhausted = True
+        taken._ids = self._ids[first:last]
+        taken._starts = self._starts[first:last]
+        taken._ends = self._ends[first:last]
+        taken._logprobs = self._logprobs[first:last]
+        base = self._offsets[first]
+        taken._text = self._text[base:self._offsets[last]]
+        taken._offsets = array('Q', (offset - base for offset in self._offsets[first:last + 1]))
+        taken._count = last - first
+        return taken
+    
+    @property
+    def text(self) -> str:
+        """Plain transcript: every segment's text, stripped and joined with spaces"""
+        return " ".join(filter(None, (segment.text.strip() for segment in self)))
+    
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the stored columns"""
+        columns = (self._ids, self._starts, self._ends, self._logprobs, self._offsets)
+        return sum(column.itemsize * len(column) for column in columns) + len(self._text)
+    
+    def close(self) -> None:
+        """Stop decoding: close the source, keeping the segments stored so far"""
+        with self._lock:
+            self._exhausted = True
+            close = getattr(self._source, "close", None)
+            if close:
+                close()
+    
+    def __getstate__(self) -> Dict[str, Any]:
+        # Pickled (e.g. back from a farm worker) as plain columns, fully decoded
+        self.fill()
+        state = self.__dict__.copy()
+        del state["_lock"], state["_source"], state["source"]
+        return state
+    
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self.source = self._source = iter(())
+        self._lock = threading.Lock()
+    
+    def __repr__(self) -> str:
+        state = "failed" if self._error is not None else "complete" if self._exhausted else "decoding"
+        return f"<SegmentStore {self._count} segments, {state}, {self.nbytes} bytes>"
 
 
 class TranscriptionResult:
     """Container for transcription results and metadata"""
     
     def __init__(self, segments, info, video_title: str, url: str, model_name: str):
-        self.segments = segments
+        # Segments decode lazily into a store that can be iterated any number of times
+        self.segments = segments if isinstance(segments, SegmentStore) else SegmentStore(segments)
         self.info = info
         self.video_title = video_title
         self.url = url
         self.model_name = model_name
         self.detected_language = info.language
         self.language_probability = info.language_probability
+        
+        # Speech statistics (speech_duration equals audio_duration when no VAD ran)
+        self.audio_duration = getattr(info, "duration", None)
+        speech_duration = getattr(info, "duration_after_vad", None)
+        self.speech_duration = speech_duration if speech_duration is not None else self.audio_duration
+        self.speech_ratio = (self.speech_duration / self.audio_duration
+                             if self.audio_duration else None)
+
+
+def estimate_model_memory_mb(model_name: str, compute_type: str = "int8") -> int:
+    """Rough memory footprint of a loaded model, used for cache budgeting"""
+    base_name = model_name.split("-")[0].split(".")[0]
+    size = MODEL_SIZE_MB.get(base_name, MODEL_SIZE_MB["large"])
+    return int(size * COMPUTE_TYPE_SCALE.get(compute_type, 1.0))
+
+
+class _ModelEntry:
+    """A loaded model plus its bookkeeping inside the registry"""
+
+    def __init__(self, model, memory_mb: int):
+        self.model = model
+        self.memory_mb = memory_mb
+        self.refcount = 0
+
+
+class ModelRegistry:
+    """
+    Thread-safe, process-wide cache of loaded faster-whisper models
+
+    Models are keyed by (model_name, device, compute_type, cpu_threads,
+    num_workers), where ``num_workers`` is the number of decodes one model
+    instance can run concurrently from different threads. The
+    registry keeps at most ``max_models`` instances and, if ``max_memory_mb``
+    is set, an estimated total footprint under that budget. Least recently
+    used models are evicted first, but a model that is currently leased is
+    never evicted; if every cached model is in use the budget is exceeded
+    until a lease is released.
+    """
+
+    def __init__(self, max_models: int = MODEL_CACHE_MAX_MODELS,
+                 max_memory_mb: int = MODEL_CACHE_MAX_MEMORY_MB,
+                 loader: Optional[Callable[..., Any]] = None):
+        self.max_models = max(1, max_models)
+        self.max_memory_mb = max_memory_mb
+        self._loader = loader or _load_whisper_model
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple, _ModelEntry]" = OrderedDict()
+        self._loading: Dict[Tuple, threading.Event] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(model_name: str, device: str = "cpu", compute_type: str = "int8",
+                 cpu_threads: int = 0, num_workers: int = 1) -> Tuple[str, str, str, int, int]:
+        return (model_name, device, compute_type, cpu_threads, max(1, num_workers))
+
+    def acquire(self, model_name: str, device: str = "cpu", compute_type: str = "int8",
+                cpu_threads: int = 0, num_workers: int = 1):
+        """
+        Lease a model, loading it on a miss
+
+        Every call must be paired with ``release`` for the same key, otherwise
+        the model stays pinned in memory.
+
+        Returns:
+            Tuple of (model, key)
+
+        Raises:
+            Exception: If the model fails to load
+        """
+        key = self.make_key(model_name, device, compute_type, cpu_threads, num_workers)
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    entry.refcount += 1
+                    self.hits += 1
+                    return entry.model, key
+                pending = self._loading.get(key)
+                if pending is None:
+                    pending = threading.Event()
+                    self._loading[key] = pending
+                    self.misses += 1
+                    break
+            # Another thread is loading the same model; wait and retry
+            pending.wait()
+
+        try:
+            model = self._loader(model_name, device, compute_type, cpu_threads, key[4])
+        except Exception:
+            with self._lock:
+                del self._loading[key]
+            pending.set()
+            raise
+
+        with self._lock:
+            entry = _ModelEntry(model, estimate_model_memory_mb(model_name, compute_type))
+            entry.refcount = 1
+            self._entries[key] = entry
+            del self._loading[key]
+            self._evict_locked()
+        pending.set()
+        return model, key
+
+    def release(self, key: Tuple) -> None:
+        """Return a lease obtained from ``acquire``"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.refcount == 0:
+                return
+            entry.refcount -= 1
+            if entry.refcount == 0:
+                self._evict_locked()
+
+    def _evict_locked(self) -> None:
+        """Drop idle least-recently-used models until the budget is met"""
+        for key in list(self._entries):
+            if not self._over_budget_locked():
+                break
+            if self._entries[key].refcount == 0:
+                del self._entries[key]
+                self.evictions += 1
+
+    def _over_budget_locked(self) -> bool:
+        if len(self._entries) > self.max_models:
+            return True
+        if self.max_memory_mb > 0:
+            used = sum(entry.memory_mb for entry in self._entries.values())
+            return used > self.max_memory_mb
+        return False
+
+    def clear(self) -> None:
+        """Drop every idle model from the cache"""
+        with self._lock:
+            for key in [k for k, e in self._entries.items() if e.refcount == 0]:
+                del self._entries[key]
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of cache counters and currently loaded models"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "max_models": self.max_models,
+                "max_memory_mb": self.max_memory_mb,
+                "memory_mb": sum(entry.memory_mb for entry in self._entries.values()),
+                "models": [
+                    {
+                        "model_name": key[0],
+                        "device": key[1],
+                        "compute_type": key[2],
+                        "cpu_threads": key[3],
+                        "num_workers": key[4],
+                        "in_use": entry.refcount,
+                        "memory_mb": entry.memory_mb,
+                    }
+                    for key, entry in self._entries.items()
+                ],
+            }
+
+
+def missing_packages(*modules: str) -> List[str]:
+    """
+    Names of the given top-level modules that are not installed
+    
+    Uses importlib.util.find_spec, so nothing is imported: checking for
+    whisper this way does not load torch.
+    """
+    return [name for name in modules if importlib.util.find_spec(name) is None]
+
+
+def _load_whisper_model(model_name: str, device: str, compute_type: str, cpu_threads: int,
+                        num_workers: int = 1):
+    """Default registry loader: construct a faster-whisper model"""
+    try:
+        from faster_whisper import WhisperModel
+    except ImportError as e:
+        raise ImportError(f"Missing required package. Please install: pip install faster-whisper\nError: {e}")
+
+    try:
+        return WhisperModel(model_name, device=device, compute_type=compute_type,
+                            cpu_threads=cpu_threads, num_workers=num_workers)
+    except Exception as e:
+        raise Exception(f"Failed to load faster-whisper model: {e}")
+
+
+def warm_up_model(model, seconds: float = 2.0, beam_size: int = DEFAULT_BEAM_SIZE) -> None:
+    """
+    Run a short synthetic clip through a model so kernels and allocators are warm
+    
+    The clip is a fixed voiced tone over a faint noise floor; language
+    detection is left on so that code path is exercised as well.
+    """
+    import numpy as np
+    
+    t = np.arange(int(seconds * 16000)) / 16000
+    rng = np.random.default_rng(0)
+    clip = sum(np.sin(2 * np.pi * 140 * k * t) / k for k in range(1, 6)) * 0.1
+    clip = (clip * (0.5 - 0.5 * np.cos(2 * np.pi * 4 * t)) + rng.normal(0, 1e-3, len(t))).astype(np.float32)
+    segments, _ = model.transcribe(clip, beam_size=beam_size)
+    for _ in segments:
+        pass
+
+
+_model_registry = ModelRegistry()
+
+
+def get_model_registry() -> ModelRegistry:
+    """Return the process-wide model registry"""
+    return _model_registry
+
+
+class _LeasedSegments:
+    """
+    Segment iterator that holds a registry lease until decoding finishes
+
+    faster-whisper decodes lazily while the segments are iterated, so the
+    model must stay leased until the generator is exhausted or discarded.
+    """
+
+    def __init__(self, segments: Iterator, registry: ModelRegistry, key: Tuple):
+        self._segments = segments
+        self._registry = registry
+        self._key = key
+        self._released = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return next(self._segments)
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self) -> None:
+        if not self._released:
+            self._released = True
+            close = getattr(self._segments, "close", None)
+            if close:
+                close()
+            self._registry.release(self._key)
+
+    def __del__(self):
+        self.close()
+
+
+class ExecutorBusyError(Exception):
+    """Raised when the inference executor queue is full"""
+
+
+class ExecutorStoppedError(ExecutorBusyError):
+    """Raised when work is submitted to an inference executor that is not running"""
+
+
+class InferenceExecutor:
+    """
+    Bounded pool of inference worker threads
+
+    Each worker owns a private ModelRegistry, so a model is loaded once per
+    worker and reused for every job it runs. Jobs wait in a bounded queue;
+    when the queue is full ``submit`` raises ExecutorBusyError instead of
+    letting the backlog (and latency) grow without limit.
+
+    Models listed in ``preload`` are loaded and run over a synthetic clip by
+    every worker before it takes its first job; ``ready`` turns true once
+    all workers have finished warming up.
+    """
+
+    def __init__(self, workers: int = INFERENCE_WORKERS, queue_size: int = INFERENCE_QUEUE_SIZE,
+                 models_per_worker: int = 1, loader: Optional[Callable[..., Any]] = None,
+                 preload: Optional[List[str]] = None):
+        self.workers = max(1, workers)
+        self.queue_size = max(1, queue_size)
+        self.preload = list(INFERENCE_PRELOAD if preload is None else preload)
+        # Unbounded so shutdown sentinels never block; ``submit`` enforces the bound
+        self._queue: "queue.Queue" = queue.Queue()
+        self._submit_lock = threading.Lock()
+        # Signalled whenever a worker takes a job off the queue (or the executor stops)
+        self._slot_freed = threading.Condition(self._submit_lock)
+        # Room for every preloaded model, so warming one never evicts another
+        self._registries = [ModelRegistry(max_models=max(models_per_worker, len(self.preload)), loader=loader)
+                            for _ in range(self.workers)]
+        self._threads = []
+        self._active = 0
+        self._active_lock = threading.Lock()
+        self._running = False
+        self._ready = threading.Event()
+        self._warming = 0
+        self._warmup_errors: List[str] = []
+        self._warmup_started = None
+        self._warmup_seconds = None
+
+    def start(self) -> None:
+        """Start the worker threads (idempotent)"""
+        if self._running:
+            return
+        self._running = True
+        self._ready.clear()
+        self._warming = self.workers if self.preload else 0
+        self._warmup_errors = []
+        self._warmup_started = time.monotonic()
+        if not self._warming:
+            self._ready.set()
+        for index, registry in enumerate(self._registries):
+            thread = threading.Thread(target=self._worker, args=(registry,),
+                                      name=f"whisper-inference-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop accepting work and let the workers exit after draining the queue"""
+        if not self._running:
+            return
+        self._running = False
+        with self._slot_freed:
+            self._slot_freed.notify_all()
+        for _ in self._threads:
+            self._queue.put((None, None))
+        if wait:
+            for thread in self._threads:
+                thread.join()
+        self._threads = []
+
+    def submit(self, job: Callable[[ModelRegistry], Any], timeout: float = 0) -> Future:
+        """
+        Queue a job for a worker
+
+        Args:
+            job: Callable receiving the worker's ModelRegistry; its return
+                value (or exception) resolves the returned future
+            timeout: Seconds to wait for room in a full queue (0 fails at once)
+
+        Returns:
+            concurrent.futures.Future for the job result
+
+        Raises:
+            ExecutorStoppedError: If the executor is not running
+            ExecutorBusyError: If the queue is still full after ``timeout``
+        """
+        future: Future = Future()
+        deadline = time.monotonic() + timeout
+        with self._slot_freed:
+            while self._running and self._queue.qsize() >= self.queue_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise ExecutorBusyError(f"Inference queue is full ({self.queue_size} pending jobs)")
+                self._slot_freed.wait(remaining)
+            if not self._running:
+                raise ExecutorStoppedError("Inference executor is not running")
+            self._queue.put((job, future))
+        return future
+
+    def _warm_up(self, registry: ModelRegistry) -> None:
+        """Load and warm every preloaded model in this worker's registry"""
+        for model_name in self.preload:
+            try:
+                model, key = registry.acquire(model_name, "cpu", DEFAULT_COMPUTE_TYPE)
+                try:
+                    warm_up_model(model)
+                finally:
+                    registry.release(key)
+            except Exception as e:
+                with self._active_lock:
+                    self._warmup_errors.append(f"{model_name}: {e}")
+        with self._active_lock:
+            self._warming -= 1
+            if self._warming == 0:
+                self._warmup_seconds = time.monotonic() - self._warmup_started
+                self._ready.set()
+
+    def _worker(self, registry: ModelRegistry) -> None:
+        if self.preload:
+            self._warm_up(registry)
+        while True:
+            job, future = self._queue.get()
+            with self._slot_freed:
+                self._slot_freed.notify()
+            if job is None:
+                return
+            if not future.set_running_or_notify_cancel():
+                continue
+            with self._active_lock:
+                self._active += 1
+            try:
+                future.set_result(job(registry))
+            except BaseException as e:
+                future.set_exception(e)
+            finally:
+                with self._active_lock:
+                    self._active -= 1
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    @property
+    def active_jobs(self) -> int:
+        return self._active
+
+    @property
+    def ready(self) -> bool:
+        """Whether every worker has finished warming up its preloaded models"""
+        return self._ready.is_set()
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        return self._ready.wait(timeout)
+
+    def warmup_status(self) -> Dict[str, Any]:
+        """Preloaded models, workers still warming up and any models that failed to load"""
+        with self._active_lock:
+            return {
+                "ready": self.ready,
+                "models": self.preload,
+                "workers_warming": self._warming,
+                "seconds": round(self._warmup_seconds, 3) if self._warmup_seconds is not None else None,
+                "errors": list(self._warmup_errors),
+            }
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, active jobs and per-worker model cache statistics"""
+        return {
+            "workers": self.workers,
+            "queue_size": self.queue_size,
+            "queue_depth": self.queue_depth,
+            "active_jobs": self.active_jobs,
+            "model_caches": [registry.stats() for registry in self._registries],
+        }
+
+
+# Lightweight stand-ins for faster-whisper's Segment and TranscriptionInfo
+CachedSegment = namedtuple("CachedSegment", ["id", "start", "end", "text"])
+CachedInfo = namedtuple("CachedInfo", ["language", "language_probability", "duration",
+                                       "duration_after_vad"], defaults=(None,))
+CachedTranscript = namedtuple("CachedTranscript", ["segments", "info", "metadata"])
+
+
+def hash_file(path: Path, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 of a file's contents, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def extract_youtube_video_id(url: str) -> Optional[str]:
+    """Extract the 11-character video id from a YouTube URL, if recognisable"""
+    match = re.search(r"(?:v=|youtu\.be/|/shorts/|/embed/|/live/|/v/)([A-Za-z0-9_-]{11})", url)
+    return match.group(1) if match else None
+
+
+class TranscriptCache:
+    """
+    Persistent, content-addressed cache of finished transcripts
+
+    Entries are keyed by the audio source (SHA-256 of the audio bytes or a
+    YouTube video id) plus every decode parameter that changes the output.
+    Each entry is a small JSON file written atomically (temp file + rename);
+    when the total size exceeds ``max_bytes`` the least recently used
+    entries are deleted.
+    """
+
+    def __init__(self, cache_dir: Path, max_bytes: int = TRANSCRIPT_CACHE_MAX_MB * 1024 * 1024):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total_bytes = sum(path.stat().st_size for path in self._entry_paths())
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(source_id: str, model_name: str, compute_type: str = DEFAULT_COMPUTE_TYPE,
+                 beam_size: int = DEFAULT_BEAM_SIZE, language: Optional[str] = None,
+                 vad: Optional[List[Any]] = None) -> str:
+        fields = [source_id, model_name, compute_type, beam_size, language]
+        if vad:
+            fields.append(vad)  # Keys for unfiltered transcripts are unchanged
+        raw = json.dumps(fields)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def _entry_paths(self):
+        return self.cache_dir.glob("*/*.json")
+
+    def get(self, key: str) -> Optional[CachedTranscript]:
+        """Return the cached transcript for ``key``, or None on a miss (an unreadable entry is deleted)"""
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            cached = CachedTranscript(
+                segments=[CachedSegment(*segment) for segment in data["segments"]],
+                info=CachedInfo(**data["info"]),
+                metadata=dict(data.get("metadata") or {})
+            )
+            os.utime(path)  # Mark as recently used
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            # Truncated or written in another layout: drop it so it is decoded and stored again
+            with self._lock:
+                self.misses += 1
+                try:
+                    size = path.stat().st_size
+                    path.unlink()
+                    self._total_bytes = max(0, self._total_bytes - size)
+                except OSError:
+                    pass
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return cached
+
+    def put(self, key: str, segments, info, metadata: Optional[Dict[str, Any]] = None) -> None:
+        """Store a finished transcript, evicting old entries if over budget"""
+        data = {
+            "segments": [[s.id, s.start, s.end, s.text] for s in segments],
+            "info": {
+                "language": info.language,
+                "language_probability": info.language_probability,
+                "duration": getattr(info, "duration", None),
+                "duration_after_vad": getattr(info, "duration_after_vad", None),
+            },
+            "metadata": metadata or {},
+        }
+        payload = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        fd, temp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(payload)
+            with self._lock:
+                old_size = path.stat().st_size if path.exists() else 0
+                os.replace(temp_name, path)
+                self._total_bytes += len(payload) - old_size
+                if self._total_bytes > self.max_bytes:
+                    self._evict_locked(keep=path)
+        except BaseException:
+            try:
+                os.unlink(temp_name)
+            except OSError:
+                pass
+            raise
+
+    def _evict_locked(self, keep: Path) -> None:
+        entries = []
+        for path in self._entry_paths():
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        self._total_bytes = sum(size for _, size, _ in entries)
+
+        for _, size, path in sorted(entries):
+            if self._total_bytes <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            self._total_bytes -= size
+            self.evictions += 1
+
+    def record(self, segments, info, key: str, metadata: Optional[Dict[str, Any]] = None):
+        """Wrap a segment iterator so the transcript is stored once it is fully consumed"""
+        return _CachingSegments(segments, info, self, key, metadata)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size_bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+class _CachingSegments:
+    """Segment iterator that stores the transcript in the cache once fully consumed"""
+
+    def __init__(self, segments, info, cache: TranscriptCache, key: str,
+                 metadata: Optional[Dict[str, Any]] = None):
+        self._segments = segments
+        self._info = info
+        self._cache = cache
+        self._key = key
+        self._metadata = metadata
+        self._collected = []
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            segment = next(self._segments)
+        except StopIteration:
+            if self._collected is not None:
+                collected, self._collected = self._collected, None
+                try:
+                    self._cache.put(self._key, collected, self._info, self._metadata)
+                except Exception:
+                    pass  # Caching is best-effort
+            raise
+        if self._collected is not None:
+            self._collected.append(CachedSegment(segment.id, segment.start, segment.end, segment.text))
+        return segment
+
+    def close(self) -> None:
+        self._collected = None
+        close = getattr(self._segments, "close", None)
+        if close:
+            close()
+
+
+_transcript_cache: Optional[TranscriptCache] = None
+_transcript_cache_lock = threading.Lock()
+
+
+def get_transcript_cache() -> Optional[TranscriptCache]:
+    """Return the library-wide transcript cache, or None if caching is not configured"""
+    global _transcript_cache
+    if not TRANSCRIPT_CACHE_DIR:
+        return None
+    with _transcript_cache_lock:
+        if _transcript_cache is None:
+            _transcript_cache = TranscriptCache(Path(TRANSCRIPT_CACHE_DIR))
+        return _transcript_cache
+
+
+_transcript_index = None
+_transcript_index_lock = threading.Lock()
+
+
+def get_transcript_index():
+    """Return the library-wide TranscriptIndex, or None if search indexing is not configured"""
+    global _transcript_index
+    if not TRANSCRIPT_INDEX_PATH:
+        return None
+    with _transcript_index_lock:
+        if _transcript_index is None:
+            # Imported on first use: transcript_index itself imports this module
+            from transcript_index import TranscriptIndex
+            _transcript_index = TranscriptIndex(Path(TRANSCRIPT_INDEX_PATH))
+        return _transcript_index
+
+
+class ScratchQuotaExceeded(Exception):
+    """Raised when scratch space has no room left for another download"""
+
+
+def _pid_alive(pid: int) -> Optional[bool]:
+    """Whether a process exists; None where this cannot be checked safely"""
+    if os.name == "nt":
+        return None  # os.kill would terminate the process on Windows
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class ScratchSpace:
+    """
+    Manager for per-job scratch directories
+    
+    Every job gets its own directory named ``<prefix>-<pid>-<random>`` under
+    the scratch root, so concurrent jobs never share temporary files. The
+    ``job`` context manager removes the directory however the job ends, an
+    optional quota caps the total bytes under the root, and
+    ``sweep_orphans`` deletes directories left behind by dead processes.
+    """
+    
+    def __init__(self, root: Optional[Path] = None, quota_bytes: int = 0, use_tmpfs: bool = False,
+                 orphan_max_age: float = 24 * 3600):
+        if root is None:
+            base = Path("/dev/shm") if use_tmpfs and os.access("/dev/shm", os.W_OK) else Path(tempfile.gettempdir())
+            root = base / "whisper_scratch"
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.quota_bytes = quota_bytes
+        self.orphan_max_age = orphan_max_age
+    
+    def create_job_dir(self, prefix: str = "job") -> Path:
+        """Create a new private directory; pair with ``remove_job_dir``"""
+        if self.quota_bytes and self.remaining_bytes() <= 0:
+            raise ScratchQuotaExceeded(f"Scratch quota of {self.quota_bytes} bytes is used up")
+        job_dir = self.root / f"{prefix}-{os.getpid()}-{uuid.uuid4().hex[:12]}"
+        job_dir.mkdir(parents=True)
+        return job_dir
+    
+    def remove_job_dir(self, job_dir: Path) -> None:
+        shutil.rmtree(job_dir, ignore_errors=True)
+    
+    @contextmanager
+    def job(self, prefix: str = "job"):
+        """Context manager yielding a private directory that is always removed"""
+        job_dir = self.create_job_dir(prefix)
+        try:
+            yield job_dir
+        finally:
+            self.remove_job_dir(job_dir)
+    
+    def usage_bytes(self) -> int:
+        total = 0
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                try:
+                    total += os.path.getsize(os.path.join(dirpath, filename))
+                except OSError:
+                    pass
+        return total
+    
+    def remaining_bytes(self) -> Optional[int]:
+        """Bytes left under the quota, or None if there is no quota"""
+        if not self.quota_bytes:
+            return None
+        return self.quota_bytes - self.usage_bytes()
+    
+    def check_quota(self) -> None:
+        """Raise ScratchQuotaExceeded if the scratch root is over quota"""
+        remaining = self.remaining_bytes()
+        if remaining is not None and remaining < 0:
+            raise ScratchQuotaExceeded(f"Scratch quota of {self.quota_bytes} bytes exceeded")
+    
+    def sweep_orphans(self) -> List[Path]:
+        """Remove job directories whose owning process is gone (or, where that
+        cannot be checked, that are older than ``orphan_max_age``)"""
+        removed = []
+        now = time.time()
+        for job_dir in self.root.iterdir():
+            if not job_dir.is_dir():
+                continue
+            parts = job_dir.name.rsplit("-", 2)
+            if len(parts) != 3 or not parts[1].isdigit():
+                continue
+            pid = int(parts[1])
+            if pid == os.getpid():
+                continue
+            alive = _pid_alive(pid)
+            if alive is None:
+                try:
+                    alive = now - job_dir.stat().st_mtime < self.orphan_max_age
+                except OSError:
+                    continue
+            if not alive:
+                self.remove_job_dir(job_dir)
+                removed.append(job_dir)
+        return removed
+
+
+_scratch_space: Optional[ScratchSpace] = None
+_scratch_lock = threading.Lock()
+
+
+def _acquire_file_lock(fd: int, blocking: bool) -> bool:
+    """Lock an open file with flock (msvcrt on Windows); False if not blocking and already held"""
+    try:
+        import fcntl
+    except ImportError:
+        fcntl = None
+    if fcntl is not None:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            return True
+        except BlockingIOError:
+            return False
+    import msvcrt
+    while True:
+        try:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            if not blocking:
+                return False
+            time.sleep(0.1)
+
+
+@contextmanager
+def _file_lock(path: Path, blocking: bool = True, remove: bool = False):
+    """
+    Exclusive advisory lock on ``path``, shared between processes and threads
+    
+    Yields True once the lock is held, or False straight away if
+    ``blocking`` is False and another holder has it. With ``remove`` the
+    lock file is deleted on release; a waiter that then wins the deleted
+    file notices and locks the path afresh.
+    """
+    while True:
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o666)
+        current = None
+        try:
+            acquired = _acquire_file_lock(fd, blocking)
+            if acquired:
+                current = os.stat(path)
+        except FileNotFoundError:
+            pass
+        except BaseException:
+            os.close(fd)
+            raise
+        if not acquired:
+            os.close(fd)
+            yield False
+            return
+        if current is not None and os.path.samestat(os.fstat(fd), current):
+            break
+        os.close(fd)  # Removed by the previous holder while we waited
+    try:
+        yield True
+    finally:
+        if remove:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass  # Still open elsewhere (Windows); it is reused next time
+        os.close(fd)  # Releases the lock
+
+
+class AudioCache:
+    """
+    Disk-budgeted cache of downloaded YouTube audio, shared between processes
+    
+    Entries are keyed by the canonical 11-character video id and the audio
+    format, and hold the audio file plus a JSON sidecar with its size,
+    SHA-256 and the video metadata. A hit is verified against the sidecar
+    before reuse and handed out as a hard link (or copy) in the caller's own
+    directory, so evicting an entry never pulls a file from under a running
+    job. Per-entry file locks let one process download a video while others
+    wanting the same one wait for it; when the cache exceeds ``max_bytes``
+    the least recently used entries are deleted.
+    """
+    
+    # Video metadata kept with each entry (yt-dlp's full info dict is far larger)
+    INFO_FIELDS = ("id", "title", "duration", "uploader", "channel", "upload_date", "webpage_url", "ext")
+    
+    def __init__(self, cache_dir: Path, max_bytes: int = AUDIO_CACHE_MAX_MB * 1024 * 1024):
+        self.cache_dir = Path(cache_dir)
+        self.lock_dir = self.cache_dir / "locks"
+        self.lock_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.corrupt = 0
+    
+    @staticmethod
+    def make_key(video_id: str, audio_format: str = "native") -> str:
+        return f"{video_id}.{audio_format}"
+    
+    def _meta_path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+    
+    @contextmanager
+    def lock(self, key: str, blocking: bool = True):
+        """Hold the entry's inter-process lock (e.g. across a download and ``put``)"""
+        # Lock files are deleted on release so the lock directory does not grow with the cache
+        with _file_lock(self.lock_dir / f"{key}.lock", blocking, remove=True) as acquired:
+            yield acquired
+    
+    @staticmethod
+    def _link_or_copy(source: Path, destination: Path) -> None:
+        try:
+            os.link(source, destination)
+        except OSError:
+            shutil.copyfile(source, destination)  # Different filesystem, or no hard links
+    
+    def _remove_entry(self, meta_path: Path, audio_name: Optional[str] = None) -> int:
+        """Delete an entry's audio and sidecar; returns the bytes freed"""
+        freed = 0
+        paths = [meta_path.parent / audio_name] if audio_name else []
+        for path in paths + [meta_path]:
+            try:
+                freed += path.stat().st_size
+                path.unlink()
+            except OSError:
+                pass
+        return freed
+    
+    def get(self, key: str, destination_dir: Path, filename: str = "temp_audio",
+            max_bytes: Optional[int] = None) -> Optional[Tuple[Path, Dict[str, Any]]]:
+        """
+        Place a verified copy of the cached audio in ``destination_dir``
+        
+        Call while holding ``lock(key)``. A cached file that fails its size
+        or checksum check is deleted and reported as a miss.
+        
+        Returns:
+            Tuple of (audio_file, video_info), or None on a miss
+        """
+        meta_path = self._meta_path(key)
+        meta = None
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            audio_path = meta_path.parent / meta["audio_file"]
+            if (audio_path.stat().st_size != meta["size"]
+                    or hash_file(audio_path) != meta["sha256"]):
+                raise ValueError("checksum mismatch")
+        except (OSError, ValueError, KeyError, TypeError):
+            corrupt = meta is not None or meta_path.exists()
+            if corrupt:
+                # Truncated, tampered with or missing its audio: drop it and download again
+                self._remove_entry(meta_path, meta.get("audio_file") if isinstance(meta, dict) else None)
+            with self._lock:
+                self.corrupt += corrupt
+                self.misses += 1
+            return None
+        if max_bytes is not None and meta["size"] > max_bytes:
+            with self._lock:
+                self.misses += 1
+            return None
+        
+        destination_dir.mkdir(parents=True, exist_ok=True)
+        audio_file = destination_dir / f"{filename}{audio_path.suffix}"
+        self._link_or_copy(audio_path, audio_file)
+        os.utime(meta_path)  # Mark as recently used
+        with self._lock:
+            self.hits += 1
+        return audio_file, meta["info"]
+    
+    def put(self, key: str, audio_file: Path, info: Dict[str, Any]) -> None:
+        """
+        Store downloaded audio, evicting old entries if over budget
+        
+        Call while holding ``lock(key)``. The audio is linked or copied in
+        under a temporary name and the sidecar is written last, so a crash
+        midway never leaves an entry that looks complete.
+        """
+        meta_path = self._meta_path(key)
+        meta_path.parent.mkdir(parents=True, exist_ok=True)
+        audio_path = meta_path.parent / f"{key}{audio_file.suffix}"
+        temp_audio = audio_path.with_name(f".{audio_path.name}.{uuid.uuid4().hex[:8]}.tmp")
+        try:
+            self._link_or_copy(audio_file, temp_audio)
+            meta = {
+                "audio_file": audio_path.name,
+                "size": temp_audio.stat().st_size,
+                "sha256": hash_file(temp_audio),
+                "info": {field: info[field] for field in self.INFO_FIELDS if info.get(field) is not None},
+                "cached_at": time.time(),
+            }
+            os.replace(temp_audio, audio_path)
+            with atomic_write(meta_path) as f:
+                json.dump(meta, f, ensure_ascii=False)
+        except BaseException:
+            try:
+                temp_audio.unlink()
+            except OSError:
+                pass
+            raise
+        self.evict(keep=key)
+    
+    def _entries(self) -> List[Tuple[float, int, str, Path, Optional[str]]]:
+        """(last used, bytes, key, sidecar path, audio file name) for every complete entry"""
+        entries = []
+        for meta_path in self.cache_dir.glob("*/*.json"):
+            try:
+                with open(meta_path, 'r', encoding='utf-8') as f:
+                    audio_name = json.load(f)["audio_file"]
+                stat = meta_path.stat()
+                size = stat.st_size + (meta_path.parent / audio_name).stat().st_size
+            except (OSError, ValueError, KeyError, TypeError):
+                continue
+            entries.append((stat.st_mtime, size, meta_path.stem, meta_path, audio_name))
+        return entries
+    
+    def evict(self, keep: Optional[str] = None) -> int:
+        """
+        Delete least recently used entries until the cache fits its budget
+        
+        Entries locked by another process (being read or written) are
+        skipped. Returns the number of entries deleted.
+        """
+        entries = self._entries()
+        total = sum(size for _, size, _, _, _ in entries)
+        evicted = 0
+        for _, size, key, meta_path, audio_name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            with self.lock(key, blocking=False) as acquired:
+                if not acquired:
+                    continue
+                total -= self._remove_entry(meta_path, audio_name)
+                evicted += 1
+        with self._lock:
+            self.evictions += evicted
+        return evicted
+    
+    def stats(self) -> Dict[str, Any]:
+        entries = self._entries()
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "corrupt": self.corrupt,
+                "entries": len(entries),
+                "size_bytes": sum(size for _, size, _, _, _ in entries),
+                "max_bytes": self.max_bytes,
+            }
+
+
+_audio_cache: Optional[AudioCache] = None
+_audio_cache_lock = threading.Lock()
+
+
+def get_audio_cache() -> Optional[AudioCache]:
+    """Return the library-wide downloaded-audio cache, or None if it is not configured"""
+    global _audio_cache
+    if not AUDIO_CACHE_DIR:
+        return None
+    with _audio_cache_lock:
+        if _audio_cache is None:
+            _audio_cache = AudioCache(Path(AUDIO_CACHE_DIR))
+        return _audio_cache
+
+
+def get_scratch_space() -> ScratchSpace:
+    """Return the process-wide scratch space, sweeping orphans on first use"""
+    global _scratch_space
+    with _scratch_lock:
+        if _scratch_space is None:
+            _scratch_space = ScratchSpace(Path(SCRATCH_DIR) if SCRATCH_DIR else None,
+                                          quota_bytes=SCRATCH_QUOTA_MB * 1024 * 1024,
+                                          use_tmpfs=SCRATCH_USE_TMPFS)
+            _scratch_space.sweep_orphans()
+        return _scratch_space
+
+
+class StageEvent:
+    """
+    Structured instrumentation event for one pipeline stage
+    
+    ``phase`` is "start", "end" or "error". End and error events carry the
+    stage ``duration`` in seconds plus whatever the stage recorded, such as
+    ``bytes``, ``audio_seconds`` or ``segments``.
+    """
+    
+    def __init__(self, stage: str, phase: str, job: Optional[Any] = None,
+                 duration: Optional[float] = None, **fields):
+        self.stage = stage
+        self.phase = phase
+        self.job = job
+        self.duration = duration
+        self.fields = fields
+        self.timestamp = time.time()
+    
+    def to_dict(self) -> Dict[str, Any]:
+        data = {"timestamp": round(self.timestamp, 6), "stage": self.stage, "phase": self.phase}
+        if self.job is not None:
+            data["job"] = self.job
+        if self.duration is not None:
+            data["duration"] = round(self.duration, 6)
+        data.update(self.fields)
+        return data
+    
+    def __str__(self) -> str:
+        label = f"[{self.stage}]" if self.job is None else f"[{self.job}:{self.stage}]"
+        if self.phase == "start":
+            return f"{label} started"
+        details = ", ".join(f"{key}={value}" for key, value in self.fields.items())
+        verb = "failed" if self.phase == "error" else "finished"
+        return f"{label} {verb} in {self.duration:.3f}s" + (f" ({details})" if details else "")
+
+
+class LoggingSink:
+    """Event sink that logs each event (start events at DEBUG, failures at WARNING)"""
+    
+    def __init__(self, logger: Optional[logging.Logger] = None, level: int = logging.INFO):
+        self.logger = logger or logging.getLogger("stt_utils.stages")
+        self.level = level
+    
+    def __call__(self, event: StageEvent) -> None:
+        if event.phase == "start":
+            level = logging.DEBUG
+        elif event.phase == "error":
+            level = logging.WARNING
+        else:
+            level = self.level
+        self.logger.log(level, "%s", event)
+
+
+class JsonLinesSink:
+    """Event sink appending one JSON object per event to a file or text stream"""
+    
+    def __init__(self, target):
+        self._owned = isinstance(target, (str, Path))
+        self._stream = open(target, 'a', encoding='utf-8') if self._owned else target
+        self._lock = threading.Lock()
+    
+    def __call__(self, event: StageEvent) -> None:
+        line = json.dumps(event.to_dict(), ensure_ascii=False, default=str)
+        with self._lock:
+            self._stream.write(line + "\n")
+            self._stream.flush()
+    
+    def close(self) -> None:
+        if self._owned:
+            self._stream.close()
+
+
+class MetricsSink:
+    """
+    Event sink aggregating per-stage totals for a metrics exporter
+    
+    For every stage it counts finished and failed runs, sums and tracks the
+    maximum duration, and sums every numeric field (bytes, audio_seconds,
+    segments, ...) except ratios such as real_time_factor.
+    """
+    
+    RATIO_FIELDS = ("real_time_factor",)
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages: Dict[str, Dict[str, Any]] = {}
+    
+    def __call__(self, event: StageEvent) -> None:
+        if event.phase == "start":
+            return
+        duration = event.duration or 0.0
+        with self._lock:
+            stats = self._stages.setdefault(event.stage, {
+                "count": 0, "errors": 0, "seconds_total": 0.0, "seconds_max": 0.0, "totals": {}
+            })
+            stats["count"] += 1
+            if event.phase == "error":
+                stats["errors"] += 1
+            stats["seconds_total"] += duration
+            stats["seconds_max"] = max(stats["seconds_max"], duration)
+            for key, value in event.fields.items():
+                if key in self.RATIO_FIELDS:
+                    continue
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    stats["totals"][key] = stats["totals"].get(key, 0) + value
+    
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {stage: dict(stats, totals=dict(stats["totals"]))
+                    for stage, stats in self._stages.items()}
+
+
+def cprofile_hook(output_dir: Path, stages: Optional[List[str]] = None):
+    """
+    Profiling hook for Instrumentation that saves a cProfile dump per stage run
+    
+    Dumps are named ``<stage>-<job>-<ns>.prof`` and can be read with pstats
+    or snakeviz. ``stages`` limits profiling to the named stages.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    
+    @contextmanager
+    def hook(stage: str, job: Optional[Any] = None):
+        if stages is not None and stage not in stages:
+            yield
+            return
+        import cProfile
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            yield  # Another profiler is already active on this thread
+            return
+        try:
+            yield
+        finally:
+            profiler.disable()
+            label = re.sub(r"[^\w.-]", "_", str(job if job is not None else "job"))
+            profiler.dump_stats(str(output_dir / f"{stage}-{label}-{time.time_ns()}.prof"))
+    return hook
+
+
+class Instrumentation:
+    """
+    Structured stage events for the transcription pipeline
+    
+    An instance can be passed anywhere a ``progress_callback`` is accepted.
+    Progress messages are forwarded to ``callback`` unchanged, so existing
+    GUI or print callbacks keep working, while stage events go to every sink
+    (LoggingSink, JsonLinesSink, MetricsSink or any callable taking a
+    StageEvent). While a stage runs the current thread is renamed
+    ``<name>[<stage>]`` so sampling profilers such as py-spy show the stage,
+    and ``profile_hook`` (see cprofile_hook) is entered around it.
+    """
+    
+    def __init__(self, sinks: Optional[List[Callable[[StageEvent], None]]] = None,
+                 callback: Optional[Callable[[str], None]] = None,
+                 profile_hook: Optional[Callable[..., Any]] = None):
+        self.sinks = list(sinks or [])
+        self.callback = callback
+        self.profile_hook = profile_hook
+    
+    def __call__(self, message: str) -> None:
+        if self.callback:
+            self.callback(message)
+    
+    def emit(self, event: StageEvent) -> None:
+        for sink in self.sinks:
+            try:
+                sink(event)
+            except Exception:
+                pass  # Instrumentation must never fail a job
+    
+    @contextmanager
+    def stage(self, name: str, job: Optional[Any] = None, **fields):
+        """
+        Time a stage and emit its start and end (or error) events
+        
+        Yields the event's field dict; values added to it inside the block
+        are reported with the end event.
+        """
+        self.emit(StageEvent(name, "start", job, **fields))
+        thread = threading.current_thread()
+        thread_name = thread.name
+        thread.name = f"{thread_name}[{name}]"
+        profile = self.profile_hook(name, job) if self.profile_hook else nullcontext()
+        started = time.perf_counter()
+        try:
+            with profile:
+                yield fields
+        except BaseException as e:
+            fields["error"] = f"{type(e).__name__}: {e}"
+            self.emit(StageEvent(name, "error", job, time.perf_counter() - started, **fields))
+            raise
+        else:
+            self.emit(StageEvent(name, "end", job, time.perf_counter() - started, **fields))
+        finally:
+            thread.name = thread_name
+
+
+def instrumentation_for(progress_callback: Optional[Callable[[str], None]]) -> Instrumentation:
+    """Use an Instrumentation passed as a progress callback, or wrap a plain callback"""
+    if isinstance(progress_callback, Instrumentation):
+        return progress_callback
+    return Instrumentation(callback=progress_callback)
+
+
+class _TimedSegments:
+    """
+    Segment iterator that times decoding and emits a "decode" stage event
+    
+    faster-whisper decodes while the segments are iterated, so only the time
+    spent inside ``next`` is counted, not the consumer's own work between
+    segments.
+    """
+    
+    def __init__(self, segments, instrumentation: Instrumentation, job: Optional[Any] = None,
+                 audio_seconds: Optional[float] = None):
+        self._segments = segments
+        self._instrumentation = instrumentation
+        self._job = job
+        self._audio_seconds = audio_seconds
+        self._started = False
+        self._finished = False
+        self.elapsed = 0.0
+        self.count = 0
+    
+    def __iter__(self):
+        return self
+    
+    def __next__(self):
+        if not self._started:
+            self._started = True
+            self._instrumentation.emit(StageEvent("decode", "start", self._job))
+        started = time.perf_counter()
+        try:
+            segment = next(self._segments)
+        except StopIteration:
+            self.elapsed += time.perf_counter() - started
+            self._finish()
+            raise
+        except Exception as e:
+            self.elapsed += time.perf_counter() - started
+            self._finish(error=f"{type(e).__name__}: {e}")
+            raise
+        self.elapsed += time.perf_counter() - started
+        self.count += 1
+        return segment
+    
+    def _finish(self, **fields) -> None:
+        if self._finished:
+            return
+        self._finished = True
+        fields["segments"] = self.count
+        if self._audio_seconds:
+            fields["audio_seconds"] = self._audio_seconds
+            fields["real_time_factor"] = round(self.elapsed / self._audio_seconds, 4)
+        phase = "error" if "error" in fields else "end"
+        self._instrumentation.emit(StageEvent("decode", phase, self._job, self.elapsed, **fields))
+    
+    def close(self) -> None:
+        close = getattr(self._segments, "close", None)
+        if close:
+            close()
+
+
+def format_timestamp(seconds: float) -> str:
+    """Format seconds to MM:SS or HH:MM:SS"""
+    hours = int(seconds // 3600)
+    minutes = int((seconds % 3600) // 60)
+    seconds = int(seconds % 60)
+    
+    if hours > 0:
+        return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+    else:
+        return f"{minutes:02d}:{seconds:02d}"
+
+
+def _downloaded_file(ydl, info: Dict[str, Any]) -> Path:
+    """Locate the file yt-dlp wrote for ``info``"""
+    downloads = info.get('requested_downloads') or []
+    if downloads and downloads[0].get('filepath'):
+        return Path(downloads[0]['filepath'])
+    return Path(ydl.prepare_filename(info))
+
+
+def download_youtube_audio(url: str, output_dir: Path, temp_filename: str = "temp_audio",
+                           audio_format: str = "native",
+                           max_filesize: Optional[int] = None,
+                           audio_cache: Optional[AudioCache] = None) -> Tuple[Path, Dict[str, Any]]:
+    """
+    Download audio from YouTube URL
+    
+    Args:
+        url: YouTube URL
+        output_dir: Directory to save the audio file
+        temp_filename: Base filename for temporary audio file
+        audio_format: "native" keeps the downloaded container (opus/m4a) as-is,
+            which the decoder reads directly; "mp3" re-encodes to 192 kbps MP3
+        max_filesize: Refuse downloads larger than this many bytes
+        audio_cache: AudioCache consulted before the network and filled after
+            a download (default: the one configured with WHISPER_AUDIO_CACHE_DIR)
+        
+    Returns:
+        Tuple of (audio_file_path, video_info); the file is the caller's to
+        delete even when it came from the cache. When a cache was consulted,
+        ``video_info["from_audio_cache"]`` says whether it was a hit
+        
+    Raises:
+        ImportError: If yt-dlp is not available
+        Exception: If download fails
+    """
+    if audio_cache is None:
+        audio_cache = get_audio_cache()
+    video_id = extract_youtube_video_id(url)
+    if audio_cache is None or video_id is None:
+        return _fetch_youtube_audio(url, output_dir, temp_filename, audio_format, max_filesize)
+    
+    # Holding the entry lock across the download means concurrent requests
+    # for the same video (from any process) fetch it once
+    key = audio_cache.make_key(video_id, audio_format)
+    with audio_cache.lock(key):
+        cached = audio_cache.get(key, output_dir, temp_filename, max_bytes=max_filesize)
+        if cached is not None:
+            audio_file, info = cached
+            return audio_file, dict(info, from_audio_cache=True)
+        audio_file, info = _fetch_youtube_audio(url, output_dir, temp_filename, audio_format, max_filesize)
+        try:
+            audio_cache.put(key, audio_file, info)
+        except Exception:
+            pass  # Caching is best-effort; the download itself succeeded
+    info["from_audio_cache"] = False
+    return audio_file, info
+
+
+def _fetch_youtube_audio(url: str, output_dir: Path, temp_filename: str, audio_format: str,
+                         max_filesize: Optional[int]) -> Tuple[Path, Dict[str, Any]]:
+    """Download audio with yt-dlp (see download_youtube_audio)"""
+    try:
+        import yt_dlp
+    except ImportError as e:
+        raise ImportError(f"Missing required package. Please install: pip install yt-dlp\nError: {e}")
+    
+    # Ensure output directory exists
+    output_dir.mkdir(parents=True, exist_ok=True)
+    
+    # Configure yt-dlp
+    audio_path = output_dir / f"{temp_filename}.%(ext)s"
+    ydl_opts = {
+        'format': 'bestaudio/best',
+        'outtmpl': str(audio_path),
+        'quiet': True,
+    }
+    if max_filesize is not None:
+        ydl_opts['max_filesize'] = max_filesize
+    if audio_format == "mp3":
+        ydl_opts['postprocessors'] = [{
+            'key': 'FFmpegExtractAudio',
+            'preferredcodec': 'mp3',
+            'preferredquality': '192',
+        }]
+    
+    # Download audio
+    try:
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            info = ydl.extract_info(url, download=True)
+            
+            # Find the downloaded audio file
+            if audio_format == "mp3":
+                audio_file = output_dir / f"{temp_filename}.mp3"
+            else:
+                audio_file = _downloaded_file(ydl, info)
+        
+        if not audio_file.exists():
+            raise FileNotFoundError("Audio file not found after download")
+            
+        return audio_file, info
+        
+    except Exception as e:
+        raise Exception(f"Failed to download video: {e}")
+
+
+def load_audio_pcm(source, sampling_rate: int = 16000):
+    """
+    Decode a file path or stream URL straight to mono float32 PCM
+    
+    This is the single decode/resample step faster-whisper would otherwise
+    perform on the file; the returned array can be passed to
+    transcribe_audio_file in place of a path.
+    
+    Args:
+        source: Local path or URL readable by FFmpeg/PyAV
+        sampling_rate: Output sample rate (Whisper models expect 16 kHz)
+        
+    Returns:
+        numpy float32 array of samples
+        
+    Raises:
+        ImportError: If faster-whisper is not available
+        Exception: If decoding fails
+    """
+    try:
+        from faster_whisper import decode_audio
+    except ImportError as e:
+        raise ImportError(f"Missing required package. Please install: pip install faster-whisper\nError: {e}")
+    
+    try:
+        return decode_audio(str(source), sampling_rate=sampling_rate)
+    except Exception as e:
+        raise Exception(f"Failed to decode audio: {e}")
 
 
-def format_timestamp(seconds: float) -> str:
-    """Format seconds to MM:SS or HH:MM:SS"""
-    hours = int(seconds // 3600)
-    minutes = int((seconds % 3600) // 60)
-    seconds = int(seconds % 60)
-    
-    if hours > 0:
-        return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
-    else:
-        return f"{minutes:02d}:{seconds:02d}"
+def probe_audio_duration(path: Path) -> Optional[float]:
+    """Duration of an audio file in seconds from its container header, if readable"""
+    try:
+        import av
+    except ImportError:
+        return None
+    try:
+        with av.open(str(path)) as container:
+            if container.duration:
+                return container.duration / 1_000_000  # av.time_base
+    except Exception:
+        pass
+    return None
 
 
-def download_youtube_audio(url: str, output_dir: Path, temp_filename: str = "temp_audio") -> Tuple[Path, Dict[str, Any]]:
+def fetch_youtube_audio_pcm(url: str, sampling_rate: int = 16000) -> Tuple[Any, Dict[str, Any]]:
     """
-    Download audio from YouTube URL
+    Stream a video's audio track from the network directly into the decoder
+    
+    Nothing is written to disk: yt-dlp only resolves the audio stream URL and
+    the stream is decoded and resampled to 16 kHz mono in memory.
     
     Args:
         url: YouTube URL
-        output_dir: Directory to save the audio file
-        temp_filename: Base filename for temporary audio file
+        sampling_rate: Output sample rate
         
     Returns:
-        Tuple of (audio_file_path, video_info)
+        Tuple of (pcm_samples, video_info)
         
     Raises:
-        ImportError: If yt-dlp is not available
-        Exception: If download fails
+        ImportError: If yt-dlp or faster-whisper is not available
+        Exception: If resolving or decoding the stream fails
     """
     try:
         import yt_dlp
     except ImportError as e:
         raise ImportError(f"Missing required package. Please install: pip install yt-dlp\nError: {e}")
     
-    # Ensure output directory exists
-    output_dir.mkdir(parents=True, exist_ok=True)
+    try:
+        with yt_dlp.YoutubeDL({'format': 'bestaudio/best', 'quiet': True}) as ydl:
+            info = ydl.extract_info(url, download=False)
+    except Exception as e:
+        raise Exception(f"Failed to resolve video: {e}")
     
-    # Configure yt-dlp
-    audio_path = output_dir / f"{temp_filename}.%(ext)s"
-    ydl_opts = {
-        'format': 'bestaudio/best',
-        'outtmpl': str(audio_path),
-        'postprocessors': [{
-            'key': 'FFmpegExtractAudio',
-            'preferredcodec': 'mp3',
-            'preferredquality': '192',
-        }],
-        'quiet': True,
-    }
+    stream_url = info.get('url')
+    if not stream_url:
+        raise Exception("No audio stream URL found for video")
     
-    # Download audio
+    return load_audio_pcm(stream_url, sampling_rate), info
+
+
+def _remap_segments(segments, timeline: SpeechTimeline):
+    """Shift segments decoded from speech-only audio onto the original timeline"""
     try:
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(url, download=True)
-            
-        # Find the downloaded audio file
-        audio_file = output_dir / f"{temp_filename}.mp3"
-        if not audio_file.exists():
-            raise FileNotFoundError("Audio file not found after download")
-            
-        return audio_file, info
-        
-    except Exception as e:
-        raise Exception(f"Failed to download video: {e}")
+        for segment in segments:
+            start = timeline.to_original(segment.start)
+            end = max(start, timeline.to_original(segment.end, is_end=True))
+            if hasattr(segment, "_replace"):
+                yield segment._replace(start=start, end=end)
+            else:
+                yield CachedSegment(segment.id, start, end, segment.text)
+    finally:
+        close = getattr(segments, "close", None)
+        if close:
+            close()
+
+
+def _audio_source_id(audio) -> str:
+    """Cache identity of a file path or in-memory sample array"""
+    if hasattr(audio, "tobytes"):
+        return hashlib.sha256(audio.tobytes()).hexdigest()
+    return hash_file(audio)
 
 
 def transcribe_audio_file(audio_file_path: Path, model_name: str = "base", 
-                         device: str = "cpu", compute_type: str = "int8",
-                         beam_size: int = 5) -> Tuple[Generator, Any]:
+                         device: str = "cpu", compute_type: str = DEFAULT_COMPUTE_TYPE,
+                         beam_size: int = DEFAULT_BEAM_SIZE, cpu_threads: int = 0,
+                         registry: Optional[ModelRegistry] = None,
+                         language: Optional[str] = None,
+                         cache: Optional[TranscriptCache] = None,
+                         source_id: Optional[str] = None,
+                         cache_metadata: Optional[Dict[str, Any]] = None,
+                         num_workers: int = 1, vad: str = VAD_MODE,
+                         vad_parameters: Optional[Dict[str, Any]] = None) -> Tuple[Generator, Any]:
     """
     Transcribe an audio file using faster-whisper
     
     Args:
-        audio_file_path: Path to the audio file
+        audio_file_path: Path to the audio file, or 16 kHz mono float32 samples
+            (see load_audio_pcm)
         model_name: Whisper model to use (tiny, base, small, medium, large)
         device: Device to use for inference (cpu, cuda)
         compute_type: Computation type (int8, int16, float16, float32)
         beam_size: Beam size for decoding
+        cpu_threads: Number of CPU threads for inference (0 = library default)
+        registry: Model registry to load from (defaults to the process-wide one)
+        language: Language code to decode in (None = auto-detect)
+        cache: Transcript cache to consult before decoding
+        source_id: Cache identity of the audio (defaults to the SHA-256 of the file)
+        cache_metadata: Extra metadata stored alongside a newly cached transcript
+        num_workers: Concurrent decodes the loaded model should support (see
+            transcribe_audio_chunked)
+        vad: Voice-activity pre-filter: "off", "energy" or "silero"; non-speech
+            is removed before decoding and timestamps stay on the original timeline
+        vad_parameters: Silero VAD options passed to faster-whisper (defaults to
+            the WHISPER_VAD_* settings)
         
     Returns:
-        Tuple of (segments_generator, transcription_info)
+        Tuple of (segments_generator, transcription_info); with VAD enabled
+        ``info.duration_after_vad`` is the amount of speech that was decoded
         
     Raises:
         ImportError: If faster-whisper is not available
+        ValueError: If the VAD mode is unknown
         Exception: If transcription fails
     """
-    try:
-        from faster_whisper import WhisperModel
-    except ImportError as e:
-        raise ImportError(f"Missing required package. Please install: pip install faster-whisper\nError: {e}")
+    if vad not in VAD_MODES:
+        raise ValueError(f"Unknown VAD mode: {vad} (expected one of {', '.join(VAD_MODES)})")
     
-    # Load faster-whisper model
-    try:
-        model = WhisperModel(model_name, device=device, compute_type=compute_type)
-    except Exception as e:
-        raise Exception(f"Failed to load faster-whisper model: {e}")
+    cache_key = None
+    if cache is not None:
+        cache_key = cache.make_key(source_id or _audio_source_id(audio_file_path), model_name,
+                                   compute_type, beam_size, language,
+                                   vad=vad_cache_spec(vad, vad_parameters))
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return (segment for segment in cached.segments), cached.info
+    
+    # Sample arrays are passed through as-is
+    audio = audio_file_path if hasattr(audio_file_path, "dtype") else str(audio_file_path)
+    options = {}
+    timeline = None
+    if vad == "silero":
+        options["vad_filter"] = True
+        options["vad_parameters"] = vad_parameters or {
+            "min_silence_duration_ms": VAD_MIN_SILENCE_MS,
+            "speech_pad_ms": VAD_SPEECH_PAD_MS,
+        }
+    elif vad == "energy":
+        import numpy as np
+        samples = audio if hasattr(audio, "dtype") else load_audio_pcm(audio)
+        duration = len(samples) / 16000
+        spans = detect_speech_spans(samples)
+        if not spans:
+            return iter(()), CachedInfo(language, 0.0, duration, 0.0)
+        audio = np.concatenate([samples[start:end] for start, end in spans])
+        timeline = SpeechTimeline(spans)
+    
+    registry = registry or get_model_registry()
+    model, key = registry.acquire(model_name, device, compute_type, cpu_threads, num_workers)
     
-    # Transcribe
     try:
-        segments, info = model.transcribe(str(audio_file_path), beam_size=beam_size)
-        return segments, info
+        segments, info = model.transcribe(audio, beam_size=beam_size, language=language, **options)
     except Exception as e:
+        registry.release(key)
         raise Exception(f"Transcription failed: {e}")
+    
+    segments = _LeasedSegments(segments, registry, key)
+    if timeline is not None:
+        segments = _remap_segments(segments, timeline)
+        info = CachedInfo(info.language, info.language_probability, duration, timeline.speech_seconds)
+    if cache_key is not None:
+        segments = cache.record(segments, info, cache_key, cache_metadata)
+    return segments, info
+
+
+def find_silence_cuts(samples, sampling_rate: int = 16000, min_chunk_seconds: float = 30.0,
+                      max_chunk_seconds: float = 120.0, frame_seconds: float = 0.02,
+                      smooth_seconds: float = 0.3) -> List[float]:
+    """
+    Choose cut points for splitting long audio at natural pauses
+    
+    Each cut is placed at the quietest point (short-term energy averaged over
+    ``smooth_seconds``) between ``min_chunk_seconds`` and ``max_chunk_seconds``
+    after the previous cut, so chunks stay within that range and words are
+    rarely split. The last cut also leaves at least ``min_chunk_seconds``
+    for the final chunk; where that is impossible the remainder is merged
+    into the previous chunk, which may then exceed ``max_chunk_seconds``.
+    
+    Args:
+        samples: Mono float32 samples
+        sampling_rate: Sample rate of ``samples``
+        min_chunk_seconds: Shortest chunk to produce
+        max_chunk_seconds: Longest chunk to produce
+        frame_seconds: Energy analysis frame length
+        smooth_seconds: Window over which frame energy is averaged
+        
+    Returns:
+        Sorted cut positions in seconds (empty if the audio fits in one chunk)
+        
+    Raises:
+        ValueError: If min_chunk_seconds is not positive and smaller than max_chunk_seconds
+    """
+    import numpy as np
+    
+    if not 0 < min_chunk_seconds < max_chunk_seconds:
+        raise ValueError(f"Chunk lengths must satisfy 0 < min_chunk_seconds < max_chunk_seconds, "
+                         f"got {min_chunk_seconds} and {max_chunk_seconds}")
+    total_seconds = len(samples) / sampling_rate
+    if total_seconds <= max_chunk_seconds:
+        return []
+    
+    frame = max(1, int(sampling_rate * frame_seconds))
+    frame_count = len(samples) // frame
+    energy = np.square(samples[:frame_count * frame].reshape(frame_count, frame)).mean(axis=1)
+    window = max(1, int(round(smooth_seconds / frame_seconds)))
+    energy = np.convolve(energy, np.ones(window) / window, mode="same")
+    
+    cuts = []
+    start = 0.0
+    while total_seconds - start > max_chunk_seconds:
+        low = int((start + min_chunk_seconds) / frame_seconds)
+        high = min(frame_count, int((start + max_chunk_seconds) / frame_seconds),
+                   int((total_seconds - min_chunk_seconds) / frame_seconds) + 1)
+        if high <= low:
+            break  # Any cut would leave a final chunk shorter than the minimum
+        cut = (low + int(np.argmin(energy[low:high]))) * frame_seconds
+        cuts.append(cut)
+        start = cut
+    return cuts
+
+
+def stitch_chunk_segments(chunks: List[Tuple[float, float, float, List[Any]]]) -> List[CachedSegment]:
+    """
+    Merge per-chunk segments into one list on the global timeline
+    
+    Each chunk is given as (offset, owned_start, owned_end, segments) where
+    segment times are relative to ``offset``. Chunks overlap their neighbours
+    slightly, so a segment is kept only by the chunk whose owned region
+    contains its midpoint; the result is then made monotonic and renumbered.
+    
+    Args:
+        chunks: Chunk descriptions in timeline order
+        
+    Returns:
+        List of CachedSegment with global timestamps
+    """
+    kept = []
+    for index, (offset, owned_start, owned_end, segments) in enumerate(chunks):
+        last = index == len(chunks) - 1
+        for segment in segments:
+            start = segment.start + offset
+            end = segment.end + offset
+            midpoint = (start + end) / 2
+            if owned_start <= midpoint and (midpoint < owned_end or last):
+                kept.append((start, end, segment.text))
+    
+    kept.sort(key=lambda item: item[0])
+    stitched = []
+    previous_end = 0.0
+    for start, end, text in kept:
+        start = max(start, previous_end)
+        end = max(end, start)
+        stitched.append(CachedSegment(len(stitched) + 1, start, end, text))
+        previous_end = end
+    return stitched
+
+
+def transcribe_audio_chunked(audio_file_path: Path, model_name: str = "base",
+                             device: str = "cpu", compute_type: str = DEFAULT_COMPUTE_TYPE,
+                             beam_size: int = DEFAULT_BEAM_SIZE, workers: int = 2,
+                             cpu_threads: int = 0, language: Optional[str] = None,
+                             min_chunk_seconds: float = 30.0, max_chunk_seconds: float = 120.0,
+                             overlap_seconds: float = 1.0,
+                             registry: Optional[ModelRegistry] = None) -> Tuple[List[CachedSegment], Any]:
+    """
+    Transcribe long audio by decoding silence-aligned chunks in parallel
+    
+    The audio is decoded once, split at pauses into chunks of roughly
+    ``min_chunk_seconds`` to ``max_chunk_seconds`` (each padded by
+    ``overlap_seconds`` on both sides), and the chunks are decoded
+    concurrently on one model instance loaded with ``workers`` replicas.
+    The language is detected once on the first chunk and forced on the rest
+    so every chunk decodes consistently.
+    
+    Args:
+        audio_file_path: Path to the audio file, or 16 kHz mono float32 samples
+        model_name: Whisper model to use (tiny, base, small, medium, large)
+        device: Device to use for inference (cpu, cuda)
+        compute_type: Computation type (int8, int16, float16, float32)
+        beam_size: Beam size for decoding
+        workers: Number of chunks decoded at the same time
+        cpu_threads: CPU threads per decode (0 = split the cores between workers)
+        language: Language code to decode in (None = detect on the first chunk)
+        min_chunk_seconds: Shortest chunk to produce
+        max_chunk_seconds: Longest chunk to produce
+        overlap_seconds: Audio shared with each neighbouring chunk
+        registry: Model registry to load from (defaults to the process-wide one)
+        
+    Returns:
+        Tuple of (segments, transcription_info) with segments on the global timeline
+        
+    Raises:
+        ImportError: If faster-whisper is not available
+        ValueError: If min_chunk_seconds and max_chunk_seconds are inconsistent
+        Exception: If decoding or transcription fails
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    
+    sampling_rate = 16000
+    samples = audio_file_path if hasattr(audio_file_path, "dtype") else load_audio_pcm(audio_file_path)
+    total_seconds = len(samples) / sampling_rate
+    
+    bounds = [0.0] + find_silence_cuts(samples, sampling_rate, min_chunk_seconds,
+                                       max_chunk_seconds) + [total_seconds]
+    workers = max(1, min(workers, len(bounds) - 1))
+    if not cpu_threads:
+        cpu_threads = max(1, (os.cpu_count() or 1) // workers)
+    options = dict(model_name=model_name, device=device, compute_type=compute_type,
+                   beam_size=beam_size, cpu_threads=cpu_threads, registry=registry,
+                   num_workers=workers)
+    
+    chunks = []
+    for owned_start, owned_end in zip(bounds, bounds[1:]):
+        offset = max(0.0, owned_start - overlap_seconds)
+        stop = min(total_seconds, owned_end + overlap_seconds)
+        chunks.append((offset, owned_start, owned_end,
+                       samples[int(offset * sampling_rate):int(stop * sampling_rate)]))
+    
+    # Language detection happens eagerly inside transcribe(), before any segment is decoded
+    first_segments, first_info = transcribe_audio_file(chunks[0][3], language=language, **options)
+    language = language or first_info.language
+    
+    def decode(index: int) -> List[Any]:
+        if index == 0:
+            segments = first_segments
+        else:
+            segments, _ = transcribe_audio_file(chunks[index][3], language=language, **options)
+        return list(segments)
+    
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="whisper-chunk") as pool:
+            decoded = list(pool.map(decode, range(len(chunks))))
+    finally:
+        if hasattr(first_segments, "close"):
+            first_segments.close()
+    
+    segments = stitch_chunk_segments([
+        (offset, owned_start, owned_end, chunk_segments)
+        for (offset, owned_start, owned_end, _), chunk_segments in zip(chunks, decoded)
+    ])
+    info = CachedInfo(language, first_info.language_probability, total_seconds)
+    return segments, info
+
+
+def _decode_clip_batch(model, clips: List[Any], language: Optional[str] = None,
+                       beam_size: int = DEFAULT_BEAM_SIZE) -> List[Tuple[List[CachedSegment], CachedInfo]]:
+    """
+    Decode several short clips with as few model calls as possible
+    
+    Clips are grouped by language (detected per clip unless given) and each
+    group is laid out one clip per 30 s window, so a single call to
+    faster-whisper's BatchedInferencePipeline decodes the whole group.
+    Whisper pads every window to 30 s anyway, so the layout adds no work.
+    With faster-whisper older than 1.1 the clips are decoded one at a time.
+    
+    Args:
+        model: Loaded faster-whisper model
+        clips: 16 kHz mono float32 sample arrays of at most BATCH_MAX_CLIP_SECONDS
+        language: Language code for every clip (None = detect per clip)
+        beam_size: Beam size for decoding
+        
+    Returns:
+        List of (segments, info) in the same order as ``clips``
+    """
+    import numpy as np
+    try:
+        from faster_whisper import BatchedInferencePipeline
+    except ImportError:
+        BatchedInferencePipeline = None
+    
+    sampling_rate = 16000
+    results = [None] * len(clips)
+    if BatchedInferencePipeline is None:
+        for index, clip in enumerate(clips):
+            segments, info = model.transcribe(clip, beam_size=beam_size, language=language)
+            results[index] = ([CachedSegment(s.id, s.start, s.end, s.text) for s in segments],
+                              CachedInfo(info.language, info.language_probability, info.duration))
+        return results
+    
+    groups: Dict[str, List[Tuple[int, float]]] = {}
+    for index, clip in enumerate(clips):
+        if language:
+            groups.setdefault(language, []).append((index, 1.0))
+        else:
+            detected, probability, _ = model.detect_language(clip)
+            groups.setdefault(detected, []).append((index, probability))
+    
+    pipeline = BatchedInferencePipeline(model=model)
+    window = BATCH_MAX_CLIP_SECONDS * sampling_rate
+    for group_language, members in groups.items():
+        audio = np.zeros(window * len(members), dtype=np.float32)
+        clip_timestamps = []
+        for slot, (index, _) in enumerate(members):
+            clip = clips[index][:window]
+            audio[slot * window:slot * window + len(clip)] = clip
+            clip_timestamps.append({"start": slot * BATCH_MAX_CLIP_SECONDS,
+                                    "end": (slot + 1) * BATCH_MAX_CLIP_SECONDS})
+        
+        segments, _ = pipeline.transcribe(audio, language=group_language, beam_size=beam_size,
+                                          batch_size=len(members), vad_filter=False,
+                                          clip_timestamps=clip_timestamps, without_timestamps=False)
+        
+        # Scatter segments back to their clips by the window they fall in
+        collected = [[] for _ in members]
+        for segment in segments:
+            slot = min(len(members) - 1, int(segment.start // BATCH_MAX_CLIP_SECONDS))
+            offset = slot * BATCH_MAX_CLIP_SECONDS
+            duration = len(clips[members[slot][0]]) / sampling_rate
+            start = min(segment.start - offset, duration)
+            end = min(max(segment.end - offset, start), duration)
+            collected[slot].append(CachedSegment(len(collected[slot]) + 1, start, end, segment.text))
+        
+        for slot, (index, probability) in enumerate(members):
+            results[index] = (collected[slot],
+                              CachedInfo(group_language, probability, len(clips[index]) / sampling_rate))
+    return results
+
+
+def transcribe_many(paths: List[Path], model_name: str = "base", device: str = "cpu",
+                    compute_type: str = DEFAULT_COMPUTE_TYPE, beam_size: int = DEFAULT_BEAM_SIZE,
+                    language: Optional[str] = None, batch_size: int = BATCH_MAX_SIZE,
+                    registry: Optional[ModelRegistry] = None) -> List[Tuple[List[Any], Any]]:
+    """
+    Transcribe many audio files, batching the short ones together
+    
+    Files of up to BATCH_MAX_CLIP_SECONDS are decoded ``batch_size`` at a
+    time in a single batched call; longer files go through
+    transcribe_audio_file individually. A file's duration is read from its
+    container header first, so only the short clips are loaded into memory.
+    
+    Without ``language``, the language is detected once per short clip
+    before batching (an extra encoder pass each), and clips are batched
+    with others of the same language; pass ``language`` when it is known
+    to skip detection.
+    
+    Args:
+        paths: Audio files (or 16 kHz mono float32 sample arrays)
+        model_name: Whisper model to use (tiny, base, small, medium, large)
+        device: Device to use for inference (cpu, cuda)
+        compute_type: Computation type (int8, int16, float16, float32)
+        beam_size: Beam size for decoding
+        language: Language code for every file (None = detect per file)
+        batch_size: Maximum clips decoded in one batch
+        registry: Model registry to load from (defaults to the process-wide one)
+        
+    Returns:
+        List of (segments, info) in the same order as ``paths``
+        
+    Raises:
+        ImportError: If faster-whisper is not available
+        Exception: If decoding or transcription fails
+    """
+    sampling_rate = 16000
+    # Only short clips are held as PCM; long files are decoded later, one at a time
+    samples: Dict[int, Any] = {}
+    for index, path in enumerate(paths):
+        if not hasattr(path, "dtype"):
+            duration = probe_audio_duration(path)
+            if duration is not None and duration > BATCH_MAX_CLIP_SECONDS:
+                continue
+            path = load_audio_pcm(path)
+        if len(path) <= BATCH_MAX_CLIP_SECONDS * sampling_rate:
+            samples[index] = path
+    short = sorted(samples)
+    results: List[Any] = [None] * len(paths)
+    
+    registry = registry or get_model_registry()
+    if short:
+        model, key = registry.acquire(model_name, device, compute_type)
+        try:
+            batch_size = max(1, batch_size)
+            for start in range(0, len(short), batch_size):
+                indices = short[start:start + batch_size]
+                decoded = _decode_clip_batch(model, [samples[i] for i in indices], language, beam_size)
+                for index, result in zip(indices, decoded):
+                    results[index] = result
+        except Exception as e:
+            raise Exception(f"Transcription failed: {e}")
+        finally:
+            registry.release(key)
+    
+    for index, result in enumerate(results):
+        if result is None:
+            segments, info = transcribe_audio_file(paths[index], model_name, device, compute_type,
+                                                   beam_size, registry=registry, language=language)
+            results[index] = (list(segments), info)
+    return results
+
+
+class MicroBatcher:
+    """
+    Collects short clips that arrive close together and decodes them as one batch
+    
+    A batch closes when it holds ``max_batch_size`` clips or ``max_wait_ms``
+    after its first clip arrived, whichever comes first; clips for different
+    models or languages go into separate batches. Each batch is handed to
+    ``dispatch`` as a job taking a ModelRegistry (for example
+    ``InferenceExecutor.submit``); without one it runs on the collector
+    thread against the process-wide registry.
+    """
+    
+    def __init__(self, max_batch_size: int = BATCH_MAX_SIZE, max_wait_ms: int = BATCH_MAX_WAIT_MS,
+                 device: str = "cpu", compute_type: str = DEFAULT_COMPUTE_TYPE,
+                 beam_size: int = DEFAULT_BEAM_SIZE,
+                 dispatch: Optional[Callable[[Callable[[ModelRegistry], Any]], Any]] = None):
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_ms = max_wait_ms
+        self.device = device
+        self.compute_type = compute_type
+        self.beam_size = beam_size
+        self._dispatch = dispatch
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.clips = 0
+    
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._collect, name="whisper-batcher", daemon=True)
+        self._thread.start()
+    
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop collecting; clips still waiting for a batch fail with ExecutorStoppedError"""
+        self._stopping = True
+        self._queue.put(None)
+        if wait and self._thread is not None:
+            self._thread.join()
+        self._thread = None
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                item[3].set_exception(ExecutorStoppedError("Batcher is shut down"))
+    
+    def submit(self, samples, model_name: str = "base", language: Optional[str] = None) -> Future:
+        """
+        Queue a clip for the next batch
+        
+        Returns:
+            Future resolving to (segments, info) for this clip
+        
+        Raises:
+            ExecutorStoppedError: If the batcher is not running
+        """
+        if self._thread is None or self._stopping:
+            raise ExecutorStoppedError("Batcher is not running")
+        future: Future = Future()
+        self._queue.put((samples, model_name, language, future))
+        return future
+    
+    def _collect(self) -> None:
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.max_wait_ms / 1000
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True  # Finish the batch in hand, then exit
+                    break
+                batch.append(item)
+            
+            groups: Dict[Tuple[str, Optional[str]], List[Any]] = {}
+            for item in batch:
+                groups.setdefault((item[1], item[2]), []).append(item)
+            for group in groups.values():
+                self._run(group)
+    
+    def _run(self, group: List[Any]) -> None:
+        job = self._batch_job(group)
+        if self._dispatch is None:
+            job(get_model_registry())
+            return
+        try:
+            self._dispatch(job)
+        except Exception as e:
+            for item in group:
+                item[3].set_exception(e)
+    
+    def _batch_job(self, group: List[Any]) -> Callable[[ModelRegistry], None]:
+        def job(registry: ModelRegistry) -> None:
+            model_name, language = group[0][1], group[0][2]
+            try:
+                model, key = registry.acquire(model_name, self.device, self.compute_type)
+                try:
+                    results = _decode_clip_batch(model, [item[0] for item in group], language,
+                                                 self.beam_size)
+                finally:
+                    registry.release(key)
+            except Exception as e:
+                for item in group:
+                    item[3].set_exception(Exception(f"Transcription failed: {e}"))
+                return
+            
+            with self._lock:
+                self.batches += 1
+                self.clips += len(group)
+            for item, result in zip(group, results):
+                item[3].set_result(result)
+        return job
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait_ms,
+                "pending": self._queue.qsize(),
+                "batches": self.batches,
+                "clips": self.clips,
+                "mean_batch_size": round(self.clips / self.batches, 2) if self.batches else None,
+            }
 
 
 def transcribe_youtube_video(url: str, output_dir: Path, model_name: str = "base",
                            include_timestamps: bool = False, 
                            cleanup_audio: bool = True,
-                           progress_callback: Optional[Callable[[str], None]] = None) -> TranscriptionResult:
+                           progress_callback: Optional[Callable[[str], None]] = None,
+                           cache: Optional[TranscriptCache] = None,
+                           vad: str = VAD_MODE) -> TranscriptionResult:
     """
     Complete pipeline: Download YouTube video audio and transcribe it
     
@@ -140,8 +2390,13 @@ def transcribe_youtube_video(url: str, output_dir: Path, model_name: str = "base
         output_dir: Directory to save transcript and temporary files
         model_name: Whisper model to use (tiny, base, small, medium, large)
         include_timestamps: Whether to include timestamps in output
-        cleanup_audio: Whether to delete temporary audio file after transcription
-        progress_callback: Optional callback function for progress updates
+        cleanup_audio: Whether to delete the downloaded audio after transcription
+            (if False it is moved into output_dir next to the transcript)
+        progress_callback: Optional callback function for progress updates; pass an
+            Instrumentation to also receive per-stage events (cache_lookup,
+            download, audio_decode, model_load, transcribe, decode)
+        cache: Transcript cache keyed by video id (defaults to get_transcript_cache())
+        vad: Voice-activity pre-filter mode (see transcribe_audio_file)
         
     Returns:
         TranscriptionResult object containing segments, info, and metadata
@@ -149,57 +2404,331 @@ def transcribe_youtube_video(url: str, output_dir: Path, model_name: str = "base
     Raises:
         Exception: If any step of the pipeline fails
     """
-    def log(message: str):
-        if progress_callback:
-            progress_callback(message)
+    log = instrumentation_for(progress_callback)
     
-    try:
-        log(f"Starting transcription for: {url}")
-        log(f"Using faster-whisper model: {model_name}")
-        log(f"Output directory: {output_dir}")
-        log("-" * 50)
-        
-        # Download audio
+    log(f"Starting transcription for: {url}")
+    log(f"Using faster-whisper model: {model_name}")
+    log(f"Output directory: {output_dir}")
+    log("-" * 50)
+    
+    # A cached transcript for this video skips the download and decode entirely
+    if cache is None:
+        cache = get_transcript_cache()
+    video_id = extract_youtube_video_id(url)
+    job = video_id or url
+    if cache is not None and video_id:
+        with log.stage("cache_lookup", job) as stage:
+            cached = cache.get(cache.make_key(f"youtube:{video_id}", model_name,
+                                              vad=vad_cache_spec(vad)))
+            stage["hit"] = cached is not None
+        if cached is not None:
+            video_title = cached.metadata.get('video_title', 'Unknown Video')
+            log(f"Using cached transcript: {video_title}")
+            log(f"Detected language: {cached.info.language} (probability: {cached.info.language_probability:.2f})")
+            log("✓ Transcription completed successfully!")
+            return TranscriptionResult(cached.segments, cached.info, video_title, url, model_name)
+    
+    # Audio goes to a private scratch directory that is removed however the job ends
+    scratch = get_scratch_space()
+    with scratch.job("youtube") as job_dir:
+        # Download audio (or reuse it from the audio cache)
         log("Downloading audio from YouTube...")
-        audio_file, video_info = download_youtube_audio(url, output_dir)
+        with log.stage("download", job, url=url) as stage:
+            audio_file, video_info = download_youtube_audio(url, job_dir, max_filesize=scratch.remaining_bytes())
+            scratch.check_quota()
+            stage["bytes"] = audio_file.stat().st_size
+            stage["cached"] = bool(video_info.get("from_audio_cache"))
+        if stage["cached"]:
+            log("Using cached audio")
         
         video_title = video_info.get('title', 'Unknown Video')
         duration = video_info.get('duration', 0)
+        video_id = video_info.get('id') or video_id
         
         log(f"Downloaded: {video_title}")
         if duration:
             log(f"Duration: {duration//60}:{duration%60:02d}")
         
-        # Transcribe
+        # Transcribe (each step is timed separately for instrumentation)
         log("Transcribing audio...")
-        segments, info = transcribe_audio_file(audio_file, model_name)
+        with log.stage("audio_decode", job) as stage:
+            samples = load_audio_pcm(audio_file)
+            audio_seconds = len(samples) / 16000
+            stage["audio_seconds"] = round(audio_seconds, 3)
+        
+        registry = get_model_registry()
+        with log.stage("model_load", job, model=model_name) as stage:
+            misses = registry.misses
+            _, model_key = registry.acquire(model_name, "cpu", DEFAULT_COMPUTE_TYPE)
+            stage["cached"] = registry.misses == misses
+        try:
+            with log.stage("transcribe", job, model=model_name) as stage:
+                segments, info = transcribe_audio_file(
+                    samples, model_name,
+                    cache=cache if video_id else None,
+                    source_id=f"youtube:{video_id}",
+                    cache_metadata={'video_title': video_title, 'url': url},
+                    vad=vad
+                )
+                stage["language"] = info.language
+        finally:
+            registry.release(model_key)  # transcribe_audio_file holds its own lease while decoding
+        if log.sinks:
+            segments = _TimedSegments(segments, log, job, round(audio_seconds, 3))
         
         log(f"Detected language: {info.language} (probability: {info.language_probability:.2f})")
         
         # Create result object
         result = TranscriptionResult(segments, info, video_title, url, model_name)
+        if vad != "off" and result.speech_ratio is not None:
+            log(f"Speech: {result.speech_duration:.0f}s of {result.audio_duration:.0f}s "
+                f"({result.speech_ratio:.0%}), silence skipped")
         
-        # Clean up audio file if requested
-        if cleanup_audio:
-            try:
-                audio_file.unlink()
-                log("Temporary audio file cleaned up")
-            except Exception:
-                log("Warning: Failed to clean up temporary audio file")
+        # Keep the audio next to the transcript if requested
+        if not cleanup_audio:
+            output_dir.mkdir(parents=True, exist_ok=True)
+            kept_audio = output_dir / f"{create_safe_filename(video_title)}{audio_file.suffix}"
+            shutil.move(str(audio_file), str(kept_audio))
+            log(f"Audio file saved to: {kept_audio}")
+    
+    if cleanup_audio:
+        log("Temporary audio file cleaned up")
+    
+    log("✓ Transcription completed successfully!")
+    return result
+
+
+@contextmanager
+def atomic_write(path: Path, errors: Optional[str] = None, partial: bool = False):
+    """
+    Open a text file for writing that only appears under its name once complete
+    
+    Content goes to a hidden temporary file in the same directory, which is
+    flushed to disk and renamed over ``path`` when the block exits cleanly.
+    A crash or exception leaves any previous file untouched and no partial
+    transcript behind. With ``partial`` the temporary file is visible as
+    ``<name>.<id>.partial`` instead, for output meant to be followed while
+    it is written. Each writer gets its own temporary file, so concurrent
+    writers of the same path never mix their content.
+    """
+    path = Path(path)
+    token = uuid.uuid4().hex[:8]
+    temp_path = path.with_name(f"{path.name}.{token}.partial" if partial else f".{path.name}.{token}.tmp")
+    # os.open rather than mkstemp so the file gets the usual umask permissions
+    fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8', errors=errors) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            temp_path.unlink()
+        except OSError:
+            pass
+        raise
+
+
+def format_subtitle_timestamp(seconds: float, separator: str = ",") -> str:
+    """Format seconds as HH:MM:SS,mmm (SRT) or HH:MM:SS.mmm (WebVTT with separator '.')"""
+    milliseconds = max(0, round(seconds * 1000))
+    hours, milliseconds = divmod(milliseconds, 3600000)
+    minutes, milliseconds = divmod(milliseconds, 60000)
+    seconds, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}{separator}{milliseconds:03d}"
+
+
+class _TranscriptFormat:
+    """One output layout for write_transcripts: a header, a chunk per segment and a footer"""
+    
+    def __init__(self, result: TranscriptionResult, include_timestamps: bool = False):
+        self.result = result
+        self.include_timestamps = include_timestamps
+    
+    def header(self) -> str:
+        return ""
+    
+    def segment(self, segment) -> str:
+        raise NotImplementedError
+    
+    def footer(self) -> str:
+        return ""
+
+
+class _TextFormat(_TranscriptFormat):
+    def header(self) -> str:
+        result = self.result
+        return (f"Transcript for: {result.video_title}\n"
+                f"YouTube URL: {result.url}\n"
+                f"Generated with faster-whisper model: {result.model_name}\n"
+                f"Detected language: {result.detected_language} (probability: {result.language_probability:.2f})\n"
+                f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
+                + "=" * 60 + "\n\n"
+                + ("TRANSCRIPT WITH TIMESTAMPS:\n\n" if self.include_timestamps else "TRANSCRIPT:\n\n"))
+    
+    def segment(self, segment) -> str:
+        if self.include_timestamps:
+            return f"[{format_timestamp(segment.start)} - {format_timestamp(segment.end)}] {segment.text.strip()}\n"
+        return segment.text.strip() + " "
+
+
+class _SrtFormat(_TranscriptFormat):
+    def __init__(self, result: TranscriptionResult, include_timestamps: bool = False):
+        super().__init__(result, include_timestamps)
+        self.cues = 0
+    
+    def segment(self, segment) -> str:
+        text = segment.text.strip()
+        if not text:
+            return ""
+        self.cues += 1
+        return (f"{self.cues}\n{format_subtitle_timestamp(segment.start)} --> "
+                f"{format_subtitle_timestamp(segment.end)}\n{text}\n\n")
+
+
+class _VttFormat(_TranscriptFormat):
+    def header(self) -> str:
+        return "WEBVTT\n\n"
+    
+    def segment(self, segment) -> str:
+        text = segment.text.strip()
+        if not text:
+            return ""
+        return (f"{format_subtitle_timestamp(segment.start, '.')} --> "
+                f"{format_subtitle_timestamp(segment.end, '.')}\n{text}\n\n")
+
+
+class _JsonFormat(_TranscriptFormat):
+    """Metadata plus every timed segment; the segments array is streamed one object per line"""
+    
+    def __init__(self, result: TranscriptionResult, include_timestamps: bool = False):
+        super().__init__(result, include_timestamps)
+        self.count = 0
+    
+    def header(self) -> str:
+        result = self.result
+        metadata = {
+            "title": result.video_title,
+            "source": result.url,
+            "model": result.model_name,
+            "language": result.detected_language,
+            "language_probability": result.language_probability,
+            "duration": result.audio_duration,
+            "generated_on": datetime.now().isoformat(timespec="seconds"),
+        }
+        # The object stays open: the segments array is streamed after the metadata fields
+        fields = "".join(f"  {json.dumps(key)}: {json.dumps(value, ensure_ascii=False)},\n"
+                         for key, value in metadata.items())
+        return "{\n" + fields + '  "segments": ['
+    
+    def segment(self, segment) -> str:
+        self.count += 1
+        data = {"id": segment.id, "start": segment.start, "end": segment.end, "text": segment.text.strip()}
+        return ("\n    " if self.count == 1 else ",\n    ") + json.dumps(data, ensure_ascii=False)
+    
+    def footer(self) -> str:
+        return ("\n  ]" if self.count else "]") + "\n}\n"
+
+
+class _TsvFormat(_TranscriptFormat):
+    """Tab-separated start and end in milliseconds plus text, as written by openai-whisper"""
+    
+    def header(self) -> str:
+        return "start\tend\ttext\n"
+    
+    def segment(self, segment) -> str:
+        text = " ".join(segment.text.split())
+        return f"{round(segment.start * 1000)}\t{round(segment.end * 1000)}\t{text}\n"
+
+
+_TRANSCRIPT_FORMATTERS = {
+    "txt": _TextFormat,
+    "srt": _SrtFormat,
+    "vtt": _VttFormat,
+    "json": _JsonFormat,
+    "tsv": _TsvFormat,
+}
+
+# Output formats of write_transcripts, transcribe_batch and the batch CLI
+TRANSCRIPT_FORMATS = tuple(_TRANSCRIPT_FORMATTERS)
+
+
+def parse_transcript_formats(formats) -> List[str]:
+    """
+    Normalize formats given as "txt,srt" or a list into a list without duplicates
+    
+    Raises:
+        ValueError: If a format is not one of TRANSCRIPT_FORMATS
+    """
+    if isinstance(formats, str):
+        formats = formats.split(",")
+    parsed = []
+    for name in formats:
+        name = name.strip().lower().lstrip(".")
+        if name not in _TRANSCRIPT_FORMATTERS:
+            raise ValueError(f"Unknown output format '{name}'. Valid formats: {', '.join(TRANSCRIPT_FORMATS)}")
+        if name not in parsed:
+            parsed.append(name)
+    if not parsed:
+        raise ValueError(f"No output format given. Valid formats: {', '.join(TRANSCRIPT_FORMATS)}")
+    return parsed
+
+
+def transcript_outputs(output_dir: Path, name: str, formats) -> Dict[str, Path]:
+    """Output path per format: ``<output_dir>/<name>_transcript.<format>``"""
+    return {fmt: Path(output_dir) / f"{name}_transcript.{fmt}" for fmt in parse_transcript_formats(formats)}
+
+
+def write_transcripts(result: TranscriptionResult, outputs: Dict[str, Path],
+                      include_timestamps: bool = False) -> Dict[str, Path]:
+    """
+    Write a transcript in any set of formats in a single pass over its segments
+    
+    Every segment is formatted for each output and flushed as it arrives, so
+    for a transcription that is still decoding the files fill up as it
+    goes; the writer buffers nothing beyond the current segment, though
+    ``result.segments`` keeps every decoded segment (compactly, see
+    SegmentStore). Each file is written through atomic_write() as
+    ``<name>.<id>.partial`` (readable mid-decode) and renamed into place
+    once complete; if anything fails, the partial files are removed.
+    
+    Args:
+        result: TranscriptionResult object
+        outputs: Output path per format, e.g. {"srt": Path("talk.srt")}
+        include_timestamps: Whether the txt format includes timestamps
         
-        log("✓ Transcription completed successfully!")
-        return result
+    Returns:
+        The output path per format
         
+    Raises:
+        ValueError: If a format is not one of TRANSCRIPT_FORMATS
+        Exception: If transcription or file writing fails
+    """
+    for fmt in outputs:
+        if fmt not in _TRANSCRIPT_FORMATTERS:
+            raise ValueError(f"Unknown output format '{fmt}'. Valid formats: {', '.join(TRANSCRIPT_FORMATS)}")
+    formatters = [_TRANSCRIPT_FORMATTERS[fmt](result, include_timestamps) for fmt in outputs]
+    try:
+        with ExitStack() as stack:
+            files = [stack.enter_context(atomic_write(path, errors='replace', partial=True))
+                     for path in outputs.values()]
+            for formatter, f in zip(formatters, files):
+                f.write(formatter.header())
+                f.flush()
+            
+            for segment in result.segments:
+                for formatter, f in zip(formatters, files):
+                    chunk = formatter.segment(segment)
+                    if chunk:
+                        f.write(chunk)
+                        f.flush()
+            
+            for formatter, f in zip(formatters, files):
+                f.write(formatter.footer())
     except Exception as e:
-        # Attempt cleanup on error
-        if cleanup_audio:
-            temp_audio = output_dir / "temp_audio.mp3"
-            if temp_audio.exists():
-                try:
-                    temp_audio.unlink()
-                except Exception:
-                    pass
-        raise e
+        raise Exception(f"Failed to save transcript: {e}") from e
+    return {fmt: Path(path) for fmt, path in outputs.items()}
 
 
 def save_transcript_to_file(result: TranscriptionResult, output_file: Path, 
@@ -215,28 +2744,35 @@ def save_transcript_to_file(result: TranscriptionResult, output_file: Path,
     Raises:
         Exception: If file writing fails
     """
+    write_transcripts(result, {"txt": output_file}, include_timestamps)
+
+
+def save_transcript_json(result: TranscriptionResult, output_file: Path) -> None:
+    """
+    Save transcription result as JSON: metadata plus every timed segment
+    
+    Raises:
+        Exception: If file writing fails
+    """
+    write_transcripts(result, {"json": output_file})
+
+
+def index_transcript(index, result: TranscriptionResult, transcript_file: Optional[Path],
+                     progress_callback: Optional[Callable[[str], None]] = None) -> bool:
+    """
+    Add a saved transcript to a TranscriptIndex without failing the caller
+    
+    Returns:
+        True if the transcript was indexed
+    """
     try:
-        with open(output_file, 'w', encoding='utf-8', errors='replace') as f:
-            f.write(f"Transcript for: {result.video_title}\n")
-            f.write(f"YouTube URL: {result.url}\n")
-            f.write(f"Generated with faster-whisper model: {result.model_name}\n")
-            f.write(f"Detected language: {result.detected_language} (probability: {result.language_probability:.2f})\n")
-            f.write(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write("=" * 60 + "\n\n")
-            
-            if include_timestamps:
-                f.write("TRANSCRIPT WITH TIMESTAMPS:\n\n")
-                for segment in result.segments:
-                    start_time = format_timestamp(segment.start)
-                    end_time = format_timestamp(segment.end)
-                    f.write(f"[{start_time} - {end_time}] {segment.text.strip()}\n")
-            else:
-                f.write("TRANSCRIPT:\n\n")
-                for segment in result.segments:
-                    f.write(segment.text.strip() + " ")
-                    
+        index.add_result(result, transcript_file)
+        return True
     except Exception as e:
-        raise Exception(f"Failed to save transcript: {e}")
+        # The transcript itself is already saved; a later backfill can index it
+        if progress_callback:
+            progress_callback(f"Could not add transcript to the search index: {e}")
+        return False
 
 
 def create_safe_filename(title: str, max_length: int = 50) -> str:
@@ -263,7 +2799,8 @@ def create_safe_filename(title: str, max_length: int = 50) -> str:
 
 def transcribe_youtube_to_file(url: str, output_dir: Path, model_name: str = "base",
                              include_timestamps: bool = False,
-                             progress_callback: Optional[Callable[[str], None]] = None) -> Path:
+                             progress_callback: Optional[Callable[[str], None]] = None,
+                             formats=("txt",)) -> Path:
     """
     High-level function: Transcribe YouTube video and save to file
     
@@ -272,25 +2809,45 @@ def transcribe_youtube_to_file(url: str, output_dir: Path, model_name: str = "ba
         output_dir: Directory to save the transcript
         model_name: Whisper model to use
         include_timestamps: Whether to include timestamps
-        progress_callback: Optional callback for progress updates
+        progress_callback: Optional callback for progress updates (or an
+            Instrumentation, which also receives a "write" stage event)
+        formats: Transcript formats to write in the same pass (see
+            TRANSCRIPT_FORMATS), e.g. ("txt", "srt")
         
     Returns:
-        Path to the saved transcript file
+        Path to the saved transcript file (of the first format)
         
     Raises:
         Exception: If transcription or file saving fails
     """
+    log = instrumentation_for(progress_callback)
+    
     # Transcribe the video
     result = transcribe_youtube_video(url, output_dir, model_name, 
-                                    include_timestamps, True, progress_callback)
+                                    include_timestamps, True, log)
     
-    # Create safe filename and save
+    # Create safe filename and save every format while the segments decode
     safe_title = create_safe_filename(result.video_title)
-    transcript_file = output_dir / f"{safe_title}_transcript.txt"
+    outputs = transcript_outputs(output_dir, safe_title, formats)
+    transcript_file = next(iter(outputs.values()))
+    
+    with log.stage("write", extract_youtube_video_id(url) or url, formats=",".join(outputs)) as stage:
+        write_transcripts(result, outputs, include_timestamps)
+        stage["bytes"] = sum(path.stat().st_size for path in outputs.values())
+        # Segments decode lazily while they are written; that share is reported by the decode stage
+        stage["decode_seconds"] = round(getattr(result.segments.source, "elapsed", 0.0), 6)
     
-    save_transcript_to_file(result, transcript_file, include_timestamps)
+    for path in outputs.values():
+        log(f"✓ Transcript saved to: {path}")
     
-    if progress_callback:
-        progress_callback(f"✓ Transcript saved to: {transcript_file}")
+    index = get_transcript_index()
+    if index is not None:
+        index_transcript(index, result, transcript_file, log)
     
-    return transcript_file
\ No newline at end of file
+    return transcript_file
+
+
+if __name__ == "__main__":
+    # The command line lives in batch_runner; `python stt_utils.py <command>` still works
+    from batch_runner import main
+    sys.exit(main())
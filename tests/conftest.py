@@ -0,0 +1,49 @@
+"""Shared fixtures: a fake faster-whisper model, so tests never load or download a real one"""
+
+from collections import namedtuple
+
+import pytest
+
+import stt_utils
+
+FakeSegment = namedtuple("FakeSegment", ["id", "start", "end", "text", "avg_logprob"])
+FakeInfo = namedtuple("FakeInfo", ["language", "language_probability", "duration", "duration_after_vad"])
+
+
+class FakeModel:
+    """Stands in for WhisperModel: one segment per second of audio, with text w<index>"""
+
+    def __init__(self, name: str = "base"):
+        self.name = name
+        self.calls = 0
+
+    def transcribe(self, audio, **options):
+        self.calls += 1
+        seconds = len(audio) / 16000 if hasattr(audio, "dtype") else 3.0
+
+        def segments():
+            for index in range(max(1, int(seconds))):
+                yield FakeSegment(index, float(index), float(index + 1), f" w{index}", -0.1)
+
+        return segments(), FakeInfo(options.get("language") or "en", 0.9, seconds, None)
+
+
+@pytest.fixture
+def fake_loader():
+    """Loader for ModelRegistry/InferenceExecutor that records every model it builds"""
+    loaded = []
+
+    def load(model_name, device, compute_type, cpu_threads, num_workers):
+        loaded.append((model_name, device, compute_type, cpu_threads, num_workers))
+        return FakeModel(model_name)
+
+    load.loaded = loaded
+    return load
+
+
+@pytest.fixture
+def fake_registry(monkeypatch, fake_loader):
+    """Replace the process-wide model registry with one that loads FakeModels"""
+    registry = stt_utils.ModelRegistry(loader=fake_loader)
+    monkeypatch.setattr(stt_utils, "_model_registry", registry)
+    return registry
@@ -0,0 +1,136 @@
+import json
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+import whisper_api
+from stt_utils import InferenceExecutor
+
+API_KEY = "test-key"
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path, fake_loader):
+    """The API with a fake model on its executor and no cache, index or micro-batching"""
+    monkeypatch.setenv("WHISPER_API_KEY", API_KEY)
+    monkeypatch.setattr(whisper_api, "executor", InferenceExecutor(workers=1, loader=fake_loader, preload=[]))
+    monkeypatch.setattr(whisper_api, "micro_batcher", None)
+    monkeypatch.setattr(whisper_api, "get_transcript_cache", lambda: None)
+    monkeypatch.setattr(whisper_api, "JOBS_DIR", tmp_path / "jobs")
+    monkeypatch.setattr(whisper_api, "_job_runner", None)
+    with TestClient(whisper_api.app, headers={"X-API-Key": API_KEY}) as test_client:
+        yield test_client
+
+
+def upload(size: int, name: str = "clip.wav"):
+    return {"file": (name, b"\0" * size, "audio/wav")}
+
+
+def test_an_upload_over_the_limit_is_rejected_with_413(client, monkeypatch):
+    monkeypatch.setattr(whisper_api, "MAX_FILE_SIZE", 1024)
+    response = client.post("/transcribe", files=upload(4096))
+    assert response.status_code == 413
+    assert response.json()["detail"].startswith("File too large")
+
+
+def test_an_upload_at_the_limit_is_transcribed(client, monkeypatch):
+    monkeypatch.setattr(whisper_api, "MAX_FILE_SIZE", 1024)
+    response = client.post("/transcribe", files=upload(1024))
+    assert response.status_code == 200
+    assert response.json()["transcript"] == "w0 w1 w2"
+
+
+def test_the_rejected_upload_leaves_no_temporary_file(client, monkeypatch, tmp_path):
+    monkeypatch.setattr(whisper_api, "MAX_FILE_SIZE", 1024)
+    monkeypatch.setattr(whisper_api.tempfile, "tempdir", str(tmp_path))
+    client.post("/transcribe", files=upload(4096))
+    assert not list(tmp_path.glob("*.wav"))
+
+
+@pytest.fixture
+def limited_client():
+    """A bare app behind RequestSizeLimitMiddleware with a 100-byte limit"""
+    app = FastAPI()
+
+    @app.post("/echo")
+    async def echo(request: Request):
+        return {"size": len(await request.body())}
+
+    app.add_middleware(whisper_api.RequestSizeLimitMiddleware, max_body_size=100)
+    return TestClient(app)
+
+
+def test_the_middleware_refuses_an_oversized_content_length(limited_client):
+    response = limited_client.post("/echo", content=b"x" * 101)
+    assert response.status_code == 413
+    assert response.headers["connection"] == "close"
+
+
+def test_the_middleware_aborts_an_oversized_chunked_body(limited_client):
+    def body():
+        for _ in range(10):
+            yield b"x" * 50
+
+    response = limited_client.post("/echo", content=body())
+    assert response.status_code == 413
+
+
+def test_the_middleware_passes_bodies_within_the_limit(limited_client):
+    response = limited_client.post("/echo", content=b"x" * 100)
+    assert response.status_code == 200
+    assert response.json() == {"size": 100}
+
+
+def sse_events(body: str):
+    """Parse an SSE body into (event name, data) pairs, checking the framing"""
+    assert body.endswith("\n\n")
+    events = []
+    for block in body[:-2].split("\n\n"):
+        event_line, data_line = block.split("\n")
+        assert event_line.startswith("event: ") and data_line.startswith("data: ")
+        events.append((event_line[len("event: "):], json.loads(data_line[len("data: "):])))
+    return events
+
+
+def test_sse_stream_sends_one_event_per_segment_then_a_summary(client):
+    response = client.post("/transcribe?stream=sse", files=upload(1024))
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.headers["cache-control"] == "no-cache"
+    events = sse_events(response.text)
+    assert [name for name, _ in events] == ["segment", "segment", "segment", "summary"]
+    assert all(name == data["type"] for name, data in events)
+    assert [data["text"] for _, data in events[:3]] == ["w0", "w1", "w2"]
+    assert events[-1][1]["segments"] == 3
+    assert events[-1][1]["detected_language"] == "en"
+
+
+def test_ndjson_stream_sends_one_json_object_per_line(client):
+    response = client.post("/transcribe?stream=ndjson", files=upload(1024))
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert response.text.endswith("\n")
+    events = [json.loads(line) for line in response.text.splitlines()]
+    assert [event["type"] for event in events] == ["segment", "segment", "segment", "summary"]
+    assert [(event["start"], event["end"]) for event in events[:3]] == [(0, 1), (1, 2), (2, 3)]
+
+
+def test_a_failed_decode_ends_the_stream_with_an_error_event(client, monkeypatch):
+    def fail(*args, **kwargs):
+        raise RuntimeError("decoder exploded")
+
+    monkeypatch.setattr(whisper_api, "transcribe_audio_file", fail)
+    response = client.post("/transcribe?stream=ndjson", files=upload(1024))
+    assert response.status_code == 200
+    events = [json.loads(line) for line in response.text.splitlines()]
+    assert events == [{"type": "error", "detail": "Transcription failed: decoder exploded"}]
+
+
+def test_an_unknown_stream_format_is_rejected(client):
+    response = client.post("/transcribe?stream=xml", files=upload(1024))
+    assert response.status_code == 400
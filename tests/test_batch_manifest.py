@@ -0,0 +1,96 @@
+import wave
+
+import batch_runner
+import stt_utils
+from batch_runner import BatchManifest, transcribe_batch
+from conftest import FakeModel
+
+
+def write_wav(path, seconds: float = 1.0):
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(16000)
+        f.writeframes(b"\0\0" * int(16000 * seconds))
+    return str(path)
+
+
+def test_states_survive_reopening(tmp_path):
+    path = tmp_path / "manifest.jsonl"
+    manifest = BatchManifest(path)
+    manifest.record("a", BatchManifest.QUEUED)
+    manifest.record("a", BatchManifest.DOWNLOADED)
+    manifest.record("b", BatchManifest.FAILED, stage="download", error="HTTP 403")
+    manifest.close()
+
+    reopened = BatchManifest(path)
+    assert reopened.state("a") == BatchManifest.DOWNLOADED
+    assert reopened.entry("b")["error"] == "HTTP 403"
+    assert reopened.counts() == {"downloaded": 1, "failed": 1}
+    reopened.close()
+
+
+def test_a_torn_last_line_is_skipped(tmp_path):
+    path = tmp_path / "manifest.jsonl"
+    manifest = BatchManifest(path)
+    manifest.record("a", BatchManifest.TRANSCRIBED)
+    manifest.close()
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"source": "b", "state": "wri')  # Power lost mid-write
+
+    reopened = BatchManifest(path)
+    assert reopened.state("a") == BatchManifest.TRANSCRIBED
+    assert reopened.state("b") is None
+    reopened.record("b", BatchManifest.QUEUED)
+    reopened.close()
+    assert BatchManifest(path).state("b") == BatchManifest.QUEUED
+
+
+def test_pending_keeps_only_sources_without_a_transcript(tmp_path):
+    manifest = BatchManifest(tmp_path / "manifest.jsonl")
+    written = tmp_path / "a_transcript.txt"
+    written.write_text("done", encoding="utf-8")
+    manifest.record("a", BatchManifest.WRITTEN, output_file=str(written))
+    manifest.record("b", BatchManifest.WRITTEN, output_file=str(tmp_path / "deleted.txt"))
+    manifest.record("c", BatchManifest.TRANSCRIBED)
+    manifest.record("d", BatchManifest.FAILED, stage="transcribe", error="boom")
+    assert manifest.pending(["a", "b", "c", "d", "e"]) == ["b", "c", "d", "e"]
+    assert manifest.completed() == {"a": str(written)}
+
+    manifest.record("d", BatchManifest.QUEUED)
+    assert "error" not in manifest.entry("d")  # A retry drops the old failure
+    manifest.close()
+
+
+def test_an_interrupted_batch_resumes_where_it_stopped(tmp_path, monkeypatch):
+    sources = [write_wav(tmp_path / f"{name}.wav") for name in ("a", "b", "c")]
+    output_dir = tmp_path / "out"
+    crashing = {"b.wav"}
+
+    class CrashingModel(FakeModel):
+        def transcribe(self, audio, **options):
+            if any(str(audio).endswith(name) for name in crashing):
+                raise RuntimeError("decoder crashed")
+            return super().transcribe(audio, **options)
+
+    registry = stt_utils.ModelRegistry(loader=lambda *args: CrashingModel())
+    monkeypatch.setattr(stt_utils, "_model_registry", registry)
+    monkeypatch.setattr(batch_runner, "get_transcript_index", lambda: None)
+
+    manifest = BatchManifest(output_dir / "batch_manifest.jsonl")
+    report = transcribe_batch(sources, output_dir, manifest=manifest)
+    manifest.close()
+    assert len(report.successful) == 2
+    assert len(report.failed) == 1
+
+    # A fresh process replays the manifest and only retries the failed source
+    crashing.clear()
+    manifest = BatchManifest(output_dir / "batch_manifest.jsonl")
+    pending = manifest.pending(sources)
+    assert pending == [sources[1]]
+    report = transcribe_batch(pending, output_dir, manifest=manifest)
+    assert len(report.successful) == 1
+    assert manifest.pending(sources) == []
+    assert sorted(path.name for path in output_dir.glob("*_transcript.txt")) == [
+        "a_transcript.txt", "b_transcript.txt", "c_transcript.txt"]
+    manifest.close()
@@ -0,0 +1,104 @@
+import numpy as np
+import pytest
+
+from conftest import FakeSegment
+from stt_utils import find_silence_cuts, stitch_chunk_segments, transcribe_audio_chunked
+
+RATE = 16000
+
+
+def speech_with_pauses(speech_seconds, pause_seconds: float = 0.5, seed: int = 0):
+    """Noise bursts of the given lengths, each followed by a silent pause"""
+    rng = np.random.default_rng(seed)
+    parts = []
+    for seconds in speech_seconds:
+        parts.append(rng.normal(0, 0.2, int(seconds * RATE)))
+        parts.append(np.zeros(int(pause_seconds * RATE)))
+    return np.concatenate(parts).astype(np.float32)
+
+
+def chunk_lengths(cuts, total_seconds):
+    bounds = [0.0] + cuts + [total_seconds]
+    return [end - start for start, end in zip(bounds, bounds[1:])]
+
+
+def test_audio_that_fits_in_one_chunk_is_not_cut():
+    assert find_silence_cuts(np.zeros(10 * RATE, dtype=np.float32), RATE, 3, 10) == []
+
+
+def test_cuts_land_in_pauses():
+    samples = speech_with_pauses([4.5] * 8)  # A pause every 5 s, 40 s in total
+    cuts = find_silence_cuts(samples, RATE, 3, 8)
+    assert cuts
+    for cut in cuts:
+        assert 4.5 <= cut % 5 <= 5.0 or cut % 5 == 0
+
+
+def test_every_chunk_stays_within_the_limits():
+    samples = speech_with_pauses([2.7, 3.9, 1.4, 5.2, 2.2, 4.4, 3.3, 2.8, 4.1, 1.9], seed=3)
+    total = len(samples) / RATE
+    lengths = chunk_lengths(find_silence_cuts(samples, RATE, 4, 9), total)
+    assert min(lengths) >= 4 - 0.02
+    assert max(lengths) <= 9 + 0.02
+
+
+def test_the_last_chunk_is_never_shorter_than_the_minimum():
+    # 21 s with min 6 / max 10: a greedy cut at 10 s and 20 s would leave a 1 s tail
+    samples = np.zeros(21 * RATE, dtype=np.float32)
+    lengths = chunk_lengths(find_silence_cuts(samples, RATE, 6, 10), 21.0)
+    assert lengths[-1] >= 6 - 0.02
+    assert sum(lengths) == pytest.approx(21.0)
+
+
+def test_a_remainder_that_cannot_be_split_is_merged():
+    # 13 s with min 8 / max 10: no cut leaves both chunks at least 8 s long
+    assert find_silence_cuts(np.zeros(13 * RATE, dtype=np.float32), RATE, 8, 10) == []
+
+
+@pytest.mark.parametrize("minimum, maximum", [(0, 10), (10, 10), (12, 10), (-1, 5)])
+def test_inconsistent_chunk_lengths_are_rejected(minimum, maximum):
+    with pytest.raises(ValueError):
+        find_silence_cuts(np.zeros(RATE, dtype=np.float32), RATE, minimum, maximum)
+
+
+def test_stitching_keeps_each_segment_once():
+    # Two chunks owning [0, 10) and [10, 20), each padded by 1 s of overlap
+    first = [FakeSegment(1, 0.0, 4.0, " a", 0), FakeSegment(2, 8.5, 10.8, " seam", 0)]
+    second = [FakeSegment(1, 0.0, 1.8, " seam", 0), FakeSegment(2, 2.0, 6.0, " b", 0)]
+    stitched = stitch_chunk_segments([(0.0, 0.0, 10.0, first), (9.0, 10.0, 20.0, second)])
+    assert [segment.text for segment in stitched] == [" a", " seam", " b"]
+    assert [segment.id for segment in stitched] == [1, 2, 3]
+    assert stitched[1].start == pytest.approx(8.5)
+    assert stitched[2].start == pytest.approx(11.0)
+
+
+def test_a_segment_on_the_owned_boundary_belongs_to_the_later_chunk():
+    first = [FakeSegment(1, 9.0, 11.0, " edge", 0)]  # Midpoint exactly 10.0
+    second = [FakeSegment(1, 0.0, 2.0, " edge", 0)]
+    stitched = stitch_chunk_segments([(0.0, 0.0, 10.0, first), (9.0, 10.0, 20.0, second)])
+    assert [(segment.start, segment.end) for segment in stitched] == [(9.0, 11.0)]
+
+
+def test_stitched_timestamps_are_monotonic():
+    first = [FakeSegment(1, 0.0, 6.0, " a", 0)]
+    second = [FakeSegment(1, 0.5, 3.0, " b", 0)]  # Starts at 5.5, before the previous end
+    stitched = stitch_chunk_segments([(0.0, 0.0, 5.0, first), (5.0, 5.0, 10.0, second)])
+    assert stitched[1].start == stitched[0].end == 6.0
+    assert stitched[1].end >= stitched[1].start
+
+
+def test_the_last_chunk_keeps_segments_past_its_owned_end():
+    last = [FakeSegment(1, 9.0, 12.0, " tail", 0)]
+    stitched = stitch_chunk_segments([(0.0, 0.0, 10.0, last)])
+    assert [segment.text for segment in stitched] == [" tail"]
+
+
+def test_chunked_transcription_puts_segments_on_one_timeline(fake_registry):
+    samples = speech_with_pauses([4.5] * 6)
+    segments, info = transcribe_audio_chunked(samples, min_chunk_seconds=5, max_chunk_seconds=12,
+                                              overlap_seconds=0.5, workers=2)
+    starts = [segment.start for segment in segments]
+    assert starts == sorted(starts)
+    assert info.duration == pytest.approx(30.0)
+    assert info.language == "en"
+    assert segments[-1].end <= 30.0 + 0.5
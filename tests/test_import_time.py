@@ -0,0 +1,15 @@
+"""Start-up budgets: every module imports quickly and leaves heavy packages until first use"""
+
+import importlib.util
+
+import pytest
+
+from bench_import_time import DEFAULT_BUDGETS_MS, check_module
+
+
+@pytest.mark.parametrize("module", list(DEFAULT_BUDGETS_MS))
+def test_import_stays_within_budget(module):
+    if module == "whisper_api" and importlib.util.find_spec("fastapi") is None:
+        pytest.skip("fastapi is not installed (requirements-api.txt)")
+    result = check_module(module, DEFAULT_BUDGETS_MS[module], repeat=3, top=3)
+    assert result["passed"], f"{'; '.join(result['failures'])} (runs: {result['runs_ms']} ms)"
@@ -0,0 +1,108 @@
+import math
+
+import pytest
+
+from metrics import MetricsRegistry, resident_memory_bytes
+
+
+def test_counter_renders_help_type_and_labelled_samples():
+    registry = MetricsRegistry()
+    requests = registry.counter("whisper_requests_total", "Requests served", ["endpoint"])
+    requests.inc(endpoint="/transcribe")
+    requests.inc(2, endpoint="/transcribe")
+    requests.inc(endpoint="/health")
+    assert registry.render() == (
+        "# HELP whisper_requests_total Requests served\n"
+        "# TYPE whisper_requests_total counter\n"
+        'whisper_requests_total{endpoint="/health"} 1\n'
+        'whisper_requests_total{endpoint="/transcribe"} 3\n'
+    )
+
+
+def test_counter_rejects_negative_increments_and_wrong_labels():
+    counter = MetricsRegistry().counter("c", "doc", ["a"])
+    with pytest.raises(ValueError):
+        counter.inc(-1, a="x")
+    with pytest.raises(ValueError):
+        counter.inc(b="x")
+
+
+def test_gauge_goes_up_and_down_and_formats_floats():
+    registry = MetricsRegistry()
+    gauge = registry.gauge("in_flight", "Requests in flight")
+    gauge.inc()
+    gauge.inc()
+    gauge.dec()
+    assert registry.render().splitlines()[-1] == "in_flight 1"
+    gauge.set(0.25)
+    assert registry.render().splitlines()[-1] == "in_flight 0.25"
+
+
+def test_special_values_use_prometheus_spelling():
+    registry = MetricsRegistry()
+    gauge = registry.gauge("g", "doc", ["k"])
+    gauge.set(math.nan, k="nan")
+    gauge.set(math.inf, k="pos")
+    gauge.set(-math.inf, k="neg")
+    lines = registry.render().splitlines()
+    assert 'g{k="nan"} NaN' in lines
+    assert 'g{k="pos"} +Inf' in lines
+    assert 'g{k="neg"} -Inf' in lines
+
+
+def test_label_values_and_help_text_are_escaped():
+    registry = MetricsRegistry()
+    gauge = registry.gauge("g", 'Back\\slash and\nnewline', ["path"])
+    gauge.set(1, path='C:\\audio\\"quoted"\nname')
+    lines = registry.render().splitlines()
+    assert lines[0] == "# HELP g Back\\\\slash and\\nnewline"
+    assert lines[2] == 'g{path="C:\\\\audio\\\\\\"quoted\\"\\nname"} 1'
+
+
+def test_histogram_buckets_are_cumulative_with_sum_and_count():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("latency_seconds", "Latency", ["model"], buckets=(1, 0.5))
+    for value in (0.2, 0.7, 3):
+        histogram.observe(value, model="base")
+    assert registry.render().splitlines()[2:] == [
+        'latency_seconds_bucket{model="base",le="0.5"} 1',
+        'latency_seconds_bucket{model="base",le="1"} 2',
+        'latency_seconds_bucket{model="base",le="+Inf"} 3',
+        'latency_seconds_sum{model="base"} 3.9',
+        'latency_seconds_count{model="base"} 3',
+    ]
+
+
+def test_function_metrics_are_read_at_scrape_time():
+    registry = MetricsRegistry()
+    depth = {"value": 2}
+    registry.gauge("queue_depth", "Queued jobs", function=lambda: depth["value"])
+    registry.gauge("loaded", "Loaded models", ["model", "device"],
+                   function=lambda: {("base", "cpu"): 1, ("small", "cpu"): None})
+    registry.gauge("absent", "No sample", function=lambda: None)
+    first = registry.render()
+    depth["value"] = 5
+    second = registry.render().splitlines()
+    assert "queue_depth 2" in first
+    assert "queue_depth 5" in second
+    assert 'loaded{model="base",device="cpu"} 1' in second
+    assert not any(line.startswith("loaded{model=\"small\"") for line in second)
+    assert second[-2:] == ["# HELP absent No sample", "# TYPE absent gauge"]
+
+
+def test_a_failing_collector_does_not_break_the_scrape():
+    registry = MetricsRegistry()
+    registry.gauge("broken", "Raises", function=lambda: 1 / 0)
+    registry.counter("ok_total", "Fine").inc()
+    assert registry.render() == "# HELP ok_total Fine\n# TYPE ok_total counter\nok_total 1\n"
+
+
+def test_duplicate_names_are_rejected():
+    registry = MetricsRegistry()
+    registry.counter("c", "doc")
+    with pytest.raises(ValueError):
+        registry.gauge("c", "doc")
+
+
+def test_resident_memory_is_reported():
+    assert resident_memory_bytes() > 0
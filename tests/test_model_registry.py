@@ -0,0 +1,101 @@
+import threading
+
+import pytest
+
+from stt_utils import ModelRegistry
+
+
+def test_reuses_a_loaded_model(fake_loader):
+    registry = ModelRegistry(loader=fake_loader)
+    first, key = registry.acquire("base")
+    registry.release(key)
+    second, _ = registry.acquire("base")
+    assert first is second
+    assert len(fake_loader.loaded) == 1
+    assert (registry.hits, registry.misses) == (1, 1)
+
+
+def test_distinct_settings_load_distinct_models(fake_loader):
+    registry = ModelRegistry(max_models=4, loader=fake_loader)
+    keys = [registry.acquire("base", compute_type=compute_type)[1] for compute_type in ("int8", "float32")]
+    assert keys[0] != keys[1]
+    assert len(fake_loader.loaded) == 2
+
+
+def test_evicts_the_least_recently_used_idle_model(fake_loader):
+    registry = ModelRegistry(max_models=2, loader=fake_loader)
+    for name in ("tiny", "base"):
+        registry.release(registry.acquire(name)[1])
+    registry.release(registry.acquire("tiny")[1])  # base is now least recently used
+    registry.release(registry.acquire("small")[1])
+    assert [model["model_name"] for model in registry.stats()["models"]] == ["tiny", "small"]
+    assert registry.evictions == 1
+
+
+def test_a_leased_model_is_never_evicted(fake_loader):
+    registry = ModelRegistry(max_models=1, loader=fake_loader)
+    _, tiny = registry.acquire("tiny")
+    _, base = registry.acquire("base")
+    # Both are leased, so the cache runs over its limit instead of evicting
+    assert len(registry.stats()["models"]) == 2
+    registry.release(tiny)
+    assert [model["model_name"] for model in registry.stats()["models"]] == ["base"]
+    registry.release(base)
+
+
+def test_refcounts_track_every_lease(fake_loader):
+    registry = ModelRegistry(max_models=1, loader=fake_loader)
+    _, key = registry.acquire("base")
+    registry.acquire("base")
+    assert registry.stats()["models"][0]["in_use"] == 2
+    registry.release(key)
+    registry.release(key)
+    registry.release(key)  # An extra release is ignored
+    assert registry.stats()["models"][0]["in_use"] == 0
+    registry.release(registry.acquire("tiny")[1])
+    assert [model["model_name"] for model in registry.stats()["models"]] == ["tiny"]
+
+
+def test_memory_budget_evicts_idle_models(fake_loader):
+    registry = ModelRegistry(max_models=10, max_memory_mb=1, loader=fake_loader)
+    registry.release(registry.acquire("tiny")[1])
+    registry.release(registry.acquire("base")[1])
+    assert registry.stats()["models"] == []
+    assert registry.evictions == 2
+
+
+def test_concurrent_misses_load_once(fake_loader):
+    gate = threading.Event()
+
+    def slow_loader(*args):
+        gate.wait(5)
+        return fake_loader(*args)
+
+    registry = ModelRegistry(loader=slow_loader)
+    models = []
+    threads = [threading.Thread(target=lambda: models.append(registry.acquire("base")[0])) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    gate.set()
+    for thread in threads:
+        thread.join()
+    assert len(fake_loader.loaded) == 1
+    assert len(set(map(id, models))) == 1
+    assert registry.stats()["models"][0]["in_use"] == 4
+
+
+def test_a_failed_load_is_not_cached(fake_loader):
+    attempts = []
+
+    def flaky_loader(*args):
+        attempts.append(args)
+        if len(attempts) == 1:
+            raise RuntimeError("out of memory")
+        return fake_loader(*args)
+
+    registry = ModelRegistry(loader=flaky_loader)
+    with pytest.raises(RuntimeError):
+        registry.acquire("base")
+    model, _ = registry.acquire("base")
+    assert model is not None
+    assert registry.misses == 2
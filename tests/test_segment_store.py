@@ -0,0 +1,91 @@
+import threading
+
+import pytest
+
+from stt_utils import SegmentStore, StoredSegment, TranscriptionResult
+from conftest import FakeInfo, FakeSegment
+
+
+def make_segments(count: int):
+    return (FakeSegment(index, float(index), index + 1.0, f" w{index}", -0.5) for index in range(count))
+
+
+def failing_segments(good: int):
+    yield from make_segments(good)
+    raise RuntimeError("decoder crashed")
+
+
+def test_iterates_again_from_the_first_segment():
+    store = SegmentStore(make_segments(5))
+    assert [segment.text for segment in store] == [" w0", " w1", " w2", " w3", " w4"]
+    assert [segment.id for segment in store] == [0, 1, 2, 3, 4]
+    assert store.text == "w0 w1 w2 w3 w4"
+    assert store.complete
+
+
+def test_consumes_the_source_lazily():
+    store = SegmentStore(make_segments(10))
+    assert store[2].text == " w2"
+    assert not store.complete
+    assert len(store) == 10
+    assert store.complete
+
+
+def test_rows_keep_timings_and_log_probabilities():
+    store = SegmentStore(make_segments(2))
+    assert store[1] == StoredSegment(1, 1.0, 2.0, " w1", -0.5)
+    assert store[-1].id == 1
+    with pytest.raises(IndexError):
+        store[2]
+
+
+def test_every_slice_is_a_segment_store():
+    store = SegmentStore(make_segments(6))
+    for index in (slice(1, 4), slice(None, None, 2), slice(None, None, -1), slice(4, 4)):
+        sliced = store[index]
+        assert isinstance(sliced, SegmentStore)
+        assert sliced.complete
+        assert [segment.id for segment in sliced] == list(range(6))[index]
+    assert store[1:3].text == "w1 w2"
+
+
+def test_between_returns_overlapping_segments():
+    store = SegmentStore(make_segments(10))
+    assert [segment.id for segment in store.between(2.5, 5.0)] == [2, 3, 4]
+    assert [segment.id for segment in store.between(8.0)] == [8, 9]
+    assert len(store.between(20.0)) == 0
+
+
+def test_a_decode_error_is_kept_and_raised_again():
+    store = SegmentStore(failing_segments(3))
+    with pytest.raises(RuntimeError, match="decoder crashed"):
+        list(store)
+    assert not store.complete
+    # Segments stored before the failure stay readable; reading past them fails again
+    assert store[1].text == " w1"
+    with pytest.raises(RuntimeError, match="decoder crashed"):
+        list(store)
+    with pytest.raises(RuntimeError, match="decoder crashed"):
+        len(store)
+
+
+def test_concurrent_readers_see_the_same_segments():
+    store = SegmentStore(make_segments(200))
+    results = []
+
+    def read():
+        results.append([segment.id for segment in store])
+
+    threads = [threading.Thread(target=read) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [list(range(200))] * 4
+
+
+def test_transcription_result_wraps_segments_in_a_store():
+    result = TranscriptionResult(make_segments(3), FakeInfo("en", 0.9, 3.0, None), "Title", "url", "base")
+    assert isinstance(result.segments, SegmentStore)
+    assert result.segments.text == "w0 w1 w2"
+    assert result.speech_ratio == 1.0
@@ -0,0 +1,59 @@
+from batch_runner import source_transcript_name, transcript_names
+
+
+def test_unique_stems_keep_their_names(tmp_path):
+    sources = [str(tmp_path / "intro.wav"), str(tmp_path / "outro.mp3")]
+    assert transcript_names(sources) == {sources[0]: "intro", sources[1]: "outro"}
+
+
+def test_same_stem_in_different_directories_gets_the_directory(tmp_path):
+    sources = [str(tmp_path / "a" / "intro.wav"), str(tmp_path / "b" / "intro.wav")]
+    assert transcript_names(sources) == {sources[0]: "a_intro", sources[1]: "b_intro"}
+
+
+def test_nested_directories_use_only_the_differing_part(tmp_path):
+    sources = [str(tmp_path / "talks" / "2023" / "day1" / "intro.wav"),
+               str(tmp_path / "talks" / "2024" / "intro.wav")]
+    assert transcript_names(sources) == {sources[0]: "2023_day1_intro", sources[1]: "2024_intro"}
+
+
+def test_same_stem_in_one_directory_gets_the_extension(tmp_path):
+    sources = [str(tmp_path / "intro.wav"), str(tmp_path / "intro.mp3")]
+    assert transcript_names(sources) == {sources[0]: "intro_wav", sources[1]: "intro_mp3"}
+
+
+def test_stems_differing_only_in_case_collide(tmp_path):
+    sources = [str(tmp_path / "a" / "Intro.wav"), str(tmp_path / "b" / "intro.wav")]
+    names = transcript_names(sources)
+    assert len({name.lower() for name in names.values()}) == 2
+
+
+def test_a_derived_name_never_takes_an_existing_one(tmp_path):
+    # "a_intro" is both a real stem and the label derived for a/intro.wav
+    sources = [str(tmp_path / "a_intro.wav"), str(tmp_path / "a" / "intro.wav"),
+               str(tmp_path / "b" / "intro.wav")]
+    names = transcript_names(sources)
+    assert len({name.lower() for name in names.values()}) == 3
+    assert names[sources[0]] == "a_intro"
+    assert names[sources[1]] == "a_intro_2"
+
+
+def test_the_same_file_listed_twice_shares_one_name(tmp_path):
+    path = tmp_path / "intro.wav"
+    sources = [str(path), str(tmp_path / "x" / ".." / "intro.wav")]
+    names = transcript_names(sources)
+    assert names[sources[0]] == names[sources[1]] == "intro"
+
+
+def test_urls_are_named_by_title_and_video_id(tmp_path):
+    url = "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+    assert transcript_names([url, str(tmp_path / "intro.wav")]).keys() == {str(tmp_path / "intro.wav")}
+    assert source_transcript_name(url, "Same Title") == "Same Title_dQw4w9WgXcQ"
+    other = source_transcript_name("https://www.youtube.com/watch?v=aaaaaaaaaaa", "Same Title")
+    assert other != source_transcript_name(url, "Same Title")
+
+
+def test_local_sources_fall_back_to_their_stem(tmp_path):
+    source = str(tmp_path / "a" / "intro.wav")
+    assert source_transcript_name(source, "ignored") == "intro"
+    assert source_transcript_name(source, "ignored", {source: "a_intro"}) == "a_intro"
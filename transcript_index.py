@@ -0,0 +1,325 @@
+"""
+Full-text search over transcripts.
+
+Segments are stored with their timings in a local SQLite database and
+indexed with FTS5, so a phrase can be found across a large transcript
+corpus and each hit links to the moment it is spoken. Transcripts are
+added as they are produced (``add_result``) or backfilled from the
+``*_transcript.txt`` / ``*_transcript.json`` files already on disk.
+"""
+
+import json
+import os
+import re
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional, Dict, Any, Callable, List, Iterable, Tuple
+
+from stt_utils import extract_youtube_video_id
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transcripts (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL UNIQUE,
+    video_id TEXT,
+    title TEXT,
+    model TEXT,
+    language TEXT,
+    duration REAL,
+    transcript_file TEXT,
+    file_mtime REAL,
+    indexed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS transcripts_file ON transcripts (transcript_file);
+CREATE TABLE IF NOT EXISTS segments (
+    id INTEGER PRIMARY KEY,
+    transcript_id INTEGER NOT NULL,
+    start_ms INTEGER NOT NULL,
+    end_ms INTEGER NOT NULL,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS segments_transcript ON segments (transcript_id, start_ms);
+CREATE VIRTUAL TABLE IF NOT EXISTS segments_fts USING fts5(
+    text, content='segments', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS segments_insert AFTER INSERT ON segments BEGIN
+    INSERT INTO segments_fts (rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS segments_delete AFTER DELETE ON segments BEGIN
+    INSERT INTO segments_fts (segments_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+"""
+
+# "[MM:SS - MM:SS] text" or "[HH:MM:SS - HH:MM:SS] text" lines of a timestamped text transcript
+TIMESTAMPED_LINE = re.compile(r"^\[(\d+(?::\d{2}){1,2}) - (\d+(?::\d{2}){1,2})\] ?(.*)$")
+HEADER_FIELDS = {
+    "Transcript for:": "title",
+    "YouTube URL:": "source",
+    "Generated with faster-whisper model:": "model",
+    "Generated with Whisper model:": "model",
+    "Detected language:": "language",
+    "Language:": "language",
+}
+
+
+def _clock_to_ms(clock: str) -> int:
+    seconds = 0
+    for part in clock.split(":"):
+        seconds = seconds * 60 + int(part)
+    return seconds * 1000
+
+
+def read_transcript_file(path: Path) -> Tuple[Dict[str, Any], List[Tuple[int, int, str]]]:
+    """
+    Read a transcript written by this project back into metadata and segments
+    
+    Handles the JSON format and both text layouts; a text transcript without
+    timestamps becomes a single segment starting at 0.
+    
+    Returns:
+        Tuple of (metadata with title/source/model/language/duration,
+        list of (start_ms, end_ms, text))
+    """
+    path = Path(path)
+    if path.suffix == ".json":
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        segments = [(round(s["start"] * 1000), round(s["end"] * 1000), s["text"])
+                    for s in data.get("segments", [])]
+        metadata = {key: data.get(key) for key in ("title", "source", "model", "language", "duration")}
+        return metadata, segments
+    
+    metadata: Dict[str, Any] = {}
+    segments = []
+    plain = []
+    in_body = False
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if not in_body:
+                stripped = line.strip()
+                if stripped and set(stripped) <= {"=", "-"}:
+                    in_body = True  # Separator line between the header and the transcript
+                    continue
+                for prefix, key in HEADER_FIELDS.items():
+                    if line.startswith(prefix):
+                        value = line[len(prefix):].strip()
+                        metadata[key] = value.split(" (probability")[0] if key == "language" else value
+                continue
+            if line in ("TRANSCRIPT:", "TRANSCRIPT WITH TIMESTAMPS:"):
+                continue
+            match = TIMESTAMPED_LINE.match(line)
+            if match:
+                text = match.group(3).strip()
+                if text:
+                    segments.append((_clock_to_ms(match.group(1)), _clock_to_ms(match.group(2)), text))
+            elif line.strip():
+                plain.append(line.strip())
+    if plain and not segments:
+        segments.append((0, 0, " ".join(plain)))
+    return metadata, segments
+
+
+def find_transcript_files(paths: Iterable[Path]) -> List[Path]:
+    """
+    Transcript files under the given files and directories
+    
+    Where both a JSON and a text transcript exist for the same name, only
+    the JSON one (with exact timings) is returned.
+    """
+    found = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            found.extend(sorted(path.rglob("*_transcript.json")))
+            found.extend(sorted(p for p in path.rglob("*_transcript.txt")
+                                if not p.with_suffix(".json").exists()))
+        elif path.is_file():
+            found.append(path)
+    return found
+
+
+def youtube_link(video_id: Optional[str], start_ms: int) -> Optional[str]:
+    """Deep link that starts playback at a hit (YouTube seeks in whole seconds)"""
+    if not video_id:
+        return None
+    return f"https://www.youtube.com/watch?v={video_id}&t={start_ms // 1000}s"
+
+
+class TranscriptIndex:
+    """SQLite FTS5 index of transcript segments with their timings"""
+    
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connection() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            try:
+                conn.executescript(SCHEMA)
+            except sqlite3.OperationalError as e:
+                raise RuntimeError(f"SQLite {sqlite3.sqlite_version} lacks FTS5 support: {e}")
+    
+    @contextmanager
+    def _connection(self):
+        # A fresh autocommit connection per operation keeps the index safe to share between threads
+        conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA synchronous=NORMAL")
+        try:
+            yield conn
+        finally:
+            conn.close()
+    
+    @contextmanager
+    def _transaction(self, conn):
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+    
+    def _replace(self, conn, metadata: Dict[str, Any], segments: Iterable[Tuple[int, int, str]],
+                 transcript_file: Optional[Path] = None, file_mtime: Optional[float] = None) -> int:
+        """Insert a transcript, replacing any earlier version from the same source"""
+        source = metadata.get("source") or str(transcript_file)
+        row = conn.execute("SELECT id FROM transcripts WHERE source = ?", (source,)).fetchone()
+        if row is not None:
+            conn.execute("DELETE FROM segments WHERE transcript_id = ?", (row["id"],))
+            conn.execute("DELETE FROM transcripts WHERE id = ?", (row["id"],))
+        cursor = conn.execute(
+            "INSERT INTO transcripts (source, video_id, title, model, language, duration, "
+            "transcript_file, file_mtime, indexed_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (source, extract_youtube_video_id(source), metadata.get("title"), metadata.get("model"),
+             metadata.get("language"), metadata.get("duration"),
+             str(transcript_file) if transcript_file else None, file_mtime, time.time())
+        )
+        transcript_id = cursor.lastrowid
+        conn.executemany(
+            "INSERT INTO segments (transcript_id, start_ms, end_ms, text) VALUES (?, ?, ?, ?)",
+            ((transcript_id, start_ms, end_ms, text) for start_ms, end_ms, text in segments)
+        )
+        return transcript_id
+    
+    def add_result(self, result, transcript_file: Optional[Path] = None) -> int:
+        """
+        Index a TranscriptionResult (its segments are read once more, not decoded again)
+        
+        Returns:
+            The transcript's id in the index
+        """
+        metadata = {
+            "title": result.video_title,
+            "source": result.url,
+            "model": result.model_name,
+            "language": result.detected_language,
+            "duration": result.audio_duration,
+        }
+        segments = [(round(s.start * 1000), round(s.end * 1000), s.text.strip())
+                    for s in result.segments if s.text.strip()]
+        mtime = os.path.getmtime(transcript_file) if transcript_file and Path(transcript_file).exists() else None
+        with self._connection() as conn, self._transaction(conn):
+            return self._replace(conn, metadata, segments, transcript_file, mtime)
+    
+    def add_files(self, paths: Iterable[Path], batch_size: int = 200,
+                  progress_callback: Optional[Callable[[str], None]] = None) -> Dict[str, int]:
+        """
+        Index transcript files, skipping those unchanged since they were last indexed
+        
+        Files are committed in batches of ``batch_size`` so a large backfill
+        can be interrupted and rerun without starting over.
+        
+        Returns:
+            Counts of indexed, unchanged and failed files
+        """
+        counts = {"indexed": 0, "unchanged": 0, "failed": 0}
+        files = find_transcript_files(paths)
+        with self._connection() as conn:
+            known = {row["transcript_file"]: row["file_mtime"] for row in
+                     conn.execute("SELECT transcript_file, file_mtime FROM transcripts "
+                                  "WHERE transcript_file IS NOT NULL")}
+            for start in range(0, len(files), batch_size):
+                with self._transaction(conn):
+                    for path in files[start:start + batch_size]:
+                        try:
+                            mtime = path.stat().st_mtime
+                            if known.get(str(path)) == mtime:
+                                counts["unchanged"] += 1
+                                continue
+                            metadata, segments = read_transcript_file(path)
+                            self._replace(conn, metadata, segments, path, mtime)
+                            counts["indexed"] += 1
+                        except (OSError, ValueError, KeyError, TypeError) as e:
+                            counts["failed"] += 1
+                            if progress_callback:
+                                progress_callback(f"✗ {path}: {e}")
+                if progress_callback:
+                    progress_callback(f"{min(start + batch_size, len(files))}/{len(files)} files")
+        return counts
+    
+    def remove(self, source: str) -> bool:
+        with self._connection() as conn, self._transaction(conn):
+            row = conn.execute("SELECT id FROM transcripts WHERE source = ?", (source,)).fetchone()
+            if row is None:
+                return False
+            conn.execute("DELETE FROM segments WHERE transcript_id = ?", (row["id"],))
+            conn.execute("DELETE FROM transcripts WHERE id = ?", (row["id"],))
+        return True
+    
+    def search(self, query: str, limit: int = 20, offset: int = 0, source: Optional[str] = None,
+               raw: bool = False) -> List[Dict[str, Any]]:
+        """
+        Ranked segments matching a query (best BM25 score first)
+        
+        By default every word must occur (in any order); with ``raw`` the
+        query is passed to FTS5 as is, allowing "exact phrases", OR, NEAR()
+        and prefix* terms.
+        
+        Raises:
+            ValueError: If a raw query is not valid FTS5 syntax
+        """
+        match = query if raw else " ".join('"' + word.replace('"', '""') + '"' for word in query.split())
+        if not match:
+            return []
+        sql = ("SELECT s.start_ms, s.end_ms, s.text, "
+               "snippet(segments_fts, 0, '[', ']', '…', 16) AS snippet, bm25(segments_fts) AS score, "
+               "t.source, t.video_id, t.title, t.language "
+               "FROM segments_fts JOIN segments s ON s.id = segments_fts.rowid "
+               "JOIN transcripts t ON t.id = s.transcript_id "
+               "WHERE segments_fts MATCH ?")
+        params: List[Any] = [match]
+        if source:
+            sql += " AND t.source = ?"
+            params.append(source)
+        sql += " ORDER BY rank LIMIT ? OFFSET ?"
+        params += [limit, offset]
+        try:
+            with self._connection() as conn:
+                rows = conn.execute(sql, params).fetchall()
+        except sqlite3.OperationalError as e:
+            raise ValueError(f"Invalid search query: {e}")
+        hits = []
+        for row in rows:
+            hit = dict(row)
+            hit["score"] = -hit["score"]  # bm25() is lower-is-better
+            hit["link"] = youtube_link(hit["video_id"], hit["start_ms"])
+            hits.append(hit)
+        return hits
+    
+    def optimize(self) -> None:
+        """Merge the FTS5 index segments; worth running after a large backfill"""
+        with self._connection() as conn:
+            conn.execute("INSERT INTO segments_fts (segments_fts) VALUES ('optimize')")
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._connection() as conn:
+            transcripts = conn.execute("SELECT COUNT(*) FROM transcripts").fetchone()[0]
+            segments = conn.execute("SELECT COUNT(*) FROM segments").fetchone()[0]
+        return {
+            "transcripts": transcripts,
+            "segments": segments,
+            "db_bytes": self.db_path.stat().st_size if self.db_path.exists() else 0,
+        }
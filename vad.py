@@ -0,0 +1,109 @@
+"""
+Voice-activity detection for the transcription pipeline.
+
+The energy detector finds speech spans in 16 kHz samples with no extra
+model, and SpeechTimeline maps times in the speech-only audio that was
+decoded back onto the original recording. Silero VAD runs inside
+faster-whisper instead; both are configured by the WHISPER_VAD* settings.
+"""
+
+import bisect
+import os
+from typing import Optional, Tuple, Dict, Any, List
+
+
+# Voice-activity pre-filter: "off", "energy" (built-in, no extra model) or "silero" (faster-whisper)
+VAD_MODES = ("off", "energy", "silero")
+VAD_MODE = os.getenv("WHISPER_VAD", "off")
+VAD_MIN_SILENCE_MS = int(os.getenv("WHISPER_VAD_MIN_SILENCE_MS", "500"))
+VAD_SPEECH_PAD_MS = int(os.getenv("WHISPER_VAD_SPEECH_PAD_MS", "200"))
+
+
+def detect_speech_spans(samples, sampling_rate: int = 16000,
+                        min_silence_ms: int = VAD_MIN_SILENCE_MS,
+                        speech_pad_ms: int = VAD_SPEECH_PAD_MS,
+                        min_speech_ms: int = 250, frame_ms: int = 30,
+                        threshold_db: Optional[float] = None) -> List[Tuple[int, int]]:
+    """
+    Energy-based voice activity detection
+    
+    A frame counts as speech when its level is ``threshold_db`` dBFS or
+    louder; by default the threshold adapts to the recording as 12 dB above
+    its noise floor (10th percentile frame level), but never below -50 dBFS.
+    Pauses shorter than ``min_silence_ms`` are bridged, bursts shorter than
+    ``min_speech_ms`` are dropped and every span is padded by
+    ``speech_pad_ms`` on both sides.
+    
+    Args:
+        samples: Mono float32 samples
+        sampling_rate: Sample rate of ``samples``
+        min_silence_ms: Shortest pause that splits two speech spans
+        speech_pad_ms: Padding kept around each span
+        min_speech_ms: Shortest span worth keeping
+        frame_ms: Analysis frame length
+        threshold_db: Fixed speech threshold in dBFS (None = adaptive)
+        
+    Returns:
+        List of (start_sample, end_sample) spans in ascending order
+    """
+    import numpy as np
+    
+    frame = max(1, sampling_rate * frame_ms // 1000)
+    frame_count = len(samples) // frame
+    if frame_count == 0:
+        return []
+    
+    power = np.square(samples[:frame_count * frame].reshape(frame_count, frame)).mean(axis=1)
+    level_db = 10 * np.log10(power + 1e-10)
+    if threshold_db is None:
+        threshold_db = max(-50.0, float(np.percentile(level_db, 10)) + 12.0)
+    voiced = np.flatnonzero(level_db >= threshold_db)
+    if len(voiced) == 0:
+        return []
+    
+    # Group voiced frames into runs, bridging short pauses
+    max_gap = max(1, min_silence_ms // frame_ms)
+    breaks = np.flatnonzero(np.diff(voiced) > max_gap)
+    starts = np.concatenate(([voiced[0]], voiced[breaks + 1]))
+    ends = np.concatenate((voiced[breaks], [voiced[-1]])) + 1
+    
+    pad = speech_pad_ms * sampling_rate // 1000
+    spans = []
+    for start, end in zip(starts * frame, ends * frame):
+        if (end - start) * 1000 < min_speech_ms * sampling_rate:
+            continue
+        start = max(0, int(start) - pad)
+        end = min(len(samples), int(end) + pad)
+        if spans and start <= spans[-1][1]:
+            spans[-1] = (spans[-1][0], end)
+        else:
+            spans.append((start, end))
+    return spans
+
+
+class SpeechTimeline:
+    """Maps times in speech-only audio back to the original recording"""
+    
+    def __init__(self, spans: List[Tuple[int, int]], sampling_rate: int = 16000):
+        self._filtered_starts = []
+        self._original_starts = []
+        position = 0
+        for start, end in spans:
+            self._filtered_starts.append(position / sampling_rate)
+            self._original_starts.append(start / sampling_rate)
+            position += end - start
+        self.speech_seconds = position / sampling_rate
+    
+    def to_original(self, seconds: float, is_end: bool = False) -> float:
+        # An end time on a span boundary belongs to the span before it, not after the gap
+        find = bisect.bisect_left if is_end else bisect.bisect_right
+        index = max(0, find(self._filtered_starts, seconds) - 1)
+        return self._original_starts[index] + seconds - self._filtered_starts[index]
+
+
+def vad_cache_spec(vad: str, vad_parameters: Optional[Dict[str, Any]] = None) -> Optional[List[Any]]:
+    """Cache-key component describing the VAD settings (None when VAD is off)"""
+    if vad == "off":
+        return None
+    return [vad, vad_parameters or {"min_silence_duration_ms": VAD_MIN_SILENCE_MS,
+                                    "speech_pad_ms": VAD_SPEECH_PAD_MS}]
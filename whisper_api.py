@@ -4,22 +4,242 @@ Provides REST API endpoints for transcribing audio files.
 """
 
 import os
+import json
+import hashlib
+import asyncio
 import tempfile
+import threading
+import time
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Optional
-import uvicorn
-from fastapi import FastAPI, File, UploadFile, HTTPException, Header, Depends
+from typing import Optional, Tuple, List
+from fastapi import FastAPI, File, UploadFile, HTTPException, Header, Depends, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse, Response
 from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
 
-from stt_utils import transcribe_audio_file
+from job_store import JobStore, JobRunner, ACTIVE_STATUSES, QUEUED, CANCELLED
+from metrics import MetricsRegistry, CONTENT_TYPE as METRICS_CONTENT_TYPE, resident_memory_bytes
+from stt_utils import (
+    transcribe_audio_file,
+    get_model_registry,
+    InferenceExecutor,
+    ExecutorBusyError,
+    ExecutorStoppedError,
+    TranscriptCache,
+    get_transcript_cache,
+    get_transcript_index,
+    MicroBatcher,
+    BATCH_MAX_SIZE,
+    BATCH_MAX_CLIP_SECONDS,
+    load_audio_pcm,
+    probe_audio_duration,
+    Instrumentation,
+    StageEvent,
+)
+from streaming import StreamingTranscriber, OpusPacketDecoder, STREAM_MIN_CHUNK_SECONDS
+from vad import VAD_MODE, vad_cache_spec
+
+
+# Configuration
+WHISPER_API_KEY = os.getenv("WHISPER_API_KEY")
+SUPPORTED_FORMATS = {".mp3", ".wav", ".m4a", ".flac", ".ogg", ".wma", ".aac"}
+STREAM_FORMATS = {"sse": "text/event-stream", "ndjson": "application/x-ndjson"}
+LIVE_ENCODINGS = {"pcm_s16le", "pcm_f32le", "opus"}
+VALID_MODELS = ["tiny", "base", "small", "medium", "large"]
+MAX_FILE_SIZE = 100 * 1024 * 1024  # 100MB
+MAX_REQUEST_OVERHEAD = 64 * 1024  # Allowance for multipart headers and form fields
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1MB
+RETRY_AFTER_SECONDS = int(os.getenv("WHISPER_RETRY_AFTER", "5"))
+JOBS_DIR = Path(os.getenv("WHISPER_JOBS_DIR", "whisper_jobs"))
+JOB_WORKERS = int(os.getenv("WHISPER_JOB_WORKERS", "1"))
+
+# Inference runs on a dedicated worker pool so decoding never blocks the event loop;
+# models listed in WHISPER_PRELOAD are loaded and warmed up by every worker at startup
+executor = InferenceExecutor()
+
+# Short clips arriving together are decoded as one batch on the executor. The batched
+# decode has no VAD pre-filter, so with WHISPER_VAD set every upload is decoded on its own.
+micro_batcher = (MicroBatcher(dispatch=executor.submit)
+                 if BATCH_MAX_SIZE > 1 and VAD_MODE == "off" else None)
+
+
+def run_transcription_job(job, progress):
+    """
+    Job runner handler: transcribe a stored upload, saving partial results as it goes
+    
+    The decode runs on the inference executor, so jobs share its warm models
+    and concurrency limit with /transcribe; while its queue is full the job
+    waits for a worker to free a slot (and can still be cancelled) instead of
+    failing.
+    """
+    while True:
+        try:
+            future = executor.submit(lambda registry: transcribe_job_segments(job, progress, registry),
+                                     timeout=progress.flush_interval)
+            break
+        except ExecutorStoppedError:
+            raise
+        except ExecutorBusyError:
+            if progress.is_cancelled():
+                return
+    future.result()
+
+
+def transcribe_job_segments(job, progress, registry):
+    """Executor job for run_transcription_job"""
+    with instrumentation.stage("job", job["id"], model=job["model"]) as stage:
+        segments, info = transcribe_audio_file(Path(job["audio_path"]), model_name=job["model"],
+                                               cache=get_transcript_cache(), registry=registry)
+        language = {
+            "duration": info.duration,
+            "detected_language": info.language,
+            "language_probability": info.language_probability
+        }
+        
+        # Joined only when a progress write is due, not once per segment
+        pieces = []
+        transcript_text = lambda: " ".join(pieces)
+        percent = 0.0
+        progress.update(percent, "", force=True, **language)
+        for segment in segments:
+            text = segment.text.strip()
+            if text:
+                pieces.append(text)
+            if info.duration:
+                percent = min(100.0, segment.end / info.duration * 100)
+            if not progress.update(percent, transcript_text):
+                segments.close()
+                stage["cancelled"] = True
+                return
+        progress.update(100.0, transcript_text, force=True)
+        stage["audio_seconds"] = info.duration
+
+
+# Long transcriptions are queued in a persistent job store and drained by background workers;
+# both are created on first use so importing the API leaves no files behind
+_job_runner: Optional[JobRunner] = None
+_job_runner_lock = threading.Lock()
+
+
+def get_job_runner() -> JobRunner:
+    """Return the background job runner, opening its job store on first use"""
+    global _job_runner
+    with _job_runner_lock:
+        if _job_runner is None:
+            _job_runner = JobRunner(JobStore(JOBS_DIR / "jobs.db"), run_transcription_job, workers=JOB_WORKERS)
+        return _job_runner
+
+
+def get_job_store() -> JobStore:
+    return get_job_runner().store
+
+
+def transcript_cache_stat(name: str):
+    """One transcript cache statistic, or None (no sample) when caching is disabled"""
+    cache = get_transcript_cache()
+    return cache.stats()[name] if cache else None
+
+
+def all_model_cache_stats() -> list:
+    """Model cache statistics of every inference worker plus the process-wide registry"""
+    return executor.stats()["model_caches"] + [get_model_registry().stats()]
+
+
+def loaded_models() -> dict:
+    counts = {}
+    for stats in all_model_cache_stats():
+        for entry in stats["models"]:
+            counts[entry["model_name"]] = counts.get(entry["model_name"], 0) + 1
+    return counts
+
+
+# Prometheus metrics served by GET /metrics; collect-time metrics read live state on each scrape
+metrics = MetricsRegistry()
+http_requests = metrics.counter("whisper_http_requests_total", "HTTP requests by route and status code",
+                                ["method", "path", "status"])
+http_latency = metrics.histogram("whisper_http_request_duration_seconds",
+                                 "HTTP request latency until the response is complete", ["method", "path"])
+http_in_flight = metrics.gauge("whisper_http_requests_in_flight", "HTTP requests currently being served")
+inference_seconds = metrics.histogram(
+    "whisper_inference_duration_seconds", "Time to transcribe one upload, by path and model",
+    ["stage", "model"], buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+)
+real_time_factor = metrics.histogram(
+    "whisper_real_time_factor", "Inference seconds per second of audio, by path and model",
+    ["stage", "model"], buckets=(0.01, 0.02, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1, 1.5, 2, 5)
+)
+audio_seconds = metrics.counter("whisper_audio_seconds_total", "Seconds of audio transcribed",
+                                ["stage", "model"])
+inference_errors = metrics.counter("whisper_inference_errors_total", "Failed transcriptions by error class",
+                                   ["stage", "model", "error"])
+live_sessions = metrics.gauge("whisper_live_sessions", "Open live transcription WebSockets")
+live_sessions.set(0)
+metrics.gauge("whisper_ready", "1 once the preloaded models are warm, else 0",
+              function=lambda: int(executor.ready))
+metrics.gauge("whisper_inference_active_jobs", "Inference jobs currently decoding",
+              function=lambda: executor.active_jobs)
+metrics.gauge("whisper_inference_queue_depth", "Inference jobs waiting for a worker",
+              function=lambda: executor.queue_depth)
+metrics.gauge("whisper_jobs", "Background jobs by status", ["status"],
+              function=lambda: _job_runner.store.counts() if _job_runner else None)
+metrics.gauge("whisper_loaded_models", "Models loaded across inference workers", ["model"],
+              function=loaded_models)
+for cache_counter in ("hits", "misses", "evictions"):
+    metrics.counter(f"whisper_model_cache_{cache_counter}_total", f"Model cache {cache_counter}",
+                    function=lambda key=cache_counter: sum(stats[key] for stats in all_model_cache_stats()))
+    metrics.counter(f"whisper_transcript_cache_{cache_counter}_total", f"Transcript cache {cache_counter}",
+                    function=lambda key=cache_counter: transcript_cache_stat(key))
+metrics.gauge("whisper_transcript_cache_size_bytes", "Size of the transcript cache on disk",
+              function=lambda: transcript_cache_stat("size_bytes"))
+metrics.counter("whisper_micro_batches_total", "Micro-batches decoded",
+                function=lambda: micro_batcher.stats()["batches"] if micro_batcher else None)
+metrics.counter("whisper_micro_batch_clips_total", "Clips decoded in micro-batches",
+                function=lambda: micro_batcher.stats()["clips"] if micro_batcher else None)
+metrics.gauge("process_resident_memory_bytes", "Resident memory of the API process",
+              function=resident_memory_bytes)
+
+
+def record_inference(event: StageEvent) -> None:
+    """Instrumentation sink turning transcription stage events into metrics"""
+    if event.phase == "start" or event.fields.get("cancelled"):
+        return
+    labels = {"stage": event.stage, "model": event.fields.get("model", "")}
+    if event.phase == "error":
+        inference_errors.inc(error=event.fields["error"].split(":", 1)[0], **labels)
+        return
+    inference_seconds.observe(event.duration, **labels)
+    duration = event.fields.get("audio_seconds")
+    if duration:
+        audio_seconds.inc(duration, **labels)
+        real_time_factor.observe(event.duration / duration, **labels)
+
+
+instrumentation = Instrumentation(sinks=[record_inference])
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    executor.start()
+    if micro_batcher:
+        micro_batcher.start()
+    elif BATCH_MAX_SIZE > 1:
+        print(f"NOTE: micro-batching (WHISPER_BATCH_SIZE={BATCH_MAX_SIZE}) is disabled "
+              f"because WHISPER_VAD={VAD_MODE}; uploads are decoded one at a time.")
+    get_job_runner().start()
+    yield
+    get_job_runner().stop(wait=False)
+    if micro_batcher:
+        micro_batcher.shutdown(wait=False)
+    executor.shutdown(wait=False)
 
 
 app = FastAPI(
     title="Whisper API",
     description="Speech-to-text transcription API using faster-whisper",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -31,10 +251,112 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Configuration
-WHISPER_API_KEY = os.getenv("WHISPER_API_KEY")
-SUPPORTED_FORMATS = {".mp3", ".wav", ".m4a", ".flac", ".ogg", ".wma", ".aac"}
-MAX_FILE_SIZE = 100 * 1024 * 1024  # 100MB
+
+def file_too_large_error() -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"File too large. Maximum size: {MAX_FILE_SIZE // (1024*1024)}MB"
+    )
+
+
+class RequestSizeLimitMiddleware:
+    """
+    Reject request bodies larger than the upload limit while they stream in
+
+    Requests that declare an oversized Content-Length are refused before any
+    body is read; chunked requests are aborted as soon as the running byte
+    count crosses the limit, so an oversized upload is never fully received.
+    """
+
+    def __init__(self, app, max_body_size: int):
+        self.app = app
+        self.max_body_size = max_body_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        content_length = dict(scope["headers"]).get(b"content-length", b"")
+        if content_length.isdigit() and int(content_length) > self.max_body_size:
+            await self._reject(scope, receive, send)
+            return
+
+        received = 0
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body_size:
+                    # HTTPException passes through FastAPI's body parsing untouched
+                    raise file_too_large_error()
+            return message
+
+        async def tracking_send(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracking_send)
+        except HTTPException as e:
+            if e.status_code != 413 or response_started:
+                raise
+            await self._reject(scope, receive, send)
+
+    async def _reject(self, scope, receive, send):
+        error = file_too_large_error()
+        response = JSONResponse(status_code=error.status_code, content={"detail": error.detail},
+                                headers={"Connection": "close"})
+        await response(scope, receive, send)
+
+
+app.add_middleware(RequestSizeLimitMiddleware, max_body_size=MAX_FILE_SIZE + MAX_REQUEST_OVERHEAD)
+
+
+class MetricsMiddleware:
+    """
+    Count HTTP requests and time them until the response body is complete
+
+    Requests are labelled with the matched route template (not the raw
+    path) so label cardinality stays bounded; requests rejected before
+    routing are labelled "unmatched".
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def status_send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        http_in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, status_send)
+        finally:
+            http_in_flight.dec()
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            http_requests.inc(method=scope["method"], path=path, status=status)
+            http_latency.observe(time.perf_counter() - started, method=scope["method"], path=path)
+
+
+# Outermost, so requests refused by the size limit are counted too
+app.add_middleware(MetricsMiddleware)
 
 
 class TranscriptionResponse(BaseModel):
@@ -43,6 +365,45 @@ class TranscriptionResponse(BaseModel):
     language_probability: Optional[float] = None
 
 
+class JobResponse(BaseModel):
+    id: str
+    status: str
+    model: str
+    priority: int = 0
+    filename: Optional[str] = None
+    progress: float = 0.0
+    transcript: str = ""
+    duration: Optional[float] = None
+    detected_language: Optional[str] = None
+    language_probability: Optional[float] = None
+    error: Optional[str] = None
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+
+class SearchHit(BaseModel):
+    source: str
+    title: Optional[str] = None
+    video_id: Optional[str] = None
+    language: Optional[str] = None
+    start_ms: int
+    end_ms: int
+    text: str
+    snippet: str
+    score: float
+    link: Optional[str] = None
+
+
+class SearchResponse(BaseModel):
+    query: str
+    offset: int = 0
+    hits: List[SearchHit]
+
+
+MAX_SEARCH_LIMIT = 100
+
+
 def verify_api_key(x_api_key: str = Header(...)):
     """Verify API key is provided and matches expected value"""
     expected_key = os.getenv("WHISPER_API_KEY")
@@ -50,28 +411,255 @@ def verify_api_key(x_api_key: str = Header(...)):
         raise HTTPException(status_code=403, detail="Invalid or missing API key")
 
 
-@app.get("/")
-async def root():
-    """Health check endpoint"""
-    return {"message": "Whisper API is running", "version": "1.0.0"}
+def executor_unavailable(error: ExecutorBusyError) -> HTTPException:
+    """503 for a stopped executor, 429 for a full queue"""
+    if isinstance(error, ExecutorStoppedError):
+        return HTTPException(
+            status_code=503,
+            detail=f"Service unavailable: {str(error)}",
+            headers={"Retry-After": str(RETRY_AFTER_SECONDS)}
+        )
+    return HTTPException(
+        status_code=429,
+        detail=f"Server busy: {str(error)}",
+        headers={"Retry-After": str(RETRY_AFTER_SECONDS)}
+    )
 
 
-@app.post("/transcribe", response_model=TranscriptionResponse, dependencies=[Depends(verify_api_key)])
-async def transcribe_audio(
-    file: UploadFile = File(...),
-    model: str = "base"
-):
+def submit_inference(job):
     """
-    Transcribe an uploaded audio file to text.
+    Dispatch a job to the inference executor
+
+    Returns:
+        concurrent.futures.Future for the job result
+
+    Raises:
+        HTTPException: 429 if the queue is full, 503 if the executor is stopped
+    """
+    try:
+        return executor.submit(job)
+    except ExecutorBusyError as e:
+        raise executor_unavailable(e)
+
+
+async def run_inference(job):
+    """Dispatch a job to the inference executor and await its result"""
+    return await asyncio.wrap_future(submit_inference(job))
+
+
+async def fits_micro_batch(audio_path: Path) -> bool:
+    """Whether an upload is short enough to be decoded in a micro-batch"""
+    if micro_batcher is None:
+        return False
+    duration = await run_in_threadpool(probe_audio_duration, audio_path)
+    return duration is not None and duration <= BATCH_MAX_CLIP_SECONDS
+
+
+async def run_batched(audio_path: Path, model: str, audio_hash: str):
+    """Decode a short clip together with other requests arriving at the same time"""
+    samples = await run_in_threadpool(load_audio_pcm, audio_path)
+    started = time.perf_counter()
+    try:
+        segments, info = await asyncio.wrap_future(micro_batcher.submit(samples, model))
+    except ExecutorBusyError as e:
+        raise executor_unavailable(e)
+    except Exception as e:
+        instrumentation.emit(StageEvent("batch", "error", duration=time.perf_counter() - started,
+                                        model=model, error=f"{type(e).__name__}: {e}"))
+        raise
+    instrumentation.emit(StageEvent("batch", "end", duration=time.perf_counter() - started,
+                                    model=model, audio_seconds=len(samples) / 16000))
+    cache = get_transcript_cache()
+    if cache is not None:
+        await run_in_threadpool(cache.put, cache_key_for(audio_hash, model), segments, info)
+    return " ".join(segment.text.strip() for segment in segments).strip(), info
+
+
+def cache_key_for(audio_hash: str, model: str) -> str:
+    return TranscriptCache.make_key(audio_hash, model, vad=vad_cache_spec(VAD_MODE))
+
+
+def record_transcript(segments, info, audio_hash: str, model: str):
+    """Wrap decoded segments so the transcript is cached once complete (if caching is enabled)"""
+    cache = get_transcript_cache()
+    if cache is None:
+        return segments
+    return cache.record(segments, info, cache_key_for(audio_hash, model))
+
+
+def transcribe_job(audio_path: Path, model: str, audio_hash: str):
+    """Build an executor job that transcribes a file and joins the segment text"""
+    def job(registry):
+        with instrumentation.stage("transcribe", model=model) as stage:
+            segments, info = transcribe_audio_file(audio_path, model_name=model, registry=registry)
+            segments = record_transcript(segments, info, audio_hash, model)
+            
+            transcript_text = ""
+            for segment in segments:
+                transcript_text += segment.text.strip() + " "
+            stage["audio_seconds"] = info.duration
+        
+        return transcript_text.strip(), info
+    return job
+
+
+def segment_event(segment) -> dict:
+    return {
+        "type": "segment",
+        "id": segment.id,
+        "start": segment.start,
+        "end": segment.end,
+        "text": segment.text.strip()
+    }
+
+
+def summary_event(info, segment_count: int) -> dict:
+    return {
+        "type": "summary",
+        "detected_language": info.language,
+        "language_probability": info.language_probability,
+        "duration": info.duration,
+        "segments": segment_count
+    }
+
+
+def streaming_transcribe_job(audio_path: Path, model: str, audio_hash: str, emit,
+                             cancelled: threading.Event):
+    """Build an executor job that emits each segment as soon as it is decoded"""
+    def job(registry):
+        with instrumentation.stage("stream", model=model) as stage:
+            segments, info = transcribe_audio_file(audio_path, model_name=model, registry=registry)
+            segments = record_transcript(segments, info, audio_hash, model)
+            
+            count = 0
+            for segment in segments:
+                if cancelled.is_set():
+                    segments.close()
+                    stage["cancelled"] = True
+                    return
+                emit(segment_event(segment))
+                count += 1
+            stage["audio_seconds"] = info.duration
+        
+        emit(summary_event(info, count))
+    return job
+
+
+def format_stream_event(event: dict, stream_format: str) -> str:
+    if stream_format == "sse":
+        return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+    return json.dumps(event) + "\n"
+
+
+def stream_cached_transcription(cached, stream_format: str) -> StreamingResponse:
+    """Stream a cached transcript using the same events as a live decode"""
+    def event_stream():
+        for segment in cached.segments:
+            yield format_stream_event(segment_event(segment), stream_format)
+        yield format_stream_event(summary_event(cached.info, len(cached.segments)), stream_format)
+    
+    return StreamingResponse(event_stream(), media_type=STREAM_FORMATS[stream_format])
+
+
+def stream_transcription(audio_path: Path, model: str, audio_hash: str,
+                         stream_format: str) -> StreamingResponse:
+    """
+    Start a transcription and stream its segments as SSE or NDJSON
+
+    The job is queued before the response starts, so a busy executor still
+    yields a 429/503 status. The response owns ``audio_path`` and deletes it
+    once the stream ends; if the client disconnects, decoding stops at the
+    next segment.
+    """
+    loop = asyncio.get_running_loop()
+    events: asyncio.Queue = asyncio.Queue()
+    cancelled = threading.Event()
+    
+    def emit(event):
+        loop.call_soon_threadsafe(events.put_nowait, event)
+    
+    future = submit_inference(streaming_transcribe_job(audio_path, model, audio_hash, emit, cancelled))
+    future.add_done_callback(lambda _: emit(None))
+    
+    async def event_stream():
+        try:
+            while True:
+                event = await events.get()
+                if event is None:
+                    break
+                yield format_stream_event(event, stream_format)
+            
+            error = future.exception()
+            if error is not None:
+                yield format_stream_event({"type": "error", "detail": f"Transcription failed: {str(error)}"},
+                                          stream_format)
+        finally:
+            cancelled.set()
+            try:
+                audio_path.unlink()
+            except Exception:
+                pass  # Ignore cleanup errors
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type=STREAM_FORMATS[stream_format],
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+async def save_upload(upload: UploadFile, suffix: str,
+                      directory: Optional[Path] = None) -> Tuple[Path, str]:
+    """
+    Copy an upload to a temporary file in fixed-size chunks, hashing it on the way
+
+    Only one chunk is held in memory at a time and the size limit is checked
+    as the data is copied, so memory use per request stays bounded.
     
     Args:
-        file: Audio file to transcribe (mp3, wav, m4a, flac, ogg, wma, aac)
-        model: Whisper model to use (tiny, base, small, medium, large)
-        
+        upload: Uploaded file
+        suffix: File extension for the temporary file
+        directory: Directory for the file (defaults to the system temp dir)
+
     Returns:
-        JSON response with transcript and language detection info
+        Tuple of (temporary file path, SHA-256 hex digest); the caller is
+        responsible for deleting the file
+
+    Raises:
+        HTTPException: 413 if the upload exceeds MAX_FILE_SIZE
+    """
+    if directory is not None:
+        directory.mkdir(parents=True, exist_ok=True)
+    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=suffix, dir=directory)
+    temp_path = Path(temp_file.name)
+    digest = hashlib.sha256()
+    written = 0
+    try:
+        with temp_file:
+            while True:
+                chunk = await upload.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                written += len(chunk)
+                if written > MAX_FILE_SIZE:
+                    raise file_too_large_error()
+                digest.update(chunk)
+                await run_in_threadpool(temp_file.write, chunk)
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+    return temp_path, digest.hexdigest()
+
+
+def validate_upload(file: UploadFile, model: str) -> str:
+    """
+    Validate an uploaded file and model name
+
+    Returns:
+        Lower-cased file extension of the upload
+
+    Raises:
+        HTTPException: 400 for a missing file, bad format or model, 413 if too large
     """
-    
     # Validate file
     if not file.filename:
         raise HTTPException(status_code=400, detail="No file provided")
@@ -84,72 +672,320 @@ async def transcribe_audio(
             detail=f"Unsupported file format. Supported formats: {', '.join(SUPPORTED_FORMATS)}"
         )
     
-    # Check file size
+    # Check declared file size (the limit is enforced again while streaming)
     if file.size and file.size > MAX_FILE_SIZE:
+        raise file_too_large_error()
+    
+    # Validate model name
+    if model not in VALID_MODELS:
         raise HTTPException(
-            status_code=413, 
-            detail=f"File too large. Maximum size: {MAX_FILE_SIZE // (1024*1024)}MB"
+            status_code=400,
+            detail=f"Invalid model. Valid models: {', '.join(VALID_MODELS)}"
         )
     
-    # Validate model name
-    valid_models = ["tiny", "base", "small", "medium", "large"]
-    if model not in valid_models:
+    return file_ext
+
+
+@app.get("/")
+async def root():
+    """Health check endpoint; answers 503 until the preloaded models are warm"""
+    warmup = executor.warmup_status()
+    if not warmup["ready"]:
+        return JSONResponse(
+            status_code=503,
+            content={"message": "Whisper API is warming up", "version": "1.0.0", "warmup": warmup},
+            headers={"Retry-After": str(RETRY_AFTER_SECONDS)}
+        )
+    return {"message": "Whisper API is running", "version": "1.0.0", "warmup": warmup}
+
+
+@app.post("/transcribe", response_model=TranscriptionResponse, dependencies=[Depends(verify_api_key)])
+async def transcribe_audio(
+    file: UploadFile = File(...),
+    model: str = "base",
+    stream: Optional[str] = None
+):
+    """
+    Transcribe an uploaded audio file to text.
+    
+    Args:
+        file: Audio file to transcribe (mp3, wav, m4a, flac, ogg, wma, aac)
+        model: Whisper model to use (tiny, base, small, medium, large)
+        stream: Optional streaming mode ("sse" or "ndjson") that sends each
+            segment as it is decoded, followed by a summary event
+        
+    Returns:
+        JSON response with transcript and language detection info, or a
+        streaming response of segment events
+    """
+    
+    file_ext = validate_upload(file, model)
+    
+    # Validate streaming mode
+    if stream is not None and stream not in STREAM_FORMATS:
         raise HTTPException(
             status_code=400,
-            detail=f"Invalid model. Valid models: {', '.join(valid_models)}"
+            detail=f"Invalid stream format. Valid formats: {', '.join(STREAM_FORMATS)}"
         )
     
-    # Create temporary file
-    with tempfile.NamedTemporaryFile(delete=False, suffix=file_ext) as temp_file:
+    temp_path = None
+    try:
+        # Stream the upload to disk in chunks
+        temp_path, audio_hash = await save_upload(file, file_ext)
+        
+        # Serve repeated uploads straight from the transcript cache
+        cache = get_transcript_cache()
+        cached = await run_in_threadpool(cache.get, cache_key_for(audio_hash, model)) if cache else None
+        if cached is not None:
+            if stream:
+                return stream_cached_transcription(cached, stream)
+            return TranscriptionResponse(
+                transcript=" ".join(segment.text.strip() for segment in cached.segments).strip(),
+                detected_language=cached.info.language,
+                language_probability=cached.info.language_probability
+            )
+        
+        if stream:
+            response = stream_transcription(temp_path, model, audio_hash, stream)
+            temp_path = None  # Owned by the streaming response from here on
+            return response
+        
+        # Transcribe the audio file on the inference executor
         try:
-            # Read and save uploaded file
-            content = await file.read()
-            temp_file.write(content)
-            temp_file.flush()
+            if await fits_micro_batch(temp_path):
+                transcript_text, info = await run_batched(temp_path, model, audio_hash)
+            else:
+                transcript_text, info = await run_inference(transcribe_job(temp_path, model, audio_hash))
             
-            temp_path = Path(temp_file.name)
+            return TranscriptionResponse(
+                transcript=transcript_text,
+                detected_language=info.language,
+                language_probability=info.language_probability
+            )
             
-            # Transcribe the audio file
-            try:
-                segments, info = transcribe_audio_file(temp_path, model_name=model)
-                
-                # Extract transcript text
-                transcript_text = ""
-                for segment in segments:
-                    transcript_text += segment.text.strip() + " "
-                
-                transcript_text = transcript_text.strip()
-                
-                return TranscriptionResponse(
-                    transcript=transcript_text,
-                    detected_language=info.language,
-                    language_probability=info.language_probability
-                )
-                
-            except ImportError as e:
-                raise HTTPException(
-                    status_code=500,
-                    detail=f"Missing required dependency: {str(e)}"
-                )
-            except Exception as e:
-                raise HTTPException(
-                    status_code=500,
-                    detail=f"Transcription failed: {str(e)}"
-                )
-                
+        except HTTPException:
+            raise
+        except ImportError as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Missing required dependency: {str(e)}"
+            )
         except Exception as e:
             raise HTTPException(
                 status_code=500,
-                detail=f"File processing failed: {str(e)}"
+                detail=f"Transcription failed: {str(e)}"
             )
-        finally:
-            # Clean up temporary file
+            
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"File processing failed: {str(e)}"
+        )
+    finally:
+        # Clean up temporary file
+        if temp_path:
             try:
                 temp_path.unlink()
             except Exception:
                 pass  # Ignore cleanup errors
 
 
+def decode_audio_frame(data: bytes, encoding: str, opus_decoder: Optional[OpusPacketDecoder] = None):
+    """Convert one binary WebSocket frame to 16 kHz mono float32 samples"""
+    import numpy as np  # Only live sessions need it; keeps API start-up light
+    
+    if encoding == "opus":
+        return opus_decoder.decode(data)
+    if encoding == "pcm_f32le":
+        return np.frombuffer(data[:len(data) // 4 * 4], dtype="<f4")
+    return np.frombuffer(data[:len(data) // 2 * 2], dtype="<i2").astype(np.float32) / 32768.0
+
+
+def live_segment_event(segment, transcriber: StreamingTranscriber) -> dict:
+    event = segment_event(segment)
+    event["lag"] = round(transcriber.last_lag, 3)
+    return event
+
+
+@app.websocket("/ws/transcribe")
+async def transcribe_live(
+    websocket: WebSocket,
+    model: str = "base",
+    encoding: str = "pcm_s16le",
+    language: Optional[str] = None,
+    api_key: Optional[str] = None
+):
+    """
+    Live transcription over a WebSocket.
+    
+    The client sends binary frames of 16 kHz mono audio (``encoding`` is
+    pcm_s16le, pcm_f32le, or opus with one raw Opus packet per frame) and a
+    text frame such as ``{"type": "stop"}`` to end the stream. The server
+    replies with JSON events: ``partial`` (the current unconfirmed text),
+    ``segment`` (committed text plus its ``lag`` in seconds) and, after the
+    stop, a ``summary`` with the session's latency statistics.
+    
+    Browsers cannot set WebSocket headers, so the API key may also be passed
+    as the ``api_key`` query parameter.
+    """
+    expected_key = os.getenv("WHISPER_API_KEY")
+    if not expected_key or (websocket.headers.get("x-api-key") or api_key) != expected_key:
+        await websocket.close(code=1008)
+        return
+    if model not in VALID_MODELS or encoding not in LIVE_ENCODINGS:
+        await websocket.close(code=1003)
+        return
+    
+    await websocket.accept()
+    try:
+        opus_decoder = OpusPacketDecoder() if encoding == "opus" else None
+    except ImportError as e:
+        # PyAV is optional; tell the client why the encoding is unavailable
+        await websocket.send_json({"type": "error", "detail": str(e)})
+        await websocket.close(code=1003, reason="opus encoding is not available")
+        return
+    transcriber = StreamingTranscriber(model, language=language)
+    audio_ready = asyncio.Event()
+    state = {"stopped": False, "disconnected": False, "error": None}
+    
+    async def receive_audio():
+        try:
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    state["disconnected"] = True
+                    break
+                if message.get("bytes"):
+                    transcriber.insert_audio(decode_audio_frame(message["bytes"], encoding, opus_decoder))
+                    audio_ready.set()
+                elif message.get("text") is not None:
+                    break  # Any text frame ends the stream
+        except Exception as e:
+            state["error"] = f"Invalid audio frame: {str(e)}"
+        finally:
+            state["stopped"] = True
+            audio_ready.set()
+    
+    receiver = asyncio.create_task(receive_audio())
+    live_sessions.inc()
+    try:
+        # Re-decode whenever enough new audio has arrived; decoding time sets the pace
+        while True:
+            await audio_ready.wait()
+            audio_ready.clear()
+            if state["stopped"]:
+                break
+            if transcriber.pending_seconds < STREAM_MIN_CHUNK_SECONDS:
+                continue
+            try:
+                segment, partial = await run_inference(transcriber.process)
+            except HTTPException as e:
+                if e.status_code == 429:
+                    continue  # Executor busy; retry with more audio buffered
+                raise
+            if segment is not None:
+                await websocket.send_json(live_segment_event(segment, transcriber))
+            await websocket.send_json({"type": "partial", "text": partial})
+        
+        if state["disconnected"]:
+            return
+        if state["error"]:
+            await websocket.send_json({"type": "error", "detail": state["error"]})
+            await websocket.close(code=1003)
+            return
+        
+        segment = await run_inference(transcriber.finish)
+        if segment is not None:
+            await websocket.send_json(live_segment_event(segment, transcriber))
+        await websocket.send_json({
+            "type": "summary",
+            "detected_language": transcriber.language,
+            "latency": transcriber.latency_stats()
+        })
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+    except HTTPException as e:
+        await websocket.send_json({"type": "error", "detail": e.detail})
+        await websocket.close(code=1013)
+    except Exception as e:
+        if not state["disconnected"]:
+            await websocket.send_json({"type": "error", "detail": f"Transcription failed: {str(e)}"})
+            await websocket.close(code=1011)
+    finally:
+        receiver.cancel()
+        live_sessions.dec()
+
+
+@app.post("/jobs", response_model=JobResponse, status_code=202, dependencies=[Depends(verify_api_key)])
+async def create_job(
+    file: UploadFile = File(...),
+    model: str = "base",
+    priority: int = 0
+):
+    """
+    Queue an uploaded audio file for background transcription.
+    
+    Args:
+        file: Audio file to transcribe (mp3, wav, m4a, flac, ogg, wma, aac)
+        model: Whisper model to use (tiny, base, small, medium, large)
+        priority: Higher priority jobs are processed first
+        
+    Returns:
+        The queued job; poll GET /jobs/{id} for progress
+    """
+    file_ext = validate_upload(file, model)
+    
+    audio_path, _ = await save_upload(file, file_ext, directory=JOBS_DIR / "audio")
+    try:
+        job_id = get_job_store().create(audio_path, model, filename=file.filename, priority=priority)
+    except Exception as e:
+        audio_path.unlink(missing_ok=True)
+        raise HTTPException(status_code=500, detail=f"Failed to queue job: {str(e)}")
+    
+    get_job_runner().notify()
+    return JobResponse(**get_job_store().get(job_id))
+
+
+@app.get("/jobs/{job_id}", response_model=JobResponse, dependencies=[Depends(verify_api_key)])
+async def get_job(job_id: str):
+    """Get job status, progress percent and the transcript decoded so far"""
+    job = get_job_store().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return JobResponse(**job)
+
+
+@app.delete("/jobs/{job_id}", dependencies=[Depends(verify_api_key)])
+async def delete_job(job_id: str):
+    """Cancel a queued or running job, or delete the record of a finished one"""
+    job_store = get_job_store()
+    job = job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    if job["status"] in ACTIVE_STATUSES and job_store.cancel(job_id):
+        if job["status"] == QUEUED:
+            Path(job["audio_path"]).unlink(missing_ok=True)
+        return {"id": job_id, "status": CANCELLED}
+    
+    job_store.delete(job_id)
+    return {"id": job_id, "status": "deleted"}
+
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """
+    Prometheus metrics in text exposition format.
+    
+    Like the health check this needs no API key, so a scraper can reach it;
+    it reports counts and timings only, never transcript content.
+    """
+    return Response(content=await run_in_threadpool(metrics.render), media_type=METRICS_CONTENT_TYPE)
+
+
 @app.get("/models", dependencies=[Depends(verify_api_key)])
 async def list_models():
     """List available Whisper models"""
@@ -164,10 +1000,71 @@ async def list_models():
     }
 
 
+@app.get("/models/cache", dependencies=[Depends(verify_api_key)])
+async def model_cache_stats():
+    """Report loaded models and model cache hit/miss/eviction counters"""
+    return {
+        "process": get_model_registry().stats(),
+        "executor": executor.stats(),
+        "warmup": executor.warmup_status(),
+        "batcher": micro_batcher.stats() if micro_batcher else None
+    }
+
+
+@app.get("/search", response_model=SearchResponse, dependencies=[Depends(verify_api_key)])
+async def search_transcripts(
+    q: str,
+    limit: int = 20,
+    offset: int = 0,
+    source: Optional[str] = None,
+    raw: bool = False
+):
+    """
+    Full-text search over the transcript index (WHISPER_TRANSCRIPT_INDEX).
+    
+    Args:
+        q: Words that must all occur in a segment (with raw=true, an FTS5
+            query with "phrases", OR, NEAR() and prefix* terms)
+        limit: Maximum hits (1-100)
+        offset: Hits to skip, for paging
+        source: Only search the transcript of this URL or file
+        raw: Pass q to FTS5 unchanged
+        
+    Returns:
+        Best-ranked segments first, each with start/end in milliseconds and a
+        YouTube link that starts playback at the hit
+    """
+    index = get_transcript_index()
+    if index is None:
+        raise HTTPException(status_code=503,
+                            detail="Transcript search is not configured (set WHISPER_TRANSCRIPT_INDEX)")
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="Empty search query")
+    if not 1 <= limit <= MAX_SEARCH_LIMIT or offset < 0:
+        raise HTTPException(status_code=400,
+                            detail=f"limit must be 1-{MAX_SEARCH_LIMIT} and offset non-negative")
+    try:
+        hits = await run_in_threadpool(index.search, q, limit, offset, source, raw)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return SearchResponse(query=q, offset=offset, hits=[SearchHit(**hit) for hit in hits])
+
+
+@app.get("/cache", dependencies=[Depends(verify_api_key)])
+async def transcript_cache_stats():
+    """Report transcript cache size and hit/miss/eviction counters"""
+    cache = get_transcript_cache()
+    if cache is None:
+        raise HTTPException(status_code=503,
+                            detail="Transcript cache is not configured (set WHISPER_TRANSCRIPT_CACHE_DIR)")
+    return cache.stats()
+
+
 if __name__ == "__main__":
     # Check if API key is configured
     if not WHISPER_API_KEY:
         print("WARNING: WHISPER_API_KEY environment variable not set. API will be unprotected!")
     
     # Run the server
+    import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -8,6 +8,9 @@ from pathlib import Path
 import re
 from datetime import datetime
 
+from batch_runner import BatchManifest, BatchPipeline, BATCH_MANIFEST_FILE
+from stt_utils import atomic_write, get_scratch_space, missing_packages
+
 class YouTubeTranscriber:
     def __init__(self, root):
         self.root = root
@@ -20,14 +23,12 @@ class YouTubeTranscriber:
         self.setup_ui()
         
     def check_dependencies(self):
-        """Check if required packages are installed"""
-        try:
-            import yt_dlp
-            import whisper
-        except ImportError as e:
+        """Check if required packages are installed (without importing them; whisper loads torch)"""
+        missing = missing_packages("yt_dlp", "whisper")
+        if missing:
             messagebox.showerror(
                 "Missing Dependencies", 
-                f"Required packages not found: {e}\n\n"
+                f"Required packages not found: {', '.join(missing)}\n\n"
                 "Please install with:\n"
                 "pip install yt-dlp openai-whisper"
             )
@@ -105,6 +106,10 @@ class YouTubeTranscriber:
         ttk.Checkbutton(options_frame, text="Create combined transcript file", 
                        variable=self.combine_transcripts_var).grid(row=2, column=0, sticky=tk.W)
         
+        self.resume_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(options_frame, text="Skip videos already transcribed into the output folder", 
+                       variable=self.resume_var).grid(row=3, column=0, sticky=tk.W)
+        
         self.batch_frame.columnconfigure(0, weight=1)
         
     def setup_common_controls(self, main_frame):
@@ -306,11 +311,24 @@ class YouTubeTranscriber:
     
     def transcribe_videos(self, urls):
         """Main transcription logic for multiple videos"""
+        manifest = None
         try:
             model = self.model_var.get()
             language = self.language_var.get() if self.language_var.get() != "auto" else None
             output_dir = Path(self.output_dir_var.get())
             output_dir.mkdir(parents=True, exist_ok=True)
+            add_timestamps = self.add_timestamps_var.get()
+            
+            # Progress is recorded per video so an interrupted batch can be resumed
+            manifest = BatchManifest(output_dir / BATCH_MANIFEST_FILE)
+            if self.resume_var.get():
+                pending = manifest.pending(urls)
+                if len(pending) < len(urls):
+                    self.log(f"Skipping {len(urls) - len(pending)} video(s) already transcribed")
+                urls = pending
+                if not urls:
+                    self.log("Nothing left to transcribe")
+                    return
             
             # Import here to avoid startup delays
             import yt_dlp
@@ -327,122 +345,122 @@ class YouTubeTranscriber:
             self.log(f"Loading Whisper model '{model}'...")
             model_instance = whisper.load_model(model)
             
-            successful_transcripts = []
-            failed_videos = []
-            combined_content = []
+            # Each video downloads into its own scratch directory, so concurrent
+            # runs into the same output folder cannot clobber each other's audio
+            scratch = get_scratch_space()
+            job_dirs = {}
+            
+            def download(url, i):
+                job_dirs[i] = scratch.create_job_dir("batch")
+                
+                # Configure yt-dlp (keep the native opus/m4a container; Whisper
+                # decodes it directly, so an MP3 re-encode would be wasted work)
+                audio_path = job_dirs[i] / "temp_audio.%(ext)s"
+                ydl_opts = {
+                    'format': 'bestaudio/best',
+                    'outtmpl': str(audio_path),
+                    'quiet': True,
+                }
+                
+                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+                    info = ydl.extract_info(url, download=True)
+                    audio_file = Path(ydl.prepare_filename(info))
+                
+                # Check the downloaded audio file
+                if not audio_file.exists():
+                    raise FileNotFoundError("Audio file not found after download")
+                return audio_file, info
             
-            for i, url in enumerate(urls, 1):
+            def cleanup(item):
+                job_dir = job_dirs.pop(item.index, None)
+                if job_dir is not None:
+                    scratch.remove_job_dir(job_dir)
+            
+            def transcribe(item):
+                duration = item.video_info.get('duration', 0)
+                if duration:
+                    self.log(f"[{item.index}/{len(urls)}] Duration: {duration//60}:{duration%60:02d}")
+                
+                transcribe_options = {"language": language} if language else {}
+                result = model_instance.transcribe(str(item.audio_file), **transcribe_options)
+                
+                # Validate result
+                if not isinstance(result, dict):
+                    raise ValueError("Invalid transcription result")
+                if "text" not in result:
+                    result["text"] = "No transcript text available"
+                return result
+            
+            def write(item):
+                result = item.result
+                video_title = item.title
+                
+                # Save individual transcript
+                safe_title = "".join(c for c in video_title if c.isalnum() or c in (' ', '-', '_')).rstrip()
+                if not safe_title or len(safe_title) < 3:
+                    safe_title = f"transcript_{item.index}"
+                
+                # Ensure filename isn't too long
+                if len(safe_title) > 100:
+                    safe_title = safe_title[:97] + "..."
+                
+                transcript_file = output_dir / f"{safe_title}_transcript.txt"
+                
+                # Ensure we have valid transcript text
+                transcript_text = result.get("text", "")
+                if not transcript_text or not isinstance(transcript_text, str):
+                    transcript_text = "No transcript text available"
+                result["text"] = transcript_text
+                
                 try:
-                    self.log(f"\n[{i}/{len(urls)}] Processing: {url}")
-                    
-                    # Configure yt-dlp
-                    audio_path = output_dir / f"temp_audio_{i}.%(ext)s"
-                    ydl_opts = {
-                        'format': 'bestaudio/best',
-                        'outtmpl': str(audio_path),
-                        'postprocessors': [{
-                            'key': 'FFmpegExtractAudio',
-                            'preferredcodec': 'mp3',
-                            'preferredquality': '192',
-                        }],
-                        'quiet': True,
-                    }
-                    
-                    # Download audio
-                    self.log("Downloading audio...")
-                    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                        info = ydl.extract_info(url, download=True)
-                        video_title = info.get('title', f'Unknown_Video_{i}')
-                        duration = info.get('duration', 0)
+                    with atomic_write(transcript_file) as f:
+                        f.write(f"Transcript for: {video_title}\n")
+                        f.write(f"YouTube URL: {item.url}\n")
+                        f.write(f"Generated with Whisper model: {model}\n")
+                        if language:
+                            f.write(f"Language: {language}\n")
+                        f.write(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+                        f.write("-" * 80 + "\n\n")
                         
-                    self.log(f"Downloaded: {video_title}")
-                    if duration:
-                        self.log(f"Duration: {duration//60}:{duration%60:02d}")
-                    
-                    # Find the downloaded audio file
-                    audio_file = output_dir / f"temp_audio_{i}.mp3"
-                    if not audio_file.exists():
-                        raise FileNotFoundError("Audio file not found after download")
-                    
-                    # Transcribe
-                    self.log("Transcribing...")
-                    transcribe_options = {"language": language} if language else {}
-                    result = model_instance.transcribe(str(audio_file), **transcribe_options)
-                    
-                    # Validate result
-                    if not isinstance(result, dict):
-                        raise ValueError("Invalid transcription result")
-                    if "text" not in result:
-                        result["text"] = "No transcript text available"
-                    
-                    # Save individual transcript
-                    safe_title = "".join(c for c in video_title if c.isalnum() or c in (' ', '-', '_')).rstrip()
-                    if not safe_title or len(safe_title) < 3:
-                        safe_title = f"transcript_{i}"
-                    
-                    # Ensure filename isn't too long
-                    if len(safe_title) > 100:
-                        safe_title = safe_title[:97] + "..."
-                    
-                    transcript_file = output_dir / f"{safe_title}_transcript.txt"
-                    
-                    # Ensure we have valid transcript text
-                    transcript_text = result.get("text", "")
-                    if not transcript_text or not isinstance(transcript_text, str):
-                        transcript_text = "No transcript text available"
-                    
-                    try:
-                        with open(transcript_file, 'w', encoding='utf-8') as f:
-                            f.write(f"Transcript for: {video_title}\n")
-                            f.write(f"YouTube URL: {url}\n")
-                            f.write(f"Generated with Whisper model: {model}\n")
-                            if language:
-                                f.write(f"Language: {language}\n")
-                            f.write(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-                            f.write("-" * 80 + "\n\n")
+                        # Add timestamps if requested
+                        if add_timestamps and "segments" in result and result["segments"]:
+                            f.write("TRANSCRIPT WITH TIMESTAMPS:\n\n")
+                            for segment in result["segments"]:
+                                start_time = self.format_timestamp(segment.get("start", 0))
+                                end_time = self.format_timestamp(segment.get("end", 0))
+                                text = segment.get("text", "").strip()
+                                if text:
+                                    f.write(f"[{start_time} - {end_time}] {text}\n")
+                        else:
+                            f.write(transcript_text)
                             
-                            # Add timestamps if requested
-                            if self.add_timestamps_var.get() and "segments" in result and result["segments"]:
-                                f.write("TRANSCRIPT WITH TIMESTAMPS:\n\n")
-                                for segment in result["segments"]:
-                                    start_time = self.format_timestamp(segment.get("start", 0))
-                                    end_time = self.format_timestamp(segment.get("end", 0))
-                                    text = segment.get("text", "").strip()
-                                    if text:
-                                        f.write(f"[{start_time} - {end_time}] {text}\n")
-                            else:
-                                f.write(transcript_text)
-                                
-                    except Exception as write_error:
-                        raise Exception(f"Failed to write transcript file: {write_error}")
-                    
-                    # Add to combined content if requested
-                    if self.combine_transcripts_var.get():
-                        combined_content.append({
-                            'title': video_title,
-                            'url': url,
-                            'text': transcript_text
-                        })
-                    
-                    # Clean up temporary audio file
-                    audio_file.unlink()
-                    
-                    successful_transcripts.append(transcript_file)
-                    self.log(f"✓ Saved: {transcript_file.name}")
-                    
-                except Exception as e:
-                    error_msg = f"✗ Failed to process {url}: {str(e)}"
-                    self.log(error_msg)
-                    failed_videos.append((url, str(e)))
-                    
-                    # Clean up temp file if it exists
-                    temp_file = output_dir / f"temp_audio_{i}.mp3"
-                    if temp_file.exists():
-                        temp_file.unlink()
-                    
-                    if not self.skip_errors_var.get():
-                        self.log("Stopping batch processing due to error")
-                        break
+                except Exception as write_error:
+                    raise Exception(f"Failed to write transcript file: {write_error}")
+                
+                return transcript_file
+            
+            # Downloads run ahead on background threads while the current video is transcribed;
+            # those threads log concurrently, so messages are handed to the Tk loop
+            pipeline = BatchPipeline(download, transcribe, write,
+                                     prefetch_workers=2,
+                                     skip_errors=self.skip_errors_var.get(),
+                                     cleanup_fn=cleanup,
+                                     progress_callback=lambda message: self.root.after(0, self.log, message),
+                                     manifest=manifest)
+            report = pipeline.run(urls)
+            
+            successful_transcripts = [item.output_file for item in report.successful]
+            failed_videos = [(item.url, str(item.error)) for item in report.failed]
+            
+            # Add to combined content if requested
+            combined_content = []
+            if self.combine_transcripts_var.get():
+                for item in report.successful:
+                    combined_content.append({
+                        'title': item.title,
+                        'url': item.url,
+                        'text': item.result["text"]
+                    })
             
             # Create combined transcript if requested
             if self.combine_transcripts_var.get() and combined_content:
@@ -487,6 +505,8 @@ class YouTubeTranscriber:
             self.root.after(0, lambda: messagebox.showerror("Error", error_msg))
         
         finally:
+            if manifest is not None:
+                manifest.close()
             # Re-enable button and stop progress
             self.root.after(0, self.finish_transcription)
     
@@ -1,6 +1,7 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, scrolledtext, messagebox
 import threading
+import importlib.util
 import os
 import subprocess
 import sys
@@ -18,14 +19,12 @@ class YouTubeTranscriber:
         self.setup_ui()
         
     def check_dependencies(self):
-        """Check if required packages are installed"""
-        try:
-            import yt_dlp
-            import whisper
-        except ImportError as e:
+        """Check if required packages are installed (without importing them; whisper loads torch)"""
+        missing = [name for name in ("yt_dlp", "whisper") if importlib.util.find_spec(name) is None]
+        if missing:
             messagebox.showerror(
                 "Missing Dependencies", 
-                f"Required packages not found: {e}\n\n"
+                f"Required packages not found: {', '.join(missing)}\n\n"
                 "Please install with:\n"
                 "pip install yt-dlp openai-whisper"
             )
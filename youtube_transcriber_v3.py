@@ -1,6 +1,7 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, scrolledtext, messagebox
 import threading
+import importlib.util
 import os
 import subprocess
 import sys
@@ -20,14 +21,12 @@ class YouTubeTranscriber:
         self.setup_ui()
         
     def check_dependencies(self):
-        """Check if required packages are installed"""
-        try:
-            import yt_dlp
-            import whisper
-        except ImportError as e:
+        """Check if required packages are installed (without importing them; whisper loads torch)"""
+        missing = [name for name in ("yt_dlp", "whisper") if importlib.util.find_spec(name) is None]
+        if missing:
             messagebox.showerror(
                 "Missing Dependencies", 
-                f"Required packages not found: {e}\n\n"
+                f"Required packages not found: {', '.join(missing)}\n\n"
                 "Please install with:\n"
                 "pip install yt-dlp openai-whisper"
             )
@@ -335,16 +334,12 @@ class YouTubeTranscriber:
                 try:
                     self.log(f"\n[{i}/{len(urls)}] Processing: {url}")
                     
-                    # Configure yt-dlp
+                    # Configure yt-dlp (keep the native opus/m4a container; Whisper
+                    # decodes it directly, so an MP3 re-encode would be wasted work)
                     audio_path = output_dir / f"temp_audio_{i}.%(ext)s"
                     ydl_opts = {
                         'format': 'bestaudio/best',
                         'outtmpl': str(audio_path),
-                        'postprocessors': [{
-                            'key': 'FFmpegExtractAudio',
-                            'preferredcodec': 'mp3',
-                            'preferredquality': '192',
-                        }],
                         'quiet': True,
                     }
                     
@@ -354,13 +349,13 @@ class YouTubeTranscriber:
                         info = ydl.extract_info(url, download=True)
                         video_title = info.get('title', f'Unknown_Video_{i}')
                         duration = info.get('duration', 0)
+                        audio_file = Path(ydl.prepare_filename(info))
                         
                     self.log(f"Downloaded: {video_title}")
                     if duration:
                         self.log(f"Duration: {duration//60}:{duration%60:02d}")
                     
-                    # Find the downloaded audio file
-                    audio_file = output_dir / f"temp_audio_{i}.mp3"
+                    # Check the downloaded audio file
                     if not audio_file.exists():
                         raise FileNotFoundError("Audio file not found after download")
                     
@@ -418,8 +413,7 @@ class YouTubeTranscriber:
                     failed_videos.append((url, str(e)))
                     
                     # Clean up temp file if it exists
-                    temp_file = output_dir / f"temp_audio_{i}.mp3"
-                    if temp_file.exists():
+                    for temp_file in output_dir.glob(f"temp_audio_{i}.*"):
                         temp_file.unlink()
                     
                     if not self.skip_errors_var.get():